@@ -0,0 +1,26 @@
+# Print the economy ledger (data.json.log and the rotated logs), optionally only one user's events or one kind.
+#
+#   python audit.py --user 123456789012345678 --kind rob
+import argparse, datetime
+from storage import log_segments, read_log
+
+
+def main(args):
+    for path in log_segments(args.data) + [args.data + ".log"]:
+        for event in read_log(path):
+            if args.kind and event["kind"] != args.kind:
+                continue
+            user_ids = [entry[0] for entry in event["users"]]
+            if args.user and args.user not in user_ids:
+                continue
+            when = datetime.datetime.fromtimestamp(event["t"]).isoformat(sep=" ", timespec="seconds")
+            # The first user is the one who ran the command, e.g. the robber
+            changes = ", ".join(f"{user_id} {delta:+d} (now {money})" for user_id, money, wins, losses, delta in event["users"])
+            print(f"{when} {event['kind']}: {changes}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the economy ledger")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--user", type=int)
+    parser.add_argument("--kind")
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+# Per-command latency benchmark for the economy data: the old way (load_data() reads the whole data.json, the
+# command changes one user, save_data() writes it all back with indent=4, on the event loop) against EconomyStore
+# (the change happens in memory, a background flush appends it to the ledger later on the store's thread).
+# Runs /balance (read one user) and /work (credit one user) for each user count.
+#
+#   python bench_commands.py --users 1000 100000 1000000 --old-calls 3 --calls 10000
+import argparse, asyncio, json, os, random, tempfile, time
+from economy_store import EconomyStore
+from storage import JsonBackend
+
+# Real snowflakes are 18-19 digit numbers
+FIRST_ID = 100000000000000000
+
+
+def write_old_file(path, user_ids, rng):
+    data = {str(user_id): {"money": rng.randint(1000, 10 ** 6), "wins": rng.randint(0, 300), "losses": rng.randint(0, 300)} for user_id in user_ids}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+# The baseline bot's commands, average seconds per call
+def old_commands(path, user_ids, calls):
+    def load_data():
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def save_data(data):
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+
+    started = time.perf_counter()
+    for user_id in user_ids[:calls]:
+        data = load_data()
+        data[str(user_id)]["money"]
+    balance = (time.perf_counter() - started) / calls
+
+    started = time.perf_counter()
+    for user_id in user_ids[:calls]:
+        data = load_data()
+        data[str(user_id)]["money"] += 100
+        save_data(data)
+    work = (time.perf_counter() - started) / calls
+    return balance, work
+
+
+# Average seconds per call with the store, and how long the flush of all those /work calls took on the store's thread
+async def new_commands(path, user_ids, calls):
+    store = EconomyStore(JsonBackend(path), flush_interval=3600, flush_threshold=calls + 1)
+    await store.start()
+    picked = [user_ids[index % len(user_ids)] for index in range(calls)]
+
+    started = time.perf_counter()
+    for user_id in picked:
+        (await store.read_user(user_id)).money
+    balance = (time.perf_counter() - started) / calls
+
+    started = time.perf_counter()
+    for user_id in picked:
+        await store.credit(user_id, 100, kind="work")
+    work = (time.perf_counter() - started) / calls
+
+    started = time.perf_counter()
+    await store.flush()
+    flush = time.perf_counter() - started
+    await store.close()
+    return balance, work, flush
+
+
+def main(args):
+    rng = random.Random(0)
+    print(f"{'users':>10}{'old /balance':>15}{'old /work':>13}{'store /balance':>17}{'store /work':>14}{'flush':>11}")
+    for users in args.users:
+        directory = tempfile.mkdtemp(prefix="bench-commands-")
+        path = os.path.join(directory, "data.json")
+        user_ids = [FIRST_ID + rng.randrange(10 ** 17) for _ in range(users)]
+        rng.shuffle(user_ids)
+        write_old_file(path, user_ids, rng)
+
+        old_balance, old_work = old_commands(path, user_ids, args.old_calls)
+        new_balance, new_work, flush = asyncio.run(new_commands(path, user_ids, args.calls))
+        print(
+            f"{users:>10}{old_balance * 1e3:>13.1f}ms{old_work * 1e3:>11.1f}ms"
+            f"{new_balance * 1e6:>15.1f}us{new_work * 1e6:>12.1f}us{flush * 1e3:>9.1f}ms"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Economy command latency with load/save of data.json and with EconomyStore")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--old-calls", type=int, default=3, help="Calls timed the old way per user count (they're slow)")
+    parser.add_argument("--calls", type=int, default=10000, help="Calls timed with the store per user count")
+    main(parser.parse_args())
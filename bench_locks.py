@@ -0,0 +1,55 @@
+# Lock benchmark for the economy store: transfers per second with one global lock (ECONOMY_LOCK_STRIPES=1)
+# and with striped locks. A transaction that never awaits can't be interrupted, so both are the same there;
+# the difference shows once the body awaits something (--hold seconds), like the shared backends'
+# write-through or a rob that reads, yields and writes.
+#
+#   python bench_locks.py --users 10000 --transfers 20000 --concurrency 1000 --hold 0.001
+import argparse, asyncio, os, random, tempfile, time
+from economy_store import EconomyStore
+from storage import JsonBackend
+
+
+async def run(stripes, args):
+    directory = tempfile.mkdtemp(prefix="bench-locks-")
+    store = EconomyStore(JsonBackend(os.path.join(directory, "data.json")), lock_stripes=stripes)
+    await store.start()
+    user_ids = list(range(1, args.users + 1))
+    for user_id in user_ids:
+        store.get_user(user_id).money = 1000
+
+    rng = random.Random(0)
+    pairs = [rng.sample(user_ids, 2) for _ in range(args.transfers)]
+    queue = iter(pairs)
+
+    async def worker():
+        for from_id, to_id in queue:
+            async with store.transaction(from_id, to_id, kind="transfer") as (sender, receiver):
+                if args.hold:
+                    await asyncio.sleep(args.hold)
+                sender.money -= 1
+                receiver.money += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    total = sum(record.money for record in store.data.values())
+    await store.close()
+    assert total == args.users * 1000, "money wasn't conserved"
+    return args.transfers / elapsed
+
+
+def main(args):
+    print(f"{args.transfers} transfers between {args.users} users, {args.concurrency} at once, {args.hold * 1000:g}ms awaited inside each")
+    results = {stripes: asyncio.run(run(stripes, args)) for stripes in (1, args.stripes)}
+    striped = f"{args.stripes} lock stripes:"
+    print(f"{'global lock:':<20}{results[1]:>8.0f} transfers/s")
+    print(f"{striped:<20}{results[args.stripes]:>8.0f} transfers/s ({results[args.stripes] / results[1]:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transfers per second with a global lock and with striped locks")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--transfers", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--hold", type=float, default=0.001, help="Seconds awaited inside each transaction")
+    parser.add_argument("--stripes", type=int, default=64)
+    main(parser.parse_args())
@@ -0,0 +1,62 @@
+# Memory benchmark for the economy data: bytes per user with the old layout
+# (str user id -> {"money": ..., "wins": ..., "losses": ...}) and with UserRecord (int user id -> UserRecord).
+# Also measures bytes per active trivia game in the game registry.
+#
+#   python bench_memory.py --users 1000000 --games 10000
+import argparse, gc, random, tracemalloc
+from economy_store import UserRecord
+from trivia_games import TriviaGames
+
+# Real snowflakes are 18-19 digit numbers
+FIRST_ID = 100000000000000000
+
+
+def old_layout(user_ids, values):
+    return {str(user_id): {"money": money, "wins": wins, "losses": losses} for user_id, (money, wins, losses) in zip(user_ids, values)}
+
+def new_layout(user_ids, values):
+    return {user_id: UserRecord(money, wins, losses) for user_id, (money, wins, losses) in zip(user_ids, values)}
+
+
+# Bytes allocated while building the data (ids and values are made beforehand so they don't count,
+# except the str() copies the old layout makes)
+def measure(build, user_ids, values):
+    gc.collect()
+    tracemalloc.start()
+    data = build(user_ids, values)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def main(args):
+    random.seed(0)
+    user_ids = [FIRST_ID + random.randrange(10 ** 17) for _ in range(args.users)]
+    # Big balances so they're real int objects, like in production, instead of cached small ints
+    values = [(random.randint(1000, 10 ** 6), random.randint(0, 300), random.randint(0, 300)) for _ in range(args.users)]
+
+    old = measure(old_layout, user_ids, values)
+    new = measure(new_layout, user_ids, values)
+    print(f"{args.users} users")
+    print(f"dict records, str keys:  {old / args.users:.0f} bytes/user ({old / 2 ** 20:.1f} MiB)")
+    print(f"UserRecord, int keys:    {new / args.users:.0f} bytes/user ({new / 2 ** 20:.1f} MiB)")
+    print(f"saved {(1 - new / old) * 100:.0f}%")
+
+    # Registry entry, game record and timer wheel entry for each question (ids made beforehand, like above)
+    message_ids = [FIRST_ID + index for index in range(args.games)]
+    answers = [f"Answer {index}" for index in range(args.games)]
+    games = TriviaGames(path="", max_games=args.games)
+    gc.collect()
+    tracemalloc.start()
+    for message_id, answer in zip(message_ids, answers):
+        games.add(message_id, FIRST_ID, FIRST_ID, 2, answer, "easy")
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{args.games} trivia games: {size / args.games:.0f} bytes/game")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per user of the economy data layouts")
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--games", type=int, default=10000)
+    main(parser.parse_args())
@@ -0,0 +1,57 @@
+# Leaderboard benchmark: the old /leaderboard (go through every member, sort by money, take the top 10 and find
+# the author) against RankingIndex (top 10 and the author's rank from the index), for guilds of different sizes.
+# Also times a balance change, which the old way didn't have to do anything for but the index has to keep up with.
+#
+#   python bench_ranking.py --members 1000 100000 1000000 --calls 20 --updates 100000
+import argparse, random, time
+from ranking import RankingIndex
+
+# Real snowflakes are 18-19 digit numbers
+FIRST_ID = 100000000000000000
+
+
+def old_leaderboard(member_ids, data, author_id):
+    guild_data = [(user_id, data[user_id]) for user_id in member_ids if user_id in data]
+    guild_data.sort(key=lambda x: x[1], reverse=True)
+    top_10 = guild_data[:10]
+    author_rank = next(position for position, (user_id, _) in enumerate(guild_data, 1) if user_id == author_id)
+    return top_10, author_rank
+
+def new_leaderboard(index, author_id):
+    return index.top(10), index.rank(author_id)
+
+
+# Average seconds per call of leaderboard(author_id)
+def timed(leaderboard, authors):
+    started = time.perf_counter()
+    for author_id in authors:
+        leaderboard(author_id)
+    return (time.perf_counter() - started) / len(authors)
+
+
+def main(args):
+    rng = random.Random(0)
+    print(f"{'members':>10}{'sort':>14}{'index':>14}{'speedup':>10}{'balance change':>18}")
+    for members in args.members:
+        member_ids = [FIRST_ID + rng.randrange(10 ** 17) for _ in range(members)]
+        data = {user_id: rng.randint(1000, 10 ** 6) for user_id in member_ids}
+        index = RankingIndex()
+        for user_id, money in data.items():
+            index.update(user_id, money)
+        authors = rng.choices(member_ids, k=args.calls)
+
+        old = timed(lambda author_id: old_leaderboard(member_ids, data, author_id), authors)
+        new = timed(lambda author_id: new_leaderboard(index, author_id), authors)
+        changes = [(rng.choice(member_ids), rng.randint(1000, 10 ** 6)) for _ in range(args.updates)]
+        started = time.perf_counter()
+        for user_id, money in changes:
+            index.update(user_id, money)
+        update = (time.perf_counter() - started) / args.updates
+        print(f"{members:>10}{old * 1e3:>12.2f}ms{new * 1e6:>12.1f}us{old / new:>9.0f}x{update * 1e6:>16.1f}us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard time with a full sort and with RankingIndex")
+    parser.add_argument("--members", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--calls", type=int, default=20, help="Leaderboard calls timed per guild size")
+    parser.add_argument("--updates", type=int, default=100000, help="Balance changes timed per guild size")
+    main(parser.parse_args())
@@ -0,0 +1,50 @@
+# Startup benchmark: how long setup_hook takes (store, extensions, caches; the slash command sync is skipped)
+# and which upstream clients exist right after. Clients nobody asked for yet shouldn't be there.
+# Runs in a temp dir so the real data.json is never touched, and never connects to Discord.
+#
+#   python bench_startup.py --runs 5
+import argparse, asyncio, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# One fresh process per run, so imports are paid every time like on a real start
+async def startup():
+    os.environ["SKIP_TREE_SYNC"] = "1"
+    # Placeholders, nothing gets fetched before setup_hook returns
+    for name in ("CLIENT_ID", "CLIENT_SECRET", "USER_AGENT", "GIPHY_KEY"):
+        os.environ.setdefault(name, "bench")
+    sys.path.insert(0, ROOT)
+    os.chdir(tempfile.mkdtemp(prefix="bench-startup-"))
+    started = time.perf_counter()
+    import bettercommented
+    imported = time.perf_counter()
+    bot = bettercommented.bot
+    await bot.setup_hook()
+    ready = time.perf_counter()
+    # Let the background tasks setup_hook started get going before looking at the clients
+    await asyncio.sleep(0.5)
+    # Background caches print their own errors (there's no network here), so the result line is tagged
+    print(f"startup {imported - started} {ready - imported} {int(bot._reddit is not None)} {int(bot._giphy is not None)}", flush=True)
+    await bot.close()
+
+
+def main(args):
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, __file__, "--child"], capture_output=True, text=True, check=True).stdout
+        runs.append(next(line.split()[1:] for line in output.splitlines() if line.startswith("startup ")))
+    imports = statistics.median(float(run[0]) for run in runs)
+    setup = statistics.median(float(run[1]) for run in runs)
+    print(f"import: {imports * 1000:.0f}ms, setup_hook: {setup * 1000:.0f}ms (median of {args.runs})")
+    print(f"Reddit client created: {runs[-1][2] == '1'}, Giphy client created: {runs[-1][3] == '1'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the bot's setup_hook and see which clients it creates")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(startup())
+    else:
+        main(args)
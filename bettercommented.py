@@ -1,7 +1,31 @@
 # Importing necessary libraries
-import requests, os, discord, random, json, asyncpraw, giphypop, math
+import time
+started_at = time.perf_counter()
+
+import asyncio, os, discord
+from contextlib import asynccontextmanager
 from discord.ext import commands
 from dotenv import load_dotenv
+from http_client import HttpClient, UpstreamError
+from rate_limit import UpstreamGuards, UpstreamUnavailable
+from economy_store import EconomyStore
+from storage import make_backend
+from guild_economy import GuildEconomies
+from ranking import GuildRankings
+from gif_pool import GifPool, ECONOMY_TAGS
+from meme_cache import MemeCache, MEME_SUBREDDITS
+from trivia_bank import TriviaBank
+from trivia_games import TriviaGames
+from trivia_stats import TriviaStats
+from hangman_words import WordIndex
+from hangman_games import HangmanGames
+from content_cache import ContentCache
+from metrics import MetricsServer
+from loop_watchdog import LoopWatchdog
+from tree_sync import sync_tree
+from cooldowns import PersistentCooldowns
+from replies import ChannelHeadroom, schedule_defer
+import metrics
 
 # Load environment variables from .env file
 load_dotenv()
@@ -9,116 +33,224 @@ load_dotenv()
 # Define the filenames
 data_file = "data.json"
 
-# Create the rock paper scissors data file if it doesn't exist
-if not os.path.exists(data_file):
-    with open(data_file, "w") as f:
-        json.dump({}, f)
-
-# Function to load rock paper scissors game data from file
-def load_data():
-    with open(data_file, "r") as f:
-        return json.load(f)
-
-# Function to save rock paper scissors game data to file
-def save_data(data):
-    with open(data_file, "w") as f:
-        json.dump(data, f, indent=4)
-
-# Create Discord bot instance with all intents and set command prefix
-bot = commands.Bot(command_prefix="Mr!", intents=discord.Intents.all())
-
-g = giphypop.Giphy(
-    api_key=os.getenv("GIPHY_KEY"),
-    strict=True
-)
-
-class TriviaView(discord.ui.View):
-    def __init__(self, author):
-        super().__init__(timeout=30)
-        self.message = None
-        self.answered = False
-        self.correct_answer = None
-        self.correct_answer_index = None
-        self.author = author
-
-    @discord.ui.button(label="A", style=discord.ButtonStyle.blurple)
-    async def button_a(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_answer(interaction, 0)
-
-    @discord.ui.button(label="B", style=discord.ButtonStyle.blurple)
-    async def button_b(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_answer(interaction, 1)
-
-    @discord.ui.button(label="C", style=discord.ButtonStyle.blurple)
-    async def button_c(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_answer(interaction, 2)
-
-    @discord.ui.button(label="D", style=discord.ButtonStyle.blurple)
-    async def button_d(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_answer(interaction, 3)
-
-    async def handle_answer(self, interaction: discord.Interaction, choice_index: int):
-        if interaction.user != self.author:
-            await interaction.response.send_message("Only the person who sent the command can answer!", ephemeral=True)
+# Every command lives in one of these extensions, they can be reloaded with Mr!reload <name>
+INITIAL_EXTENSIONS = ["cogs.fun", "cogs.trivia", "cogs.memes", "cogs.economy", "cogs.rps", "cogs.hangman"]
+
+# Context that times how long sending to Discord takes and counts messages per channel
+class InstrumentedContext(commands.Context):
+    # Held while sending so an automatic defer (see replies.py) can't happen halfway through a send
+    @property
+    def reply_lock(self):
+        lock = getattr(self, "_reply_lock", None)
+        if lock is None:
+            lock = self._reply_lock = asyncio.Lock()
+        return lock
+
+    async def send(self, *args, **kwargs):
+        self.bot.headroom.record(self.channel.id)
+        if self.command is not None:
+            metrics.discord_sends.inc(self.command.qualified_name)
+        with metrics.phase("discord"):
+            async with self.reply_lock:
+                return await super().send(*args, **kwargs)
+
+# With SHARD_COUNT set (launcher.py sets it for every worker process) the bot runs the shards listed
+# in SHARD_IDS, all of them in this one process
+BotBase = commands.AutoShardedBot if os.getenv("SHARD_COUNT") else commands.Bot
+
+# Bot subclass so the shared clients get created once and closed properly
+class FunnyBot(BotBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rate limits and circuit breakers for every upstream, shared by all the clients below
+        self.guards = UpstreamGuards()
+        self.api = HttpClient(self.guards)
+        self.store = EconomyStore(make_backend(data_file))
+        self.rankings = GuildRankings(self.store)
+        # One economy per guild instead of a global one, only if GUILD_ECONOMY is set in the .env file
+        self.guild_economies = GuildEconomies() if os.getenv("GUILD_ECONOMY") else None
+        # Messages sent per channel recently, to see how close we are to Discord's per-channel limit
+        self.headroom = ChannelHeadroom()
+        # Long cooldowns (daily, rob...) survive restarts and are shared with the other processes
+        self.cooldowns = PersistentCooldowns(self.store)
+        self.add_check(self.cooldowns.check)
+        self.gifs = GifPool(lambda: self.giphy, ECONOMY_TAGS, self.guards.get("giphy"))
+        self.memes = MemeCache(lambda: self.reddit, MEME_SUBREDDITS, self.guards.get("reddit"))
+        self.trivia_bank = TriviaBank(self.api)
+        # Trivia questions waiting for an answer, they survive restarts
+        self.trivia_games = TriviaGames()
+        self.trivia_stats = TriviaStats(self.store)
+        # Hangman words (read from words.txt when the cog loads) and the games in progress
+        self.hangman_words = WordIndex()
+        self.hangman_games = HangmanGames()
+        self.content = ContentCache(self.api)
+        # Only serve /metrics if a port is set in the .env file
+        self.metrics_server = MetricsServer() if os.getenv("METRICS_PORT") else None
+        metrics.collectors.append(self.collect_metrics)
+        # Event loop blocking detector, only if LOOP_WATCHDOG is set in the .env file
+        self.watchdog = LoopWatchdog() if os.getenv("LOOP_WATCHDOG") else None
+        if self.watchdog is not None:
+            metrics.collectors.append(self.watchdog.collect_metrics)
+        # Giphy and Reddit clients, created the first time something needs them
+        self._giphy = None
+        self._reddit = None
+
+    # The store a guild's balances live in, for as long as the async with lasts (a guild store can't be closed
+    # under a command that's using it). Rock paper scissors scores and DMs always use the global one
+    @asynccontextmanager
+    async def economy_store(self, guild):
+        if self.guild_economies is None or guild is None:
+            yield self.store
             return
+        async with self.guild_economies.use(guild.id) as store:
+            yield store
+
+    @property
+    def giphy(self):
+        if self._giphy is None:
+            import giphypop
+            self._giphy = giphypop.Giphy(
+                api_key=os.getenv("GIPHY_KEY"),
+                strict=True
+            )
+        return self._giphy
+
+    @property
+    def reddit(self):
+        if self._reddit is None:
+            import asyncpraw
+            self._reddit = asyncpraw.Reddit(
+                client_id=os.getenv("CLIENT_ID"),
+                client_secret=os.getenv("CLIENT_SECRET"),
+                user_agent=os.getenv("USER_AGENT")
+            )
+        return self._reddit
+
+    # Runs once before connecting to the gateway (not on every reconnect like on_ready)
+    async def setup_hook(self):
+        await self.api.start()
+        await self.store.start()
+        if self.guild_economies is not None:
+            self.guild_economies.start()
+        # Load the commands, each extension starts whatever background caches it needs
+        for extension in INITIAL_EXTENSIONS:
+            await self.load_extension(extension)
+        self.cooldowns.register_commands(self.walk_commands())
+        self.cooldowns.start()
+        print(f"Set up in {time.perf_counter() - started_at:.2f}s")
+        # Sync slash commands once here (not in on_ready, which runs on every reconnect), and only if they changed
+        await sync_tree(self)
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        if self.watchdog is not None:
+            self.watchdog.register_commands(self.walk_commands())
+            self.watchdog.start()
+
+    # Every command (prefix or slash) gets our timed context
+    async def get_context(self, origin, *, cls=InstrumentedContext):
+        return await super().get_context(origin, cls=cls)
+
+    # Gauges for the caches and upstreams, read whenever /metrics is scraped
+    def collect_metrics(self):
+        gauges = []
+        for name, guard in self.guards.guards.items():
+            gauges.append(("bot_upstream_circuit_open", "1 if the upstream's circuit breaker is open", ("upstream",), (name,), int(guard.breaker.state != "closed")))
+            gauges.append(("bot_upstream_rejected_total", "Calls rejected by the rate limiter or breaker", ("upstream",), (name,), guard.rejected))
+        for name, stats in self.content.stats().items():
+            for key in ("hits", "stale_hits", "misses", "fresh"):
+                gauges.append((f"bot_content_{key}", f"Content buffer {key.replace('_', ' ')}", ("source",), (name,), stats[key]))
+        trivia_stats = self.trivia_bank.stats()
+        for difficulty, size in trivia_stats["bank_sizes"].items():
+            gauges.append(("bot_trivia_bank_size", "Questions waiting in the trivia bank", ("difficulty",), (difficulty,), size))
+        gauges.append(("bot_trivia_bank_hit_rate", "Share of trivia commands served from the bank", (), (), trivia_stats["hit_rate"]))
+        gauges.append(("bot_trivia_refill_seconds", "Average trivia bank refill latency", (), (), trivia_stats["avg_refill_seconds"]))
+        gauges.append(("bot_trivia_active_games", "Trivia questions waiting for an answer", (), (), len(self.trivia_games.games)))
+        gauges.append(("bot_hangman_active_games", "Hangman games in progress", (), (), len(self.hangman_games.games)))
+        for tag, pool in self.gifs.pools.items():
+            gauges.append(("bot_gif_pool_size", "GIFs waiting in the pool", ("tag",), (tag,), len(pool)))
+        gauges.append(("bot_economy_dirty_users", "Users waiting to be written to storage", (), (), len(self.store.dirty)))
+        if self.guild_economies is not None:
+            gauges.append(("bot_guild_economies_loaded", "Guild economies loaded in memory", (), (), len(self.guild_economies.stores)))
+        gauges.append(("bot_discord_channels_exhausted", "Channels with no message headroom left right now", (), (), self.headroom.exhausted()))
+        return gauges
+
+    # Close the shared HTTP pool and the Reddit requestor and save the economy when the bot shuts down
+    async def close(self):
+        await self.api.close()
+        await self.gifs.close()
+        await self.memes.close()
+        await self.trivia_bank.close()
+        await self.trivia_games.close()
+        await self.trivia_stats.close()
+        await self.hangman_games.close()
+        await self.content.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        if self.watchdog is not None:
+            await self.watchdog.close()
+        await self.cooldowns.close()
+        if self.guild_economies is not None:
+            await self.guild_economies.close()
+        await self.store.close()
+        if self._reddit is not None:
+            await self._reddit.close()
+        await super().close()
+
+# Which shards this process runs, e.g. SHARD_COUNT=8 SHARD_IDS=0,1,2,3
+def shard_options():
+    if not os.getenv("SHARD_COUNT"):
+        return {}
+    options = {"shard_count": int(os.getenv("SHARD_COUNT"))}
+    if os.getenv("SHARD_IDS"):
+        options["shard_ids"] = [int(shard_id) for shard_id in os.getenv("SHARD_IDS").split(",")]
+    return options
 
-        if self.answered:
-            await interaction.response.send_message("This question has already been answered!", ephemeral=True)
-            return
-        
-        self.answered = True
-        
-        for idx, button in enumerate(self.children):
-            button.disabled = True
-            if idx == self.correct_answer_index:
-                button.style = discord.ButtonStyle.green
-            elif idx == choice_index and choice_index != self.correct_answer_index:
-                button.style = discord.ButtonStyle.red
-        
-        await self.message.edit(view=self)
-
-        if choice_index == self.correct_answer_index:
-            await interaction.response.send_message(f"👍 That is correct! The right answer was {self.correct_answer}")
-        else:
-            await interaction.response.send_message(f"❌ That is incorrect! The right answer was {self.correct_answer}")
-        
-        answeredEmbed = discord.Embed(
-            title="Trivia",
-            description=f"Answered by {interaction.user.mention}",
-            color=discord.Color.green()
-        )
-
-        await self.message.edit(embed=answeredEmbed)
-        
-    async def on_timeout(self):
-        for item in self.children:
-            item.disabled = True
-        
-        if self.message:
-            await self.message.edit(view=self)
+# Create Discord bot instance with all intents and set command prefix
+bot = FunnyBot(command_prefix="Mr!", intents=discord.Intents.all(), **shard_options())
 
 # Event handler for when the bot is ready
 @bot.event
 async def on_ready():
-    print(f"{bot.user} is on")
-    await bot.tree.sync()  # Sync slash commands
+    print(f"{bot.user} is on ({time.perf_counter() - started_at:.2f}s after starting)")
+
+# Keep the leaderboards up to date when people join or leave
+@bot.event
+async def on_member_join(member: discord.Member):
+    bot.rankings.add_member(member.guild.id, member.id)
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    bot.rankings.remove_member(member.guild.id, member.id)
 
-    # Initialize Reddit API client
-    global myReddit
-    myReddit = asyncpraw.Reddit(
-    client_id=os.getenv("CLIENT_ID"),
-    client_secret=os.getenv("CLIENT_SECRET"),
-    user_agent=os.getenv("USER_AGENT")
-    )
-    
-# Event handler to close the Reddit requestor
 @bot.event
-async def on_close():
-    await myReddit.close()
+async def on_guild_remove(guild: discord.Guild):
+    bot.rankings.drop_guild(guild.id)
+
+# Start the command's persistent cooldown, time every command, and defer slash commands that take too long to answer
+@bot.before_invoke
+async def start_command_timer(ctx: commands.Context):
+    # Raises CommandOnCooldown if another invocation started it first, before the timer starts
+    await bot.cooldowns.hit(ctx)
+    metrics.command_started(ctx.command.qualified_name)
+    ctx.defer_task = schedule_defer(ctx)
+
+@bot.after_invoke
+async def stop_command_timer(ctx: commands.Context):
+    metrics.command_finished()
+    defer_task = getattr(ctx, "defer_task", None)
+    if defer_task is not None:
+        defer_task.cancel()
 
 # Error handling for various command errors
 @bot.event
 async def on_command_error(ctx: commands.Context, error):
+    # Count errors by type (the real exception is wrapped in CommandInvokeError)
+    command_name = ctx.command.qualified_name if ctx.command else "unknown"
+    if isinstance(error, commands.CommandOnCooldown):
+        metrics.cooldown_rejections.inc(command_name)
+    else:
+        metrics.command_errors.inc(command_name, type(getattr(error, "original", error)).__name__)
+
     if isinstance(error, commands.CommandOnCooldown):
         await ctx.send(f"Please wait {error.retry_after:.2f} seconds before using this command again.")
     elif isinstance(error, commands.MissingRequiredArgument):
@@ -127,537 +259,26 @@ async def on_command_error(ctx: commands.Context, error):
         await ctx.send("Please provide valid arguments.")
     elif isinstance(error, commands.CommandNotFound):
         await ctx.send("Command not found.")
+    elif isinstance(error, commands.CommandInvokeError) and isinstance(error.original, (UpstreamError, UpstreamUnavailable)):
+        await ctx.send("That API isn't responding right now, please try again later!")
     elif isinstance(error, commands.CommandInvokeError):
         await ctx.send("An error occurred while executing the command.")
     else:
         await ctx.send("An error occurred.")
 
-# Command to insult a user
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@discord.app_commands.describe(user="The user you want to insult")
-async def quote(ctx: commands.Context, user: discord.User):
-    # Fetch a random insult from the API
-    response = requests.get("https://evilinsult.com/generate_insult.php?lang=en&type=json").json()
-
-    # Determine the correct user mention based on the interaction type
-    correct_form = ctx.user if isinstance(ctx, discord.Interaction) else ctx.author
-
-    # Check if the bot is being insulted and respond accordingly
-    if user == bot.user:
-        message = f"Shush {correct_form.mention}"
-    else:
-        message = f"{response['insult']} {user.mention}"
-
-    await ctx.send(message)
-
-# Command to get a random number fact
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="number", description="Say a random fact about a random number")
-async def num(ctx: commands.Context):
-    # Choose a random number fact category and fetch the fact from the API
-    url = requests.get("http://numbersapi.com/random/" + random.choice(["math?json", "trivia?json", "year?json"]))
-    response = url.json()
-
-    await ctx.send(response["text"])
-
-# Command to get a random Chuck Norris fact
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="chuck_norris", description="Say a random fact about Chuck Norris 👀")
-async def chuck_norris(ctx: commands.Context):
-    response = requests.get("https://api.chucknorris.io/jokes/random").json()
-
-    await ctx.send(response["value"])
-
-# Command to get a random dad joke
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="dad_joke", description="Say a random dad joke. You will die")
-async def dad(ctx: commands.Context):
-    url = "https://icanhazdadjoke.com/"
-    headers = {
-        "Accept" : "application/json"
-    }
-    response = requests.get(url, headers=headers).json()
-
-    await ctx.send(response["joke"])
-
-# Command to answer yes or no to a question
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="yes_or_no", description="The bot will answer yes or no")
-@discord.app_commands.describe(question="The question you want to ask the bot. The answer will be either yes or no")
-async def yesno(ctx: commands.Context, *, question: str):
-    # Fetch a yes/no response with an image
-    response = requests.get("https://yesno.wtf/api").json()
-
-    message = f"The question was: **{question}** to which I respond:"
-
-    # Handle different response types for interactions and regular commands
-    if isinstance(ctx, discord.Interaction):
-        await ctx.response.send_message(message)
-        await ctx.followup.send(response["image"])
-    else:
-        await ctx.send(message)
-        await ctx.send(response["image"])
-
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="useless_fact", description="Learn a random fact")
-async def useless_fact(ctx: commands.Context):
-    response = requests.get("https://uselessfacts.jsph.pl/random.json?language=en").json()
-
-    await ctx.send(response["text"])
-
-# Command to get a random meme from Reddit
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="random_meme", description="Get a random meme from Reddit")
-async def rand_meme(ctx: commands.Context):
-    mySubreddits = ["memes", "dankmemes", "blursedimages", "funny", "TikTokCringe", "BlackPeopleTwitter", "me_irl", "193"]
-
-    subreddit = await myReddit.subreddit(random.choice(mySubreddits))
-    submissions = []
-    async for submission in subreddit.hot(limit=100):
-        submissions.append(submission)
-
-    valid_extensions = (".gif", ".gifv", ".jpeg", ".jpg", ".png")
-    valid_submissions = [sub for sub in submissions if sub.url.lower().endswith(valid_extensions)]
-
-    random_submission = random.choice(valid_submissions)
-    embed = discord.Embed(
-        title=random_submission.title,
-        colour=discord.Colour.from_rgb(115, 215, 255)
-    )
-    embed.set_image(url=random_submission.url)
-
-    await ctx.send(embed=embed)
-
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="trivia", description="Get a random trivia question! Choose between easy, medium and hard difficulty")
-@discord.app_commands.describe(difficulty="Choose the difficulty of the question")
-@discord.app_commands.choices(difficulty=[
-    discord.app_commands.Choice(name="Easy", value="easy"),
-    discord.app_commands.Choice(name="Medium", value="medium"),
-    discord.app_commands.Choice(name="Hard", value="hard")
-])
-async def trivia(ctx: commands.Context, difficulty: discord.app_commands.Choice[str]):
-    url = f"https://opentdb.com/api.php?amount=1&difficulty={difficulty.value}&type=multiple"
-    response = requests.get(url).json()
-    if response["response_code"] != 0 or not response["results"]:
-        await ctx.send("Couldnt fetch trivia question, please try again later!")
-        return
-    
-    question_data = response["results"][0]
-    question = question_data["question"]
-    correct_answer = question_data["correct_answer"]
-    incorrect_answers = question_data["incorrect_answers"]
-
-    answers = incorrect_answers + [correct_answer]
-    random.shuffle(answers)
-
-    embed = discord.Embed(
-        title="Trivia Question",
-        description=question,
-        colour=discord.Colour.random()
-    )
-    embed.add_field(name="A)", value=answers[0], inline=False)
-    embed.add_field(name="B)", value=answers[1], inline=False)
-    embed.add_field(name="C)", value=answers[2], inline=False)
-    embed.add_field(name="D)", value=answers[3], inline=False)
-
-    view = TriviaView(ctx.author)
-
-    correct_index = answers.index(correct_answer)
-    view.correct_answer_index = correct_index
-    view.correct_answer = correct_answer
-    view.message = await ctx.send(embed=embed, view=view)
-
-# Command to display information about the bot's commands
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="bot_help", description="Get a list of all available commands")
-async def help_command(ctx: commands.Context):
-    # Create the embed with command information
-    embed = discord.Embed(
-        title="Commands:",
-        colour=discord.Colour.from_rgb(174, 214, 241)
-    )
-    # Add fields for each command
-    embed.add_field(name= "/insult", value="Insult someone")
-    embed.add_field(name= "/number", value="Make the bot say a random fact about a random number")
-    embed.add_field(name= "/chuck_norris", value="Make the bot say a random fact about Chuck Norris")
-    embed.add_field(name= "/dad_joke", value="Make the bot say a dad joke")
-    embed.add_field(name= "/yes_or_no", value="Ask the bot a question. The bot will answer either yes or no")
-    embed.add_field(name= "/help", value="Get a list of all available commands")
-    embed.add_field(name= "/rock_paper_scissors", value="Play rock paper scissors with the bot")
-    embed.add_field(name= "/random_meme", value="Get a random meme from Reddit")
-    embed.add_field(name= "/work", value="Work for me!")
-    embed.add_field(name= "/crime", value="Commit a crime")
-    embed.add_field(name= "/balance", value="Check your balance")
-    embed.add_field(name= "/gamble", value="Gamble with your money! $30 SK minimum This bot's currency is called **Skibidirians** (SK)")
-    embed.add_field(name= "/leaderboard", value="Check the leaderboard")
-    embed.add_field(name= "/daily", value="Get your daily allowance!")
-    embed.add_field(name="/rob", value="Try to rob someone!")
-        
-    await ctx.send(embed=embed)
-
-# Command to play rock paper scissors with the bot
-@commands.cooldown(1, 3, commands.BucketType.guild)
-@bot.hybrid_command(name="rock_paper_scissors", description="Play rock paper scissors with the bot")
-@discord.app_commands.describe(choice="Choose between rock, paper or scissors")
-@discord.app_commands.choices(choice=[
-    discord.app_commands.Choice(name="Rock", value="rock"),
-    discord.app_commands.Choice(name="Paper", value="paper"),
-    discord.app_commands.Choice(name="Scissors", value="scissors")
-])
-async def rock_paper_scissors(ctx: commands.Context, choice: str):
-    # Bot makes a random choice
-    bot_choice = random.choice(["rock", "paper", "scissors"])
-    user_choice = choice.lower()
-    
-    # Load existing game data
-    data = load_data()
-
-    user_id = str(ctx.author.id)
-
-    # Create user data if it doesn't exist
-    if user_id not in data:
-        data[user_id] = {"wins": 0, "losses": 0}
-
-    if "wins" not in data[user_id]:
-        data[user_id]["wins"] = 0
-    if "losses" not in data[user_id]:
-        data[user_id]["losses"] = 0
-
-    # Determine the winner and update scores
-    if user_choice == bot_choice:
-        result = f"It's a tie! We both chose {bot_choice}."
-    elif (user_choice == "rock" and bot_choice == "scissors") or \
-   (user_choice == "paper" and bot_choice == "rock") or \
-   (user_choice == "scissors" and bot_choice == "paper"):
-        result = f"You win! You chose {user_choice}, and I chose {bot_choice}."
-        data[user_id]["wins"] += 1
-    else:
-        result = f"I win! You chose {user_choice}, and I chose {bot_choice}."
-        data[user_id]["losses"] += 1
-
-    # Save updated game data
-    save_data(data)
-
-    # Send the result and current score
-    await ctx.send(f"{result} Your current score: Wins: {data[user_id]['wins']}, Losses: {data[user_id]['losses']}")
-
-"""
-    I STILL WANT TO DO HANGMAN RAAAAHHH
-"""
-
-"""
-    Here start all the economy commands
-    Yummers 🤑🤑🤑
-"""
-@commands.cooldown(1, 900, commands.BucketType.user)
-@bot.hybrid_command(name="work", description="Work for me!")
-async def work(ctx: commands.Context):
-    user_id = str(ctx.author.id)
-    data = load_data()
-
-    phrases = [
-    f"{ctx.author.mention} has worked as a cashier and earned",
-    f"{ctx.author.mention} delivered pizzas and made",
-    f"{ctx.author.mention} mowed lawns in the neighborhood and collected",
-    f"{ctx.author.mention} walked dogs for busy pet owners and received",
-    f"{ctx.author.mention} worked a shift at the local factory and earned",
-    f"{ctx.author.mention} sold handmade crafts online and pocketed",
-    f"{ctx.author.mention} did some freelance writing and got paid",
-    f"{ctx.author.mention} helped out at a car wash and made",
-    f"{ctx.author.mention} worked as a street performer and collected",
-    f"{ctx.author.mention} completed online surveys and earned",
-    f"{ctx.author.mention} worked overtime at the office and received",
-    f"{ctx.author.mention} offered tech support and was paid",
-    f"{ctx.author.mention} taught an online class and made",
-    f"{ctx.author.mention} worked as a virtual assistant and earned",
-    f"{ctx.author.mention} did some gardening work and collected"
-    ]
-
-    if not user_id in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-    
-    randphrase = random.choice(phrases)
-    added_money = random.randint(120, 450)
-    data[user_id]["money"] += added_money
-
-    embed = discord.Embed(
-        title="You worked!",
-        description=f"{randphrase} ${added_money} **SK**",
-        colour=discord.Colour.dark_green()
-    )
-    gif = g.random_gif(tag="work")
-    embed.set_image(url=gif.media_url)
-    await ctx.send(embed=embed)
-
-    save_data(data)
-
-@commands.cooldown(1, 1200, commands.BucketType.user)
-@bot.hybrid_command(name="crime", description="Commit a crime for money!")
-async def crime(ctx: commands.Context):
-    user_id = str(ctx.author.id)
-    data = load_data()
-
-    success_phrases = [
-    f"{ctx.author.mention} pulled off a daring heist and got away with",
-    f"{ctx.author.mention} hacked into a digital vault and transferred",
-    f"{ctx.author.mention} organized a complex scheme and pocketed",
-    f"{ctx.author.mention} snuck into a high-security area and snagged",
-    f"{ctx.author.mention} conducted a risky operation and secured",
-    f"{ctx.author.mention} executed a cunning plan and acquired",
-    f"{ctx.author.mention} orchestrated a clever con and walked away with",
-    f"{ctx.author.mention} infiltrated a secret facility and escaped with",
-    f"{ctx.author.mention} cracked a supposedly unbreakable safe and obtained",
-    f"{ctx.author.mention} conducted some shady business and earned",
-    f"{ctx.author.mention} engaged in some questionable activities and gained",
-    f"{ctx.author.mention} took a walk on the wild side and came back with",
-    f"{ctx.author.mention} bent the rules of society and profited",
-    f"{ctx.author.mention} lived dangerously for a day and collected",
-    f"{ctx.author.mention} took a big risk and it paid off with"
-    ]
-
-    caught_phrases = [
-    f"{ctx.author.mention} got caught red-handed and had to pay a fine of",
-    f"{ctx.author.mention}'s plan backfired, resulting in a penalty of",
-    f"{ctx.author.mention} tripped the alarm and lost",
-    f"{ctx.author.mention}'s scheme unraveled, costing them",
-    f"{ctx.author.mention} was outsmarted by security and fined",
-    f"{ctx.author.mention}'s luck ran out, and they had to forfeit",
-    f"{ctx.author.mention} got busted and had to cough up",
-    f"{ctx.author.mention}'s criminal career hit a snag, losing them",
-    f"{ctx.author.mention} faced the consequences and paid",
-    f"{ctx.author.mention}'s risky venture failed, costing them",
-    f"{ctx.author.mention} couldn't talk their way out and lost",
-    f"{ctx.author.mention}'s master plan fell apart, resulting in a loss of",
-    f"{ctx.author.mention} got a taste of justice and had to pay",
-    f"{ctx.author.mention}'s crime spree came to an abrupt end, costing",
-    f"{ctx.author.mention} learned crime doesn't pay and lost"
-    ]
-
-    if not user_id in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-
-    if random.randint(1, 100) <= 65:
-        amount = random.randint(120, 450) * 3
-        data[user_id]["money"] += amount
-        phrase = random.choice(success_phrases)
-        colour = discord.Colour.brand_red()
-    else:
-        amount = random.randint(120, 450) * 4
-        data[user_id]["money"] -= amount
-        phrase = random.choice(caught_phrases)
-        colour = discord.Colour.dark_red()
-    
-    embed = discord.Embed(
-        title="You committed a crime!",
-        description=f"{phrase} ${amount} **SK**",
-        colour=colour
-    )
-    gif = g.random_gif(tag="burglar")
-    embed.set_image(url=gif.media_url)
-    await ctx.send(embed=embed)
-
-    save_data(data)
-
-@commands.cooldown(1, 60, commands.BucketType.user)
-@bot.hybrid_command(name="balance", description="Check your balance!")
-async def balance(ctx: commands.Context):
-    user_id = str(ctx.author.id)
-    data = load_data()
-
-    if not user_id in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-
-    phrase = f"You have ${data[user_id]['money']} **SK**"
-    embed = discord.Embed(
-        title="Your balance",
-        description=phrase,
-        colour=discord.Colour.dark_green()
-    )
-    embed.set_image(url=ctx.author.display_avatar.url)
-    await ctx.send(embed=embed)
-
-@commands.cooldown(1, 300, commands.BucketType.user)
-@bot.hybrid_command(name="gamble", description="Gamble your $SK!")
-@discord.app_commands.describe(
-    choice="Choose between Skibidi Toilet or Titan Speakerman",
-    amount="The amount of SK you want to gamble"
-)
-@discord.app_commands.choices(choice=[
-    discord.app_commands.Choice(name="Skibidi Toilet", value=1),
-    discord.app_commands.Choice(name="Titan Speakerman", value=2)
-])
-async def gamble(ctx: commands.Context, choice: discord.app_commands.Choice[int], amount: int):
-    user_id = str(ctx.author.id)
-    data = load_data()
-    
-    if user_id not in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-
-    if data[user_id]["money"] == 0 or amount > data[user_id]["money"]:
-        await ctx.send("You do not have enough money to gamble!")
-        return
-    
-    if amount < 30:
-        await ctx.send("The minimum amount of money you need to gamble is 30!")
-        return
-    
-    result = random.randint(1, 2)
-
-    if choice.value == result:
-        phrase = f"You win! You get ${amount * 2} SK"
-        colour = discord.Colour.brand_green()
-        data[user_id]["money"] += amount * 2
-        tag = "money"
-    else:
-        phrase = f"You lost and the house takes ur ${amount} SK"
-        colour = discord.Colour.brand_red()
-        data[user_id]["money"] -= amount
-        tag = "broke"
-    
-    gif = g.random_gif(tag=tag)
-
-    embed = discord.Embed(
-        title="Gambling results...",
-        description=phrase,
-        colour=colour
-    )
-    embed.set_image(url=gif.media_url)
-    await ctx.send(embed=embed)
-    save_data(data)  # Don't forget to save the updated economy data
-
-@commands.cooldown(1, 86400, commands.BucketType.user)
-@bot.hybrid_command(name="daily", description="Get your daily $SK allowance!")
-async def daily(ctx: commands.Context):
-    user_id = str(ctx.author.id)
-    data = load_data()
-
-    if not user_id in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-
-    allowance = random.randint(120, 450) 
-    data[user_id]["money"] += allowance
-
-    embed = discord.Embed(
-        title="Daily allowance",
-        description=f"You have received ${allowance} SK",
-        colour=discord.Colour.from_rgb(60, 176, 67)
-    )
-    tag = "money allowance"
-    gif = g.random_gif(tag=tag)
-    embed.set_image(url=gif.media_url)
-
-    await ctx.send(embed=embed)
-    save_data(data)
-
-@commands.cooldown(1, 20, commands.BucketType.guild)
-@bot.hybrid_command(name="leaderboard", description="Check the leaderboard!")
-async def leaderboard(ctx: commands.Context):
-    data = load_data()
-    guild_members = ctx.guild.members
-    guild_data = []
-
-    # Create list of members and their money
-    for member in guild_members:
-        user_id = str(member.id)
-        if user_id in data and "money" in data[user_id]:
-            guild_data.append((member, data[user_id]["money"]))
-    
-    # Sort by money (highest to lowest)
-    guild_data.sort(key=lambda x: x[1], reverse=True)
-
-    # Get top 10
-    top_10 = guild_data[:10]
-
-    if not top_10:
-        await ctx.send("Everyone is broke here!")
-        return
-    
-    embed = discord.Embed(
-        title=f"{ctx.guild.name}'s spoiled brats 🤑🤑🤑:",
-        colour=discord.Colour.from_rgb(63, 122, 77)
-    )
-
-    for index, (member, money) in enumerate(top_10, start=1):
-        embed.add_field(
-            name=f"{index}. {member.name}",
-            value=f"${money} **SK**",
-            inline=False
-        )
-
-    await ctx.send(embed=embed)
-
-@commands.cooldown(1, 18000, commands.BucketType.user)
-@bot.hybrid_command(name="rob", description="Try to rob another user")
-async def rob(ctx: commands.Context, target: discord.User):
-    user_id = str(ctx.author.id)
-    target_id = str(target.id)
-    data = load_data()
-
-    if user_id not in data:
-        data[user_id] = {"money": 0}
-    elif "money" not in data[user_id]:
-        data[user_id]["money"] = 0
-
-    if target_id not in data:
-        data[target_id] = {"money": 0}
-        await ctx.send(f"{target.mention} has no money that you can rob!")
-        return
-    
-    if data[target_id]["money"] < 100:
-        await ctx.send(f"{target.mention} is too poor!")
-        return
-    
-    if user_id == target_id:
-        await ctx.send("You can't rob yourself, you dummy!")
-        return
-    
-    chance = random.randint(1, 100)
-
-    if chance < 40:
-        target_money = data[target_id]["money"]
-        if target_money <= 1000:
-            steal_percentage = random.uniform(0.1, 0.2)
-        elif target_money <= 5000:
-            steal_percentage = random.uniform(0.15, 0.25)
-        else:
-            steal_percentage = random.uniform(0.2, 0.3)
-
-        steal_amount = int(target_money * steal_percentage)
-
-        data[user_id]["money"] += steal_amount
-        data[target_id]["money"] -= steal_amount
-        embed = discord.Embed(
-            title="Successful robbery!",
-            description=f"You robbed {target.mention} and got away with ${steal_amount} SK!",
-            colour=discord.Colour.from_rgb(144, 238, 144)
-        )
-        gif = g.random_gif(tag="robber")
-        embed.set_image(url=gif.media_url)
-    else:
-        fine_amount = int(data[user_id]["money"] * 0.05)
-        data[user_id]["money"] -= fine_amount
-
-        embed = discord.Embed(
-            title="Failed robbery!",
-            description=f"You were caught trying to rob {target.mention} and the Skibidi Police made you pay a fine of ${fine_amount} SK!",
-            colour=discord.Colour.dark_red()
-        )
-        gif = g.random_gif(tag="arrested")
-        embed.set_image(url=gif.media_url)
-
-    await ctx.send(embed=embed)
-    save_data(data)
-
-# Run the bot using the API key from the .env file
-bot.run(os.getenv("API_KEY"))
+# Reload an extension without reconnecting to Discord, e.g. Mr!reload economy
+@bot.command(name="reload", hidden=True)
+@commands.is_owner()
+async def reload_extension(ctx: commands.Context, extension: str):
+    await bot.reload_extension(f"cogs.{extension}")
+    # The reloaded commands have new code, let the watchdog know about it
+    if bot.watchdog is not None:
+        bot.watchdog.register_commands(bot.walk_commands())
+    bot.cooldowns.register_commands(bot.walk_commands())
+    # Only hits Discord if the reload changed any slash commands
+    await sync_tree(bot)
+    await ctx.send(f"Reloaded {extension}!")
+
+# Run the bot using the API key from the .env file (importing this file, like loadtest.py does, doesn't start it)
+if __name__ == "__main__":
+    bot.run(os.getenv("API_KEY"))
@@ -0,0 +1,278 @@
+"""
+    Here start all the economy commands
+    Yummers 🤑🤑🤑
+"""
+import discord, random
+from discord.ext import commands
+import economy_rules as rules
+
+class Economy(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Where this guild's balances live (its own store with GUILD_ECONOMY=1, otherwise the global one),
+    # used as `async with self.store_for(ctx) as store`
+    def store_for(self, ctx: commands.Context):
+        return self.bot.economy_store(ctx.guild)
+
+    # Put a GIF from the pool on an embed. If the pool is empty the embed just goes out without an image
+    def set_gif(self, embed: discord.Embed, tag: str):
+        url = self.bot.gifs.take(tag)
+        if url:
+            embed.set_image(url=url)
+
+    @commands.cooldown(1, 900, commands.BucketType.user)
+    @commands.hybrid_command(name="work", description="Work for me!")
+    async def work(self, ctx: commands.Context):
+        phrases = [
+        f"{ctx.author.mention} has worked as a cashier and earned",
+        f"{ctx.author.mention} delivered pizzas and made",
+        f"{ctx.author.mention} mowed lawns in the neighborhood and collected",
+        f"{ctx.author.mention} walked dogs for busy pet owners and received",
+        f"{ctx.author.mention} worked a shift at the local factory and earned",
+        f"{ctx.author.mention} sold handmade crafts online and pocketed",
+        f"{ctx.author.mention} did some freelance writing and got paid",
+        f"{ctx.author.mention} helped out at a car wash and made",
+        f"{ctx.author.mention} worked as a street performer and collected",
+        f"{ctx.author.mention} completed online surveys and earned",
+        f"{ctx.author.mention} worked overtime at the office and received",
+        f"{ctx.author.mention} offered tech support and was paid",
+        f"{ctx.author.mention} taught an online class and made",
+        f"{ctx.author.mention} worked as a virtual assistant and earned",
+        f"{ctx.author.mention} did some gardening work and collected"
+        ]
+
+        randphrase = random.choice(phrases)
+        added_money = rules.work_pay(random)
+        async with self.store_for(ctx) as store:
+            await store.credit(ctx.author.id, added_money, kind="work")
+
+        embed = discord.Embed(
+            title="You worked!",
+            description=f"{randphrase} ${added_money} **SK**",
+            colour=discord.Colour.dark_green()
+        )
+        self.set_gif(embed, "work")
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 1200, commands.BucketType.user)
+    @commands.hybrid_command(name="crime", description="Commit a crime for money!")
+    async def crime(self, ctx: commands.Context):
+        success_phrases = [
+        f"{ctx.author.mention} pulled off a daring heist and got away with",
+        f"{ctx.author.mention} hacked into a digital vault and transferred",
+        f"{ctx.author.mention} organized a complex scheme and pocketed",
+        f"{ctx.author.mention} snuck into a high-security area and snagged",
+        f"{ctx.author.mention} conducted a risky operation and secured",
+        f"{ctx.author.mention} executed a cunning plan and acquired",
+        f"{ctx.author.mention} orchestrated a clever con and walked away with",
+        f"{ctx.author.mention} infiltrated a secret facility and escaped with",
+        f"{ctx.author.mention} cracked a supposedly unbreakable safe and obtained",
+        f"{ctx.author.mention} conducted some shady business and earned",
+        f"{ctx.author.mention} engaged in some questionable activities and gained",
+        f"{ctx.author.mention} took a walk on the wild side and came back with",
+        f"{ctx.author.mention} bent the rules of society and profited",
+        f"{ctx.author.mention} lived dangerously for a day and collected",
+        f"{ctx.author.mention} took a big risk and it paid off with"
+        ]
+
+        caught_phrases = [
+        f"{ctx.author.mention} got caught red-handed and had to pay a fine of",
+        f"{ctx.author.mention}'s plan backfired, resulting in a penalty of",
+        f"{ctx.author.mention} tripped the alarm and lost",
+        f"{ctx.author.mention}'s scheme unraveled, costing them",
+        f"{ctx.author.mention} was outsmarted by security and fined",
+        f"{ctx.author.mention}'s luck ran out, and they had to forfeit",
+        f"{ctx.author.mention} got busted and had to cough up",
+        f"{ctx.author.mention}'s criminal career hit a snag, losing them",
+        f"{ctx.author.mention} faced the consequences and paid",
+        f"{ctx.author.mention}'s risky venture failed, costing them",
+        f"{ctx.author.mention} couldn't talk their way out and lost",
+        f"{ctx.author.mention}'s master plan fell apart, resulting in a loss of",
+        f"{ctx.author.mention} got a taste of justice and had to pay",
+        f"{ctx.author.mention}'s crime spree came to an abrupt end, costing",
+        f"{ctx.author.mention} learned crime doesn't pay and lost"
+        ]
+
+        succeeded, amount = rules.crime(random)
+        async with self.store_for(ctx) as store:
+            if succeeded:
+                await store.credit(ctx.author.id, amount, kind="crime")
+                phrase = random.choice(success_phrases)
+                colour = discord.Colour.brand_red()
+            else:
+                # Fines can put you in debt
+                await store.debit(ctx.author.id, amount, allow_overdraft=True, kind="crime")
+                phrase = random.choice(caught_phrases)
+                colour = discord.Colour.dark_red()
+
+        embed = discord.Embed(
+            title="You committed a crime!",
+            description=f"{phrase} ${amount} **SK**",
+            colour=colour
+        )
+        self.set_gif(embed, "burglar")
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 60, commands.BucketType.user)
+    @commands.hybrid_command(name="balance", description="Check your balance!")
+    async def balance(self, ctx: commands.Context):
+        async with self.store_for(ctx) as store:
+            user_data = await store.read_user(ctx.author.id)
+
+        phrase = f"You have ${user_data.money} **SK**"
+        embed = discord.Embed(
+            title="Your balance",
+            description=phrase,
+            colour=discord.Colour.dark_green()
+        )
+        embed.set_image(url=ctx.author.display_avatar.url)
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 300, commands.BucketType.user)
+    @commands.hybrid_command(name="gamble", description="Gamble your $SK!")
+    @discord.app_commands.describe(
+        choice="Choose between Skibidi Toilet or Titan Speakerman",
+        amount="The amount of SK you want to gamble"
+    )
+    @discord.app_commands.choices(choice=[
+        discord.app_commands.Choice(name="Skibidi Toilet", value=1),
+        discord.app_commands.Choice(name="Titan Speakerman", value=2)
+    ])
+    async def gamble(self, ctx: commands.Context, choice: discord.app_commands.Choice[int], amount: int):
+        # Check the balance and pay out in one go so two gambles at once can't both spend the same money
+        async with self.store_for(ctx) as store, store.transaction(ctx.author.id, kind="gamble") as (user_data,):
+            error = rules.gamble_error(user_data.money, amount)
+            if error == "broke":
+                error = "You do not have enough money to gamble!"
+            elif error == "minimum":
+                error = f"The minimum amount of money you need to gamble is {rules.GAMBLE_MIN_BET}!"
+            else:
+                won, change = rules.gamble(random, choice.value, amount)
+                user_data.money += change
+
+                if won:
+                    phrase = f"You win! You get ${change} SK"
+                    colour = discord.Colour.brand_green()
+                    tag = "money"
+                else:
+                    phrase = f"You lost and the house takes ur ${amount} SK"
+                    colour = discord.Colour.brand_red()
+                    tag = "broke"
+
+        if error:
+            await ctx.send(error)
+            return
+
+        embed = discord.Embed(
+            title="Gambling results...",
+            description=phrase,
+            colour=colour
+        )
+        self.set_gif(embed, tag)
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 86400, commands.BucketType.user)
+    @commands.hybrid_command(name="daily", description="Get your daily $SK allowance!")
+    async def daily(self, ctx: commands.Context):
+        allowance = rules.daily_allowance(random)
+        async with self.store_for(ctx) as store:
+            await store.credit(ctx.author.id, allowance, kind="daily")
+
+        embed = discord.Embed(
+            title="Daily allowance",
+            description=f"You have received ${allowance} SK",
+            colour=discord.Colour.from_rgb(60, 176, 67)
+        )
+        self.set_gif(embed, "money allowance")
+
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 20, commands.BucketType.guild)
+    @commands.hybrid_command(name="leaderboard", description="Check the leaderboard!")
+    async def leaderboard(self, ctx: commands.Context):
+        if self.bot.guild_economies is not None:
+            # The guild has its own economy, everyone in it is ranked
+            async with self.store_for(ctx) as store:
+                top = await store.top_balances(10)
+                author_rank = store.rank(ctx.author.id)
+        else:
+            # Get the top 10 members of this guild by money (highest to lowest) from the guild's ranking
+            ranking, top = await self.bot.rankings.top(ctx.guild, 10)
+            # Only known when this process keeps the ranking itself
+            author_rank = (ranking.rank(ctx.author.id), len(ranking)) if ranking is not None else None
+        top_10 = [(ctx.guild.get_member(int(user_id)), money) for user_id, money in top]
+
+        if not top_10:
+            await ctx.send("Everyone is broke here!")
+            return
+
+        embed = discord.Embed(
+            title=f"{ctx.guild.name}'s spoiled brats 🤑🤑🤑:",
+            colour=discord.Colour.from_rgb(63, 122, 77)
+        )
+
+        for index, (member, money) in enumerate(top_10, start=1):
+            embed.add_field(
+                name=f"{index}. {member.name if member else 'Someone who left'}",
+                value=f"${money} **SK**",
+                inline=False
+            )
+
+        # Show where the author is too
+        if author_rank is not None and author_rank[0] is not None:
+            embed.set_footer(text=f"You are #{author_rank[0]} out of {author_rank[1]}")
+
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 18000, commands.BucketType.user)
+    @commands.hybrid_command(name="rob", description="Try to rob another user")
+    async def rob(self, ctx: commands.Context, target: discord.User):
+        user_id = ctx.author.id
+        target_id = target.id
+
+        # The store stays open between the check and the transaction
+        async with self.store_for(ctx) as store:
+            if not await store.has_user(target_id):
+                await ctx.send(f"{target.mention} has no money that you can rob!")
+                return
+
+            # Both balances are locked together so nobody else can touch them mid-robbery
+            async with store.transaction(user_id, target_id, kind="rob") as (user_data, target_data):
+                error = rules.rob_error(user_id, target_id, target_data.money)
+                if error == "poor":
+                    error = f"{target.mention} is too poor!"
+                elif error == "self":
+                    error = "You can't rob yourself, you dummy!"
+                else:
+                    succeeded, amount = rules.rob(random, user_data.money, target_data.money)
+
+                    if succeeded:
+                        user_data.money += amount
+                        target_data.money -= amount
+                    else:
+                        user_data.money -= amount
+
+        if error:
+            await ctx.send(error)
+            return
+
+        if succeeded:
+            embed = discord.Embed(
+                title="Successful robbery!",
+                description=f"You robbed {target.mention} and got away with ${amount} SK!",
+                colour=discord.Colour.from_rgb(144, 238, 144)
+            )
+            self.set_gif(embed, "robber")
+        else:
+            embed = discord.Embed(
+                title="Failed robbery!",
+                description=f"You were caught trying to rob {target.mention} and the Skibidi Police made you pay a fine of ${amount} SK!",
+                colour=discord.Colour.dark_red()
+            )
+            self.set_gif(embed, "arrested")
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Economy(bot))
@@ -0,0 +1,96 @@
+# Fun commands: insults, number facts, Chuck Norris, dad jokes, yes or no and useless facts
+import discord
+from discord.ext import commands
+from replies import reply
+
+class Fun(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Start filling the content buffers (does nothing if they're already filling)
+    async def cog_load(self):
+        self.bot.content.start()
+
+    # Command to insult a user (the /insult that /help lists, it was never registered before)
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="insult", description="Insult someone")
+    @discord.app_commands.describe(user="The user you want to insult")
+    async def quote(self, ctx: commands.Context, user: discord.User):
+        # Get a random insult from the buffer
+        insult = await self.bot.content.get("insult")
+
+        # Check if the bot is being insulted and respond accordingly
+        if user == self.bot.user:
+            message = f"Shush {ctx.author.mention}"
+        else:
+            message = f"{insult} {user.mention}"
+
+        await ctx.send(message)
+
+    # Command to get a random number fact
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="number", description="Say a random fact about a random number")
+    async def num(self, ctx: commands.Context):
+        # Number facts from a random category, pre-fetched in the background
+        await ctx.send(await self.bot.content.get("number"))
+
+    # Command to get a random Chuck Norris fact
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="chuck_norris", description="Say a random fact about Chuck Norris 👀")
+    async def chuck_norris(self, ctx: commands.Context):
+        await ctx.send(await self.bot.content.get("chuck_norris"))
+
+    # Command to get a random dad joke
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="dad_joke", description="Say a random dad joke. You will die")
+    async def dad(self, ctx: commands.Context):
+        await ctx.send(await self.bot.content.get("dad_joke"))
+
+    # Command to answer yes or no to a question
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="yes_or_no", description="The bot will answer yes or no")
+    @discord.app_commands.describe(question="The question you want to ask the bot. The answer will be either yes or no")
+    async def yesno(self, ctx: commands.Context, *, question: str):
+        # Fetch a yes/no response with an image
+        response = await self.bot.api.get_json("yesno", "/api")
+
+        message = f"The question was: **{question}** to which I respond:"
+
+        # Text and image in one message
+        await reply(ctx, message, image=response["image"])
+
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="useless_fact", description="Learn a random fact")
+    async def useless_fact(self, ctx: commands.Context):
+        await ctx.send(await self.bot.content.get("useless_fact"))
+
+    # Command to display information about the bot's commands
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="bot_help", description="Get a list of all available commands")
+    async def help_command(self, ctx: commands.Context):
+        # Create the embed with command information
+        embed = discord.Embed(
+            title="Commands:",
+            colour=discord.Colour.from_rgb(174, 214, 241)
+        )
+        # Add fields for each command
+        embed.add_field(name= "/insult", value="Insult someone")
+        embed.add_field(name= "/number", value="Make the bot say a random fact about a random number")
+        embed.add_field(name= "/chuck_norris", value="Make the bot say a random fact about Chuck Norris")
+        embed.add_field(name= "/dad_joke", value="Make the bot say a dad joke")
+        embed.add_field(name= "/yes_or_no", value="Ask the bot a question. The bot will answer either yes or no")
+        embed.add_field(name= "/help", value="Get a list of all available commands")
+        embed.add_field(name= "/rock_paper_scissors", value="Play rock paper scissors with the bot")
+        embed.add_field(name= "/random_meme", value="Get a random meme from Reddit")
+        embed.add_field(name= "/work", value="Work for me!")
+        embed.add_field(name= "/crime", value="Commit a crime")
+        embed.add_field(name= "/balance", value="Check your balance")
+        embed.add_field(name= "/gamble", value="Gamble with your money! $30 SK minimum This bot's currency is called **Skibidirians** (SK)")
+        embed.add_field(name= "/leaderboard", value="Check the leaderboard")
+        embed.add_field(name= "/daily", value="Get your daily allowance!")
+        embed.add_field(name="/rob", value="Try to rob someone!")
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Fun(bot))
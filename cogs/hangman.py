@@ -0,0 +1,176 @@
+# Hangman with letter menus, one game per channel
+import discord
+from discord.ext import commands
+from replies import edit_and_respond, detached
+from hangman_words import SIZES
+from hangman_games import ALPHABET, MAX_WRONG
+
+# The drawing after each wrong guess
+STAGES = [
+    "  +---+\n  |   |\n      |\n      |\n      |\n=======",
+    "  +---+\n  |   |\n  O   |\n      |\n      |\n=======",
+    "  +---+\n  |   |\n  O   |\n  |   |\n      |\n=======",
+    "  +---+\n  |   |\n  O   |\n /|   |\n      |\n=======",
+    "  +---+\n  |   |\n  O   |\n /|\\  |\n      |\n=======",
+    "  +---+\n  |   |\n  O   |\n /|\\  |\n /    |\n=======",
+    "  +---+\n  |   |\n  O   |\n /|\\  |\n / \\  |\n=======",
+]
+
+def letter_options(letters):
+    return [discord.SelectOption(label=letter.upper(), value=letter) for letter in letters]
+
+# Two letter menus (a select holds at most 25 options) and a give up button. Like TriviaView, one instance
+# is registered with bot.add_view and handles every game's clicks, the games live in bot.hangman_games
+class HangmanView(discord.ui.View):
+    def __init__(self, games=None, store=None):
+        super().__init__(timeout=None)
+        self.games = games
+        self.store = store
+
+    @discord.ui.select(placeholder="Guess a letter (A-M)", custom_id="hangman:a-m", options=letter_options(ALPHABET[:13]))
+    async def first_half(self, interaction: discord.Interaction, select: discord.ui.Select):
+        await self.handle_guess(interaction, interaction.data["values"][0])
+
+    @discord.ui.select(placeholder="Guess a letter (N-Z)", custom_id="hangman:n-z", options=letter_options(ALPHABET[13:]))
+    async def second_half(self, interaction: discord.Interaction, select: discord.ui.Select):
+        await self.handle_guess(interaction, interaction.data["values"][0])
+
+    @discord.ui.button(label="Give up", style=discord.ButtonStyle.red, custom_id="hangman:give_up")
+    async def give_up(self, interaction: discord.Interaction, button: discord.ui.Button):
+        game = await self.game_for(interaction)
+        if game is None:
+            return
+
+        self.games.finish(interaction.channel_id)
+        await edit_and_respond(interaction, embed=game_embed(game, f"🏳️ Gave up! The word was **{game.word}**", over=True), view=game_view(game, over=True))
+        await record_result(self.store, game.author_id, won=False)
+
+    # The channel's game if this click is for it and from its player, otherwise tells the clicker why not.
+    # Until its message is sent a game takes no clicks, any menu in the channel is from an older game
+    async def game_for(self, interaction: discord.Interaction):
+        game = self.games.get(interaction.channel_id)
+        if game is None or game.message_id is None or game.message_id != interaction.message.id:
+            await interaction.response.send_message("This game is already over!", ephemeral=True)
+            return None
+
+        if interaction.user.id != game.author_id:
+            await interaction.response.send_message("Only the person who started the game can guess!", ephemeral=True)
+            return None
+        return game
+
+    async def handle_guess(self, interaction: discord.Interaction, letter: str):
+        game = await self.game_for(interaction)
+        if game is None:
+            return
+
+        outcome = game.guess(letter)
+        if outcome == "repeat":
+            await interaction.response.send_message(f"You already guessed {letter.upper()}!", ephemeral=True)
+            return
+        self.games.touch(interaction.channel_id)
+
+        if game.won():
+            note = f"🎉 You got it! The word was **{game.word}**"
+        elif game.lost():
+            note = f"💀 You're out of guesses! The word was **{game.word}**"
+        elif outcome == "hit":
+            note = f"👍 There's a {letter.upper()}!"
+        else:
+            note = f"❌ No {letter.upper()}!"
+
+        over = game.won() or game.lost()
+        if over:
+            self.games.finish(interaction.channel_id)
+        # The new board, the note and the new menus all in one call that also answers the click
+        await edit_and_respond(interaction, embed=game_embed(game, note, over), view=game_view(game, over))
+        if over:
+            await record_result(self.store, game.author_id, game.won())
+
+# Hangman wins and losses count towards the same score as rock paper scissors
+async def record_result(store, user_id, won):
+    async with store.transaction(user_id, kind="hangman") as (user_data,):
+        if won:
+            user_data.wins += 1
+        else:
+            user_data.losses += 1
+
+def game_embed(game, note=None, over=False):
+    if game.won():
+        colour = discord.Colour.green()
+    elif over:
+        colour = discord.Colour.red()
+    else:
+        colour = discord.Colour.blurple()
+    wrong = ", ".join(letter.upper() for letter in game.wrong_letters()) or "none yet"
+    description = (
+        f"<@{game.author_id}>'s game\n"
+        f"```\n{STAGES[game.wrong]}\n```\n"
+        f"`{game.revealed()}`\n"
+        f"Wrong guesses: {wrong} ({MAX_WRONG - game.wrong} left)"
+    )
+    if note:
+        description += f"\n{note}"
+    return discord.Embed(title="Hangman", description=description, colour=colour)
+
+# Menus with only the letters nobody guessed yet, everything disabled once the game is over
+def game_view(game, over=False):
+    view = HangmanView()
+    for select, letters in ((view.first_half, ALPHABET[:13]), (view.second_half, ALPHABET[13:])):
+        remaining = [letter for letter in game.remaining_letters() if letter in letters]
+        if remaining and not over:
+            select.options = letter_options(remaining)
+        else:
+            # A select needs at least one option even when disabled
+            select.options = letter_options(remaining or letters[:1])
+            select.disabled = True
+    view.give_up.disabled = over
+    return detached(view)
+
+class Hangman(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Read the word list (only the first time), and listen for guesses, including on games started before a reload
+    async def cog_load(self):
+        self.bot.hangman_words.load()
+        self.bot.add_view(HangmanView(self.bot.hangman_games, self.bot.store))
+        self.bot.hangman_games.start(self.expire)
+
+    # Nobody played for a while, show the word and count it as a loss
+    async def expire(self, channel_id, game):
+        await record_result(self.bot.store, game.author_id, won=False)
+        if game.message_id is not None:
+            message = self.bot.get_partial_messageable(channel_id).get_partial_message(game.message_id)
+            await message.edit(embed=game_embed(game, f"⌛ Time's up! The word was **{game.word}**", over=True), view=game_view(game, over=True))
+
+    @commands.cooldown(1, 3, commands.BucketType.channel)
+    @commands.hybrid_command(name="hangman", description="Play hangman! Guess the word one letter at a time")
+    @discord.app_commands.describe(size="How long the word is")
+    @discord.app_commands.choices(size=[
+        discord.app_commands.Choice(name="Short", value="short"),
+        discord.app_commands.Choice(name="Medium", value="medium"),
+        discord.app_commands.Choice(name="Long", value="long")
+    ])
+    async def hangman(self, ctx: commands.Context, size: discord.app_commands.Choice[str] = None):
+        games = self.bot.hangman_games
+        if games.get(ctx.channel.id) is not None:
+            await ctx.send("There's already a hangman game going on in this channel!")
+            return
+
+        # Words come from words.txt, loaded once, nothing to fetch
+        picked = self.bot.hangman_words.pick(*SIZES[size.value if size else "medium"])
+        if picked is None:
+            await ctx.send("I don't know any words that long!")
+            return
+
+        # Taken before sending so a second /hangman in this channel can't start another game meanwhile
+        game = games.add(ctx.channel.id, ctx.author.id, *picked)
+        try:
+            message = await ctx.send(embed=game_embed(game), view=game_view(game))
+        except Exception:
+            games.finish(ctx.channel.id)
+            raise
+        game.message_id = message.id
+
+async def setup(bot):
+    await bot.add_cog(Hangman(bot))
@@ -0,0 +1,29 @@
+# Reddit memes
+import discord
+from discord.ext import commands
+
+class Memes(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Command to get a random meme from Reddit
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="random_meme", description="Get a random meme from Reddit")
+    async def rand_meme(self, ctx: commands.Context):
+        # Pick from the cache, skipping memes this guild has seen recently
+        meme = self.bot.memes.pick(ctx.guild.id if ctx.guild else ctx.channel.id)
+        if meme is None:
+            await ctx.send("The memes are still loading, try again in a bit!")
+            return
+
+        title, url = meme
+        embed = discord.Embed(
+            title=title,
+            colour=discord.Colour.from_rgb(115, 215, 255)
+        )
+        embed.set_image(url=url)
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Memes(bot))
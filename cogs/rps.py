@@ -0,0 +1,42 @@
+# Rock paper scissors against the bot
+import discord, random
+from discord.ext import commands
+
+class RockPaperScissors(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Command to play rock paper scissors with the bot
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="rock_paper_scissors", description="Play rock paper scissors with the bot")
+    @discord.app_commands.describe(choice="Choose between rock, paper or scissors")
+    @discord.app_commands.choices(choice=[
+        discord.app_commands.Choice(name="Rock", value="rock"),
+        discord.app_commands.Choice(name="Paper", value="paper"),
+        discord.app_commands.Choice(name="Scissors", value="scissors")
+    ])
+    async def rock_paper_scissors(self, ctx: commands.Context, choice: str):
+        # Bot makes a random choice
+        bot_choice = random.choice(["rock", "paper", "scissors"])
+        user_choice = choice.lower()
+
+        # Lock the user's game data (created if it doesn't exist), it gets saved in the background
+        async with self.bot.store.transaction(ctx.author.id, kind="rps") as (user_data,):
+            # Determine the winner and update scores
+            if user_choice == bot_choice:
+                result = f"It's a tie! We both chose {bot_choice}."
+            elif (user_choice == "rock" and bot_choice == "scissors") or \
+           (user_choice == "paper" and bot_choice == "rock") or \
+           (user_choice == "scissors" and bot_choice == "paper"):
+                result = f"You win! You chose {user_choice}, and I chose {bot_choice}."
+                user_data.wins += 1
+            else:
+                result = f"I win! You chose {user_choice}, and I chose {bot_choice}."
+                user_data.losses += 1
+            wins, losses = user_data.wins, user_data.losses
+
+        # Send the result and current score
+        await ctx.send(f"{result} Your current score: Wins: {wins}, Losses: {losses}")
+
+async def setup(bot):
+    await bot.add_cog(RockPaperScissors(bot))
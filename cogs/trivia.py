@@ -0,0 +1,178 @@
+# Trivia questions with answer buttons
+import discord, random
+from discord.ext import commands
+from replies import edit_and_respond, detached
+from trivia_bank import DIFFICULTIES
+
+# The four answer buttons. One instance is registered with bot.add_view and handles the clicks on every
+# trivia message (the custom_ids stay the same across restarts); the games themselves live in bot.trivia_games
+# and the scores in bot.trivia_stats
+class TriviaView(discord.ui.View):
+    def __init__(self, games=None, stats=None):
+        super().__init__(timeout=None)
+        self.games = games
+        self.stats = stats
+
+    @discord.ui.button(label="A", style=discord.ButtonStyle.blurple, custom_id="trivia:0")
+    async def button_a(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.handle_answer(interaction, 0)
+
+    @discord.ui.button(label="B", style=discord.ButtonStyle.blurple, custom_id="trivia:1")
+    async def button_b(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.handle_answer(interaction, 1)
+
+    @discord.ui.button(label="C", style=discord.ButtonStyle.blurple, custom_id="trivia:2")
+    async def button_c(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.handle_answer(interaction, 2)
+
+    @discord.ui.button(label="D", style=discord.ButtonStyle.blurple, custom_id="trivia:3")
+    async def button_d(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.handle_answer(interaction, 3)
+
+    async def handle_answer(self, interaction: discord.Interaction, choice_index: int):
+        game = self.games.get(interaction.message.id)
+        if game is None:
+            await interaction.response.send_message("This question has already been answered!", ephemeral=True)
+            return
+
+        if interaction.user.id != game.author_id:
+            await interaction.response.send_message("Only the person who sent the command can answer!", ephemeral=True)
+            return
+
+        self.games.finish(interaction.message.id)
+        correct = choice_index == game.correct_index
+        score = await self.stats.record(game.author_id, game.difficulty, correct)
+
+        if correct:
+            result = f"👍 That is correct! The right answer was {game.correct_answer}"
+            if score.streak > 1:
+                result += f"\n🔥 {score.streak} in a row!"
+        else:
+            result = f"❌ That is incorrect! The right answer was {game.correct_answer}"
+        
+        answeredEmbed = discord.Embed(
+            title="Trivia",
+            description=f"Answered by {interaction.user.mention}\n{result}",
+            color=discord.Color.green()
+        )
+
+        # New buttons, the result and the answered embed all in one call that also answers the click
+        await edit_and_respond(interaction, embed=answeredEmbed, view=answered_view(game.correct_index, choice_index))
+
+# Disabled buttons, with the right answer in green and a wrong pick in red
+def answered_view(correct_index=None, choice_index=None):
+    view = TriviaView()
+    for idx, button in enumerate(view.children):
+        button.disabled = True
+        if idx == correct_index:
+            button.style = discord.ButtonStyle.green
+        elif idx == choice_index:
+            button.style = discord.ButtonStyle.red
+    return detached(view)
+
+class Trivia(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Start filling the question bank (does nothing if it's already filling), and listen for answers,
+    # including to questions sent before a restart
+    async def cog_load(self):
+        self.bot.trivia_bank.start()
+        self.bot.add_view(TriviaView(self.bot.trivia_games, self.bot.trivia_stats))
+        self.bot.trivia_games.start(self.expire)
+        self.bot.trivia_stats.start()
+
+    # Nobody answered in time, disable the buttons
+    async def expire(self, message_id, game):
+        message = self.bot.get_partial_messageable(game.channel_id).get_partial_message(message_id)
+        await message.edit(view=answered_view())
+
+    @commands.cooldown(1, 3, commands.BucketType.guild)
+    @commands.hybrid_command(name="trivia", description="Get a random trivia question! Choose between easy, medium and hard difficulty")
+    @discord.app_commands.describe(difficulty="Choose the difficulty of the question")
+    @discord.app_commands.choices(difficulty=[
+        discord.app_commands.Choice(name="Easy", value="easy"),
+        discord.app_commands.Choice(name="Medium", value="medium"),
+        discord.app_commands.Choice(name="Hard", value="hard")
+    ])
+    async def trivia(self, ctx: commands.Context, difficulty: discord.app_commands.Choice[str]):
+        # Questions come from the local bank, which gets topped up in the background
+        question_data = self.bot.trivia_bank.take(difficulty.value)
+        if question_data is None:
+            await ctx.send("Couldnt fetch trivia question, please try again later!")
+            return
+
+        question, correct_answer, incorrect_answers = question_data
+
+        answers = list(incorrect_answers) + [correct_answer]
+        random.shuffle(answers)
+
+        embed = discord.Embed(
+            title="Trivia Question",
+            description=question,
+            colour=discord.Colour.random()
+        )
+        embed.add_field(name="A)", value=answers[0], inline=False)
+        embed.add_field(name="B)", value=answers[1], inline=False)
+        embed.add_field(name="C)", value=answers[2], inline=False)
+        embed.add_field(name="D)", value=answers[3], inline=False)
+
+        message = await ctx.send(embed=embed, view=detached(TriviaView()))
+        self.bot.trivia_games.add(message.id, ctx.channel.id, ctx.author.id, answers.index(correct_answer), correct_answer, difficulty.value)
+
+    @commands.cooldown(1, 3, commands.BucketType.user)
+    @commands.hybrid_command(name="trivia_stats", description="See how good you (or someone else) are at trivia")
+    @discord.app_commands.describe(user="Whose stats to show, you by default")
+    async def trivia_stats(self, ctx: commands.Context, user: discord.User = None):
+        user = user or ctx.author
+        scores = await self.bot.trivia_stats.get(user.id)
+        if not scores:
+            await ctx.send(f"{user.mention} hasn't answered any trivia questions yet!")
+            return
+
+        embed = discord.Embed(
+            title=f"{user.name}'s trivia stats",
+            colour=discord.Colour.blurple()
+        )
+        for difficulty in DIFFICULTIES:
+            score = scores.get(difficulty)
+            if score is None:
+                continue
+            embed.add_field(
+                name=difficulty.capitalize(),
+                value=f"{score.correct}/{score.attempted} correct ({score.correct / score.attempted:.0%})\n"
+                      f"Streak: {score.streak} (best {score.best_streak})",
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
+    @commands.cooldown(1, 20, commands.BucketType.guild)
+    @commands.hybrid_command(name="trivia_leaderboard", description="Who in this server knows the most useless stuff")
+    @discord.app_commands.describe(difficulty="Only count one difficulty")
+    @discord.app_commands.choices(difficulty=[
+        discord.app_commands.Choice(name="Easy", value="easy"),
+        discord.app_commands.Choice(name="Medium", value="medium"),
+        discord.app_commands.Choice(name="Hard", value="hard")
+    ])
+    async def trivia_leaderboard(self, ctx: commands.Context, difficulty: discord.app_commands.Choice[str] = None):
+        member_ids = [member.id for member in ctx.guild.members]
+        top = await self.bot.trivia_stats.top(member_ids, 10, difficulty.value if difficulty else None)
+        if not top:
+            await ctx.send("Nobody here has played trivia yet!")
+            return
+
+        embed = discord.Embed(
+            title=f"{ctx.guild.name}'s trivia nerds 🤓:",
+            colour=discord.Colour.blurple()
+        )
+        for index, (user_id, correct, attempted) in enumerate(top, start=1):
+            member = ctx.guild.get_member(user_id)
+            embed.add_field(
+                name=f"{index}. {member.name if member else 'Someone who left'}",
+                value=f"{correct} correct out of {attempted}",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Trivia(bot))
@@ -0,0 +1,145 @@
+# Buffers of pre-fetched jokes, facts and insults, so those commands don't wait on their API.
+# If an API is down, recently served items get reused (stale-while-revalidate)
+import asyncio, os, random, time
+from collections import deque
+
+
+# Functions that fetch one item from each source
+async def fetch_insult(api):
+    response = await api.get_json("evilinsult", "/generate_insult.php", params={"lang": "en", "type": "json"})
+    return response["insult"]
+
+async def fetch_number_fact(api):
+    # Choose a random number fact category
+    response = await api.get_json("numbersapi", "/random/" + random.choice(["math?json", "trivia?json", "year?json"]))
+    return response["text"]
+
+async def fetch_chuck_norris(api):
+    response = await api.get_json("chucknorris", "/jokes/random")
+    return response["value"]
+
+async def fetch_dad_joke(api):
+    response = await api.get_json("dadjoke", "/", headers={"Accept": "application/json"})
+    return response["joke"]
+
+async def fetch_useless_fact(api):
+    response = await api.get_json("uselessfacts", "/random.json", params={"language": "en"})
+    return response["text"]
+
+CONTENT_SOURCES = {
+    "insult": fetch_insult,
+    "number": fetch_number_fact,
+    "chuck_norris": fetch_chuck_norris,
+    "dad_joke": fetch_dad_joke,
+    "useless_fact": fetch_useless_fact,
+}
+
+
+class ContentBuffer:
+    def __init__(self, name, fetch, api, size, ttl, batch, low_water):
+        self.name = name
+        self.fetch = fetch
+        self.api = api
+        self.batch = batch
+        self.low_water = low_water
+        self.ttl = ttl
+        # Fresh items waiting to be served, as (fetched_at, item)
+        self.fresh = deque(maxlen=size)
+        # Items that were already served, reused when there's nothing fresh
+        self.served = deque(maxlen=size)
+        self._refill_task = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    # Get an item without touching the network, or None if there's nothing at all
+    def take(self):
+        now = time.monotonic()
+        item = None
+        while self.fresh:
+            fetched_at, candidate = self.fresh.popleft()
+            if now - fetched_at < self.ttl:
+                item = candidate
+                break
+            # Too old to count as fresh, but still good enough as a stale fallback
+            self.served.append(candidate)
+
+        if len(self.fresh) < self.low_water:
+            self.schedule_refill()
+
+        if item is not None:
+            self.hits += 1
+        elif self.served:
+            self.stale_hits += 1
+            return random.choice(self.served)
+        else:
+            self.misses += 1
+            return None
+
+        self.served.append(item)
+        return item
+
+    # Get an item, fetching one directly only if the buffer has never had anything
+    async def get(self):
+        item = self.take()
+        if item is None:
+            item = await self.fetch(self.api)
+            self.served.append(item)
+        return item
+
+    def schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    # Fetch a batch of items one after the other, stopping at the first error
+    async def _refill(self):
+        for _ in range(self.batch):
+            if len(self.fresh) == self.fresh.maxlen:
+                return
+            try:
+                item = await self.fetch(self.api)
+            except Exception as e:
+                print(f"Couldn't refill the {self.name} buffer: {e!r}")
+                return
+            self.fresh.append((time.monotonic(), item))
+
+    async def close(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            self._refill_task = None
+
+
+# One buffer per content source
+class ContentCache:
+    def __init__(self, api, sources=CONTENT_SOURCES, size=None, ttl=None, batch=None, low_water=None):
+        size = size or int(os.getenv("CONTENT_BUFFER_SIZE", 50))
+        ttl = ttl or float(os.getenv("CONTENT_BUFFER_TTL", 6 * 3600))
+        batch = batch or int(os.getenv("CONTENT_REFILL_BATCH", 10))
+        low_water = low_water or int(os.getenv("CONTENT_LOW_WATER", 5))
+        self.buffers = {
+            name: ContentBuffer(name, fetch, api, size, ttl, batch, low_water)
+            for name, fetch in sources.items()
+        }
+
+    def start(self):
+        for buffer in self.buffers.values():
+            buffer.schedule_refill()
+
+    async def get(self, name):
+        return await self.buffers[name].get()
+
+    # Hits, stale hits, misses and how many fresh items are waiting, per source
+    def stats(self):
+        return {
+            name: {
+                "hits": buffer.hits,
+                "stale_hits": buffer.stale_hits,
+                "misses": buffer.misses,
+                "fresh": len(buffer.fresh),
+            }
+            for name, buffer in self.buffers.items()
+        }
+
+    async def close(self):
+        for buffer in self.buffers.values():
+            await buffer.close()
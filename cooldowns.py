@@ -0,0 +1,150 @@
+# Cooldowns that survive restarts. discord.py keeps @commands.cooldown buckets in memory, so every restart
+# reset daily/rob/crime, and with several processes a user could run daily once per process.
+# Long cooldowns are taken over by a global check instead: with a shared storage backend they're checked
+# against the backend, otherwise they live in a small file next to data.json.
+# The check only looks (the help command runs every check just to list commands), the cooldown starts
+# in the bot's before_invoke hook, when the command really runs.
+# Only expiry times are kept, and expired ones are dropped as soon as they're noticed
+import asyncio, math, os, time
+from discord.ext import commands
+from state_file import read_json, save_json, flush_every
+
+
+# Expiry times of the local cooldowns, as command name -> {bucket key: unix time it ends}
+class CooldownFile:
+    def __init__(self, path, flush_interval=None):
+        self.path = path
+        self.flush_interval = flush_interval or float(os.getenv("COOLDOWN_FLUSH_INTERVAL", 30))
+        self.expiries = {}
+        self.dirty = False
+        self._save_lock = asyncio.Lock()
+        self._task = None
+
+    def load(self):
+        raw = read_json(self.path)
+        if raw is None:
+            return
+        now = time.time()
+        # Bucket keys are user/guild/channel ids, expired entries don't even get loaded
+        self.expiries = {
+            name: {int(key): expires for key, expires in buckets.items() if expires > now}
+            for name, buckets in raw.items()
+        }
+
+    def start(self):
+        self.load()
+        self._task = asyncio.create_task(flush_every(self.flush_interval, self.save, "cooldowns"))
+
+    # Seconds left on a cooldown, 0 if it isn't running
+    def left(self, name, key):
+        expires = self.expiries.get(name, {}).get(key)
+        return max(expires - time.time(), 0.0) if expires is not None else 0.0
+
+    # Start a cooldown unless it's already running. Returns the seconds left, or 0 if it just started
+    def hit(self, name, key, per):
+        now = time.time()
+        buckets = self.expiries.setdefault(name, {})
+        expires = buckets.get(key)
+        if expires is not None and expires > now:
+            return expires - now
+        # Whole seconds are plenty for cooldowns this long and keep the file small
+        buckets[key] = math.ceil(now + per)
+        self.dirty = True
+        return 0.0
+
+    # Drop every expired entry
+    def sweep(self):
+        now = time.time()
+        for name, buckets in self.expiries.items():
+            expired = [key for key, expires in buckets.items() if expires <= now]
+            for key in expired:
+                del buckets[key]
+            self.dirty |= bool(expired)
+
+    async def save(self):
+        async with self._save_lock:
+            self.sweep()
+            if not self.dirty:
+                return
+            self.dirty = False
+            raw = {name: dict(buckets) for name, buckets in self.expiries.items()}
+            try:
+                await save_json(self.path, raw)
+            except BaseException:
+                self.dirty = True
+                raise
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.save()
+
+
+class PersistentCooldowns:
+    def __init__(self, store, path="cooldowns.json", min_per=None):
+        self.store = store
+        # Short cooldowns (the 3 second guild ones) aren't worth saving and stay in discord.py's buckets.
+        # Guild buckets never cross processes either, a guild always lives on one shard
+        self.min_per = min_per or float(os.getenv("COOLDOWN_PERSIST_MIN", 60))
+        self.file = None if store.shared else CooldownFile(path)
+        # command name -> (Cooldown, bucket type), taken from the @commands.cooldown decorators
+        self.cooldowns = {}
+
+    def start(self):
+        if self.file is not None:
+            self.file.start()
+
+    # Take over the cooldowns of the given commands and switch off their local buckets.
+    # Run again after reloading an extension, the reloaded commands come with new local buckets
+    def register_commands(self, commands_to_register):
+        for command in commands_to_register:
+            buckets = command._buckets
+            cooldown = buckets._cooldown
+            if cooldown is None:
+                continue
+            # Every cooldown in the bot is "once per X seconds", anything else stays local
+            if cooldown.rate != 1 or cooldown.per < self.min_per:
+                continue
+            # Buckets keyed by a single id, so the saved keys stay plain numbers
+            if buckets.type not in (commands.BucketType.user, commands.BucketType.guild, commands.BucketType.channel):
+                continue
+            self.cooldowns[command.qualified_name] = (cooldown, buckets.type)
+            command._buckets = commands.CooldownMapping(None, buckets.type)
+
+    # Global check, raises CommandOnCooldown just like the local buckets would. Doesn't start the cooldown,
+    # can_run (and so the help command) goes through here without running anything
+    async def check(self, ctx):
+        entry = self.cooldowns.get(ctx.command.qualified_name)
+        if entry is None:
+            return True
+        cooldown, bucket_type = entry
+        name = ctx.command.qualified_name
+        key = bucket_type.get_key(ctx)
+        if self.file is not None:
+            retry_after = self.file.left(name, key)
+        else:
+            retry_after = await self.store.cooldown_left(f"{name}:{key}")
+        if retry_after > 0:
+            raise commands.CommandOnCooldown(cooldown, retry_after, bucket_type)
+        return True
+
+    # Start the cooldown of a command that's about to run (from the bot's before_invoke hook).
+    # Two invocations can both pass the check, only one of them gets to start the cooldown
+    async def hit(self, ctx):
+        entry = self.cooldowns.get(ctx.command.qualified_name)
+        if entry is None:
+            return
+        cooldown, bucket_type = entry
+        name = ctx.command.qualified_name
+        key = bucket_type.get_key(ctx)
+        if self.file is not None:
+            retry_after = self.file.hit(name, key, cooldown.per)
+        else:
+            retry_after = await self.store.cooldown_hit(f"{name}:{key}", cooldown.per)
+        if retry_after > 0:
+            raise commands.CommandOnCooldown(cooldown, retry_after, bucket_type)
+
+    async def close(self):
+        if self.file is not None:
+            await self.file.close()
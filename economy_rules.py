@@ -0,0 +1,71 @@
+# The economy's game rules as plain functions: how much work pays, how crime, gambling and robbing turn out.
+# No Discord and no storage, just numbers in and numbers out, so the commands (cogs/economy.py) and the
+# balancing simulator (simulate.py) run exactly the same rules. rng is anything with randint/uniform,
+# the random module in the bot, a seeded random.Random in the simulator
+
+# Base pay range of work, daily and crime
+PAY_MIN = 120
+PAY_MAX = 450
+
+# Crime: chance of getting away with it, and what success/failure multiply the base pay by
+CRIME_SUCCESS_PERCENT = 65
+CRIME_REWARD_MULTIPLIER = 3
+CRIME_FINE_MULTIPLIER = 4
+
+# Gambling: smallest bet, and what a win pays back on top of the bet
+GAMBLE_MIN_BET = 30
+GAMBLE_WIN_MULTIPLIER = 2
+
+# Robbing: targets need at least this much, chance of success (roll below it out of 100),
+# share of the target's money taken depending on how rich they are, and the fine for getting caught
+ROB_MIN_TARGET = 100
+ROB_SUCCESS_BELOW = 40
+ROB_TIERS = [
+    (1000, 0.1, 0.2),
+    (5000, 0.15, 0.25),
+    (None, 0.2, 0.3),
+]
+ROB_FINE_SHARE = 0.05
+
+
+def work_pay(rng):
+    return rng.randint(PAY_MIN, PAY_MAX)
+
+def daily_allowance(rng):
+    return rng.randint(PAY_MIN, PAY_MAX)
+
+# (succeeded, amount): amount is won if it succeeded, fined otherwise
+def crime(rng):
+    if rng.randint(1, 100) <= CRIME_SUCCESS_PERCENT:
+        return True, rng.randint(PAY_MIN, PAY_MAX) * CRIME_REWARD_MULTIPLIER
+    return False, rng.randint(PAY_MIN, PAY_MAX) * CRIME_FINE_MULTIPLIER
+
+# Why a bet isn't allowed ("broke" or "minimum"), or None if it is
+def gamble_error(balance, amount):
+    if balance == 0 or amount > balance:
+        return "broke"
+    if amount < GAMBLE_MIN_BET:
+        return "minimum"
+    return None
+
+# (won, change in balance) for a bet on choice 1 or 2
+def gamble(rng, choice, amount):
+    if choice == rng.randint(1, 2):
+        return True, amount * GAMBLE_WIN_MULTIPLIER
+    return False, -amount
+
+# Why a robbery can't happen ("poor" or "self"), or None if it can
+def rob_error(robber_id, target_id, target_money):
+    if target_money < ROB_MIN_TARGET:
+        return "poor"
+    if robber_id == target_id:
+        return "self"
+    return None
+
+# (succeeded, amount): amount is stolen from the target if it succeeded, otherwise it's the robber's fine
+def rob(rng, robber_money, target_money):
+    if rng.randint(1, 100) < ROB_SUCCESS_BELOW:
+        for limit, low, high in ROB_TIERS:
+            if limit is None or target_money <= limit:
+                return True, int(target_money * rng.uniform(low, high))
+    return False, int(robber_money * ROB_FINE_SHARE)
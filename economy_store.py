@@ -0,0 +1,323 @@
+# In-memory economy and rock paper scissors data, written back to disk in the background
+import asyncio, heapq, os, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import metrics
+from ranking import RankingIndex
+
+
+# One user's economy and rock paper scissors data. __slots__ means no per-user dict, only the three fields
+# (see bench_memory.py). Old data.json entries might be missing some fields, those start at 0
+class UserRecord:
+    __slots__ = ("money", "wins", "losses")
+
+    def __init__(self, money=0, wins=0, losses=0):
+        self.money = money
+        self.wins = wins
+        self.losses = losses
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(raw.get("money", 0), raw.get("wins", 0), raw.get("losses", 0))
+
+    # What the storage backends save
+    def to_dict(self):
+        return {"money": self.money, "wins": self.wins, "losses": self.losses}
+
+    def __repr__(self):
+        return f"UserRecord(money={self.money}, wins={self.wins}, losses={self.losses})"
+
+
+class EconomyStore:
+    def __init__(self, backend, flush_interval=None, flush_threshold=None, lock_stripes=None, executor=None):
+        # Where the data actually lives (see storage.py)
+        self.backend = backend
+        # Shared backends are used by several bot processes at once, so nothing gets cached between transactions
+        self.shared = backend.shared
+        # All backend calls happen on this one thread, never on the event loop.
+        # Guild economies (see guild_economy.py) share one between all their stores
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="economy-store")
+        # Flush every few seconds, or sooner if lots of users changed
+        self.flush_interval = flush_interval or float(os.getenv("ECONOMY_FLUSH_INTERVAL", 10))
+        self.flush_threshold = flush_threshold or int(os.getenv("ECONOMY_FLUSH_THRESHOLD", 500))
+        # user id (int) -> UserRecord
+        self.data = {}
+        self.dirty = set()
+        # Events waiting to be written to a backend that keeps a ledger (see JsonBackend)
+        self.logs_events = getattr(backend, "logs_events", False)
+        self.events = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._pending_flush = None
+        # Balance changes take a lock per group of users, 1 stripe means one global lock
+        lock_stripes = lock_stripes or int(os.getenv("ECONOMY_LOCK_STRIPES", 64))
+        self._locks = [asyncio.Lock() for _ in range(lock_stripes)]
+        # Called with (user_id, record) after a transaction changes a record, used to keep leaderboards sorted
+        self.listeners = []
+        # Every user by money, for rank() and top_balances() (see ranking.py). Built the first time a leaderboard
+        # needs it, so only stores that get asked (guild economies with GUILD_ECONOMY=1) pay for it
+        self._ranking = None
+
+    # Read everything once when the bot starts
+    def load(self):
+        raw = self.backend.load_all()
+        self.data = {int(user_id): UserRecord.from_dict(record) for user_id, record in raw.items()}
+
+    # Replace cached records with what a shared backend just returned
+    def _merge(self, raw):
+        for user_id, record in raw.items():
+            self.data[int(user_id)] = UserRecord.from_dict(record)
+
+    # Run a blocking backend call on the store's own thread
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def start(self):
+        if self.shared:
+            # Every transaction reads and writes the backend directly, there's nothing to load or flush
+            await self._run(self.backend.prepare)
+            return
+        await self._run(self.load)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    # Get a user's record, creating it if they don't have one yet. The one place records get created
+    def get_user(self, user_id):
+        user_id = int(user_id)
+        record = self.data.get(user_id)
+        if record is None:
+            record = UserRecord()
+            self.data[user_id] = record
+            if self._ranking is not None:
+                self._ranking.update(user_id, 0)
+        return record
+
+    # Get an up to date copy of a user's record (with a shared backend, another process might have changed it)
+    async def read_user(self, user_id):
+        if self.shared:
+            self._merge(await self._run(self.backend.load_users, [int(user_id)]))
+        return self.get_user(user_id)
+
+    # Whether a user has ever had a record
+    async def has_user(self, user_id):
+        if self.shared:
+            return await self._run(self.backend.has_user, user_id)
+        return int(user_id) in self.data
+
+    # Seconds left on a cooldown shared with the other processes, without starting it
+    async def cooldown_left(self, key):
+        return await self._run(self.backend.cooldown_left, key)
+
+    # Start a cooldown shared with the other processes, returns the seconds left if it was already running
+    async def cooldown_hit(self, key, per):
+        return await self._run(self.backend.cooldown_hit, key, per)
+
+    # Trivia scores kept in a shared backend (see trivia_stats.py), as user id -> {difficulty: [numbers]}
+    async def trivia_scores(self, user_ids):
+        return await self._run(self.backend.trivia_scores, [int(user_id) for user_id in user_ids])
+
+    # Add a batch of answers, see trivia_stats.TriviaDelta
+    async def add_trivia_scores(self, deltas):
+        await self._run(self.backend.add_trivia_scores, deltas)
+
+    # Hold the given users' locks (in shared mode the backend's too, so other processes wait as well)
+    # without loading or saving anything
+    @asynccontextmanager
+    async def locked(self, *user_ids):
+        # Always take the stripes in the same order so two transactions can't deadlock
+        stripes = sorted({int(user_id) % len(self._locks) for user_id in user_ids})
+        with metrics.phase("store_lock"):
+            for stripe in stripes:
+                await self._locks[stripe].acquire()
+        try:
+            if self.shared:
+                async with self._shared_locks(stripes):
+                    yield
+            else:
+                yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    # Lock the given users' records, then save them once the block is done.
+    # kind names the event in the ledger (work, rob...), the first user is the one who did it.
+    # Don't await anything slow (Discord, Giphy, APIs) inside this block!
+    @asynccontextmanager
+    async def transaction(self, *user_ids, kind="change"):
+        user_ids = [int(user_id) for user_id in user_ids]
+        async with self.locked(*user_ids):
+            if self.shared:
+                # Another process might have changed them, always start from what the backend has
+                self._merge(await self._run(self.backend.load_users, user_ids))
+                try:
+                    yield [self.get_user(user_id) for user_id in user_ids]
+                finally:
+                    # Written straight through while still holding the lock
+                    await self._run(self.backend.save, {user_id: self.data[user_id].to_dict() for user_id in user_ids})
+                    self._notify(user_ids)
+            else:
+                records = [self.get_user(user_id) for user_id in user_ids]
+                before = [(record.money, record.wins, record.losses) for record in records]
+                try:
+                    yield records
+                finally:
+                    if self.logs_events:
+                        self._log_event(kind, user_ids, records, before)
+                    for user_id in user_ids:
+                        self.mark_dirty(user_id)
+                    self._notify(user_ids)
+
+    # Take the same stripes in the shared backend so other processes wait for us too.
+    # try_lock never blocks, so waiting happens here on the event loop instead of on the store's thread
+    @asynccontextmanager
+    async def _shared_locks(self, stripes):
+        taken = []
+        try:
+            with metrics.phase("store_lock"):
+                for stripe in stripes:
+                    delay = 0.005
+                    while not await self._run(self.backend.try_lock, stripe):
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, 0.1)
+                    taken.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(taken):
+                await self._run(self.backend.unlock, stripe)
+
+    # One ledger line: when, what, and every user's record afterwards plus how much money they gained or lost.
+    # Transactions that didn't change anything (not enough money, a tie...) aren't logged
+    def _log_event(self, kind, user_ids, records, before):
+        after = [(record.money, record.wins, record.losses) for record in records]
+        if after == before:
+            return
+        users = [
+            [user_id, *values, values[0] - old_values[0]]
+            for user_id, values, old_values in zip(user_ids, after, before)
+        ]
+        self.events.append({"t": round(time.time(), 3), "kind": kind, "users": users})
+
+    def _notify(self, user_ids):
+        for user_id in user_ids:
+            for listener in self.listeners:
+                listener(user_id, self.data[user_id])
+
+    # Give a user money and return their new balance
+    async def credit(self, user_id, amount, kind="credit"):
+        async with self.transaction(user_id, kind=kind) as (user_data,):
+            user_data.money += amount
+            return user_data.money
+
+    # Take money from a user and return their new balance.
+    # Returns None without changing anything if they can't afford it, unless overdraft is allowed
+    async def debit(self, user_id, amount, allow_overdraft=False, kind="debit"):
+        async with self.transaction(user_id, kind=kind) as (user_data,):
+            if not allow_overdraft and user_data.money < amount:
+                return None
+            user_data.money -= amount
+            return user_data.money
+
+    # Move money between two users, returns False if the sender can't afford it
+    async def transfer(self, from_id, to_id, amount, kind="transfer"):
+        async with self.transaction(from_id, to_id, kind=kind) as (from_data, to_data):
+            if from_data.money < amount:
+                return False
+            from_data.money -= amount
+            to_data.money += amount
+            return True
+
+    # Remember that a user changed so the next flush writes it out
+    def mark_dirty(self, user_id):
+        self.dirty.add(int(user_id))
+        if len(self.dirty) >= self.flush_threshold and (self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.create_task(self.flush())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Couldn't save economy data: {e!r}")
+
+    # Save the changed users if anything changed since the last flush
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.dirty:
+                return
+            dirty, self.dirty = self.dirty, set()
+            events, self.events = self.events, []
+            changed = {user_id: self.data[user_id].to_dict() for user_id in dirty}
+            started = time.perf_counter()
+            try:
+                await self._run(self.backend.save, changed, events)
+                metrics.store_flush.observe(value=time.perf_counter() - started)
+            except BaseException:
+                # Try again next time
+                self.dirty |= dirty
+                self.events[:0] = events
+                raise
+            if self.logs_events and await self._run(self.backend.snapshot_due):
+                await self._compact()
+
+    # Give a ledger backend a fresh snapshot. Transactions change the records in place, so they're copied here
+    # on the loop, never read from the store's thread. The copy goes a chunk at a time so a million users don't
+    # hold up commands: a record that changes after its chunk was copied has an event waiting for the next
+    # flush, which goes to the new log and gets replayed on top of the snapshot
+    async def _compact(self):
+        snapshot = {}
+        user_ids = list(self.data)
+        for start in range(0, len(user_ids), 10000):
+            for user_id in user_ids[start:start + 10000]:
+                snapshot[user_id] = self.data[user_id].to_dict()
+            await asyncio.sleep(0)
+        # The events are safe in the log already, a failed snapshot just gets tried again next flush
+        try:
+            await self._run(self.backend.compact, snapshot)
+        except Exception as e:
+            print(f"Couldn't write an economy snapshot: {e!r}")
+
+    # Richest users as (user id, money), optionally only counting the given user ids
+    async def top_balances(self, limit, member_ids=None):
+        if self.backend.supports_queries:
+            # Make sure the database has the latest balances, then let it use its index
+            await self.flush()
+            return await self._run(self.backend.top_balances, limit, member_ids)
+        if member_ids is None:
+            return self.ranking().top(limit)
+        candidates = ((user_id, record) for user_id, record in self.data.items() if user_id in member_ids)
+        top = heapq.nlargest(limit, candidates, key=lambda item: item[1].money)
+        return [(user_id, record.money) for user_id, record in top]
+
+    # (1-based position of a user by money, number of users), or None if the user has no record.
+    # Shared backends don't keep every user in memory, so there's no rank there either
+    def rank(self, user_id):
+        user_id = int(user_id)
+        if self.shared or user_id not in self.data:
+            return None
+        ranking = self.ranking()
+        return ranking.rank(user_id), len(ranking)
+
+    # The store's ranking index, building it on first use. New records and transactions keep it up to date from then on
+    def ranking(self):
+        if self._ranking is None:
+            self._ranking = RankingIndex()
+            for user_id, record in self.data.items():
+                self._ranking.update(user_id, record.money)
+            self.listeners.append(lambda user_id, record: self._ranking.update(user_id, record.money))
+        return self._ranking
+
+    # Whether a transaction is running right now
+    def busy(self):
+        return any(lock.locked() for lock in self._locks)
+
+    # Stop the background task, save whatever is left and close the backend
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self._run(self.backend.close)
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
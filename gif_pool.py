@@ -0,0 +1,73 @@
+# Pool of pre-fetched Giphy URLs per tag, so economy commands never wait on Giphy
+import asyncio, os, time
+from collections import deque
+from rate_limit import UpstreamUnavailable
+
+# Every tag the economy commands use
+ECONOMY_TAGS = ["work", "burglar", "money", "broke", "money allowance", "robber", "arrested"]
+
+
+class GifPool:
+    def __init__(self, giphy_factory, tags, guard, depth=None, low_water=None, ttl=None):
+        # Function returning the giphypop client, so it only gets created when the pool first fills
+        self.giphy_factory = giphy_factory
+        # Rate limiter and circuit breaker for Giphy
+        self.guard = guard
+        # How many GIFs to keep per tag, when to start refilling, and how long a URL stays good
+        self.depth = depth or int(os.getenv("GIF_POOL_DEPTH", 10))
+        self.low_water = low_water or int(os.getenv("GIF_POOL_LOW_WATER", 3))
+        self.ttl = ttl or float(os.getenv("GIF_POOL_TTL", 3600))
+        self.pools = {tag: deque() for tag in tags}
+        self._refills = {}
+
+    # Fill every tag in the background. The bot doesn't, a tag fills the first time it's taken so Giphy isn't
+    # touched at startup; loadtest.py fills them all up front
+    def start(self):
+        for tag in self.pools:
+            self._schedule_refill(tag)
+
+    # Get a GIF URL right away, or None if the pool is empty. Never waits on Giphy
+    def take(self, tag):
+        pool = self.pools.setdefault(tag, deque())
+        url = None
+        now = time.monotonic()
+        while pool:
+            fetched_at, candidate = pool.popleft()
+            if now - fetched_at < self.ttl:
+                url = candidate
+                break
+        if len(pool) < self.low_water:
+            self._schedule_refill(tag)
+        return url
+
+    def _schedule_refill(self, tag):
+        task = self._refills.get(tag)
+        if task is None or task.done():
+            self._refills[tag] = asyncio.create_task(self._refill(tag))
+
+    # giphypop is blocking, so fetch on a worker thread until the pool is full again
+    async def _refill(self, tag):
+        loop = asyncio.get_running_loop()
+        pool = self.pools[tag]
+        giphy = self.giphy_factory()
+        while len(pool) < self.depth:
+            try:
+                # Nobody is waiting on this, so it can queue for a while
+                await self.guard.acquire(max_wait=30)
+            except UpstreamUnavailable:
+                return
+            try:
+                gif = await loop.run_in_executor(None, lambda: giphy.random_gif(tag=tag))
+            except Exception as e:
+                self.guard.failure()
+                print(f"Couldn't fetch a {tag!r} GIF: {e!r}")
+                return
+            self.guard.success()
+            if gif is None:
+                return
+            pool.append((time.monotonic(), gif.media_url))
+
+    async def close(self):
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
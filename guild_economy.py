@@ -0,0 +1,114 @@
+# Separate economies per guild (GUILD_ECONOMY=1 in the .env file). Each guild gets its own EconomyStore
+# with its own file (or database, or key prefix), so busy guilds never wait on each other's locks or flushes
+# and a leaderboard only looks at its own guild. Guild stores are loaded the first time they're needed and
+# closed again (saving everything) once nobody has used them for a while.
+# Commands borrow a store with `async with economies.use(guild_id) as store`, a borrowed store never gets closed
+import asyncio, os, time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from economy_store import EconomyStore
+from storage import make_backend
+
+
+class GuildEconomies:
+    def __init__(self, max_loaded=None, idle_timeout=None):
+        # How many guild stores can be in memory at once, and how long an unused one stays loaded
+        self.max_loaded = max_loaded or int(os.getenv("GUILD_ECONOMY_MAX_LOADED", 1000))
+        self.idle_timeout = idle_timeout or float(os.getenv("GUILD_ECONOMY_IDLE", 3600))
+        # One thread for every guild store's file access, instead of one per guild
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guild-economy")
+        # guild id -> (store, last used), least recently used first
+        self.stores = OrderedDict()
+        # guild id -> how many commands are using its store right now
+        self.leases = {}
+        self._loading = {}
+        self._closing = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._evict_loop())
+
+    # Lend out the guild's store, loading it if needed. It stays open until every borrower is done with it,
+    # even while they wait on something between transactions
+    @asynccontextmanager
+    async def use(self, guild_id):
+        # A store that is still saving after being evicted has to finish before it's read again
+        closing = self._closing.get(guild_id)
+        if closing is not None:
+            await asyncio.shield(closing)
+
+        entry = self.stores.get(guild_id)
+        if entry is None:
+            loading = self._loading.get(guild_id)
+            if loading is None:
+                loading = self._loading[guild_id] = asyncio.create_task(self._load(guild_id))
+            store = await asyncio.shield(loading)
+        else:
+            store = entry[0]
+        self.stores[guild_id] = (store, time.monotonic())
+        self.stores.move_to_end(guild_id)
+        self.leases[guild_id] = self.leases.get(guild_id, 0) + 1
+        try:
+            if len(self.stores) > self.max_loaded:
+                self._evict_oldest()
+            yield store
+        finally:
+            left = self.leases[guild_id] - 1
+            if left:
+                self.leases[guild_id] = left
+            else:
+                del self.leases[guild_id]
+
+    async def _load(self, guild_id):
+        try:
+            store = EconomyStore(make_backend(None, partition=guild_id), executor=self._executor)
+            await store.start()
+            self.stores[guild_id] = (store, time.monotonic())
+            return store
+        finally:
+            del self._loading[guild_id]
+
+    # Whether a command is using the store (the transaction check is for stores used without a lease)
+    def _in_use(self, guild_id, store):
+        return guild_id in self.leases or store.busy()
+
+    # Close the least recently used store nobody is using. If they're all in use there are more than
+    # max_loaded for a while
+    def _evict_oldest(self):
+        for guild_id, (store, _) in self.stores.items():
+            if not self._in_use(guild_id, store):
+                self._evict(guild_id)
+                return
+
+    def _evict(self, guild_id):
+        store, _ = self.stores.pop(guild_id)
+        task = asyncio.create_task(store.close())
+        self._closing[guild_id] = task
+        task.add_done_callback(lambda _: self._closing.pop(guild_id, None))
+
+    # Every minute, close the stores nobody used for a while
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(60)
+            self._evict_idle()
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        idle = [
+            guild_id for guild_id, (store, last_used) in self.stores.items()
+            if now - last_used > self.idle_timeout and not self._in_use(guild_id, store)
+        ]
+        for guild_id in idle:
+            self._evict(guild_id)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for guild_id in list(self.stores):
+            self._evict(guild_id)
+        if self._closing:
+            await asyncio.gather(*self._closing.values(), return_exceptions=True)
+        self._executor.shutdown(wait=True)
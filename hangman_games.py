@@ -0,0 +1,115 @@
+# Hangman games in progress, at most one per channel. A game is a small record: the word, its letter mask
+# and a mask of the letters guessed so far (see hangman_words.py), so a guess is a couple of bit operations.
+# The registry is bounded and games nobody touched for HANGMAN_TIMEOUT seconds end on their own
+import asyncio, os, time
+from collections import OrderedDict
+from hangman_words import letter_bit
+
+# Wrong guesses until the drawing is finished
+MAX_WRONG = 6
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+class HangmanGame:
+    __slots__ = ("author_id", "word", "mask", "guessed", "wrong", "message_id", "last_active")
+
+    def __init__(self, author_id, word, mask):
+        self.author_id = author_id
+        self.word = word
+        self.mask = mask
+        self.guessed = 0
+        self.wrong = 0
+        # Set once the game's message is sent
+        self.message_id = None
+        self.last_active = time.monotonic()
+
+    # "repeat", "hit" or "miss"
+    def guess(self, letter):
+        bit = letter_bit(letter)
+        if self.guessed & bit:
+            return "repeat"
+        self.guessed |= bit
+        if self.mask & bit:
+            return "hit"
+        self.wrong += 1
+        return "miss"
+
+    def won(self):
+        return self.mask & ~self.guessed == 0
+
+    def lost(self):
+        return self.wrong >= MAX_WRONG
+
+    # The word with the letters nobody guessed yet blanked out
+    def revealed(self):
+        return " ".join(letter if self.guessed & letter_bit(letter) else "_" for letter in self.word)
+
+    def wrong_letters(self):
+        return [letter for letter in ALPHABET if self.guessed & ~self.mask & letter_bit(letter)]
+
+    def remaining_letters(self):
+        return [letter for letter in ALPHABET if not self.guessed & letter_bit(letter)]
+
+
+class HangmanGames:
+    def __init__(self, timeout=None, max_games=None):
+        self.timeout = timeout or float(os.getenv("HANGMAN_TIMEOUT", 120))
+        self.max_games = max_games or int(os.getenv("HANGMAN_MAX_GAMES", 1000))
+        # channel id -> HangmanGame, least recently played first
+        self.games = OrderedDict()
+        # Called with (channel id, game) when a game times out, to show the word and count the loss
+        self.on_expire = None
+        self._task = None
+
+    def start(self, on_expire):
+        self.on_expire = on_expire
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._expire_loop())
+
+    def get(self, channel_id):
+        return self.games.get(channel_id)
+
+    # Start a game in a channel that doesn't have one. If there are too many, the least recently played one is dropped
+    def add(self, channel_id, author_id, word, mask):
+        game = HangmanGame(author_id, word, mask)
+        self.games[channel_id] = game
+        if len(self.games) > self.max_games:
+            self.games.popitem(last=False)
+        return game
+
+    # Someone played, the timeout starts over
+    def touch(self, channel_id):
+        game = self.games.get(channel_id)
+        if game is not None:
+            game.last_active = time.monotonic()
+            self.games.move_to_end(channel_id)
+
+    def finish(self, channel_id):
+        return self.games.pop(channel_id, None)
+
+    # Every few seconds, end the games that timed out. They're in order of last activity,
+    # so the sweep stops at the first one that's still going
+    async def _expire_loop(self):
+        while True:
+            await asyncio.sleep(min(self.timeout, 5))
+            deadline = time.monotonic() - self.timeout
+            expired = []
+            for channel_id, game in self.games.items():
+                if game.last_active > deadline:
+                    break
+                expired.append(channel_id)
+            for channel_id in expired:
+                # Might have finished while we were editing the previous one
+                game = self.games.pop(channel_id, None)
+                if game is None:
+                    continue
+                try:
+                    await self.on_expire(channel_id, game)
+                except Exception as e:
+                    print(f"Couldn't expire hangman game in {channel_id}: {e!r}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
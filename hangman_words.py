@@ -0,0 +1,69 @@
+# The hangman word list (words.txt), read once into a compact index. Words are sorted by length and kept in one
+# list, with the offset where each length starts, so a random word of any length range is one randrange.
+# Every word also gets a 26-bit mask of the letters in it, so checking a guess is a bit test
+# instead of a search through the word
+import os, random
+from array import array
+
+MIN_LENGTH = 4
+MAX_LENGTH = 14
+
+# Word lengths for each /hangman size
+SIZES = {
+    "short": (4, 5),
+    "medium": (6, 8),
+    "long": (9, MAX_LENGTH),
+}
+
+
+def letter_bit(letter):
+    return 1 << (ord(letter) - ord("a"))
+
+def letter_mask(word):
+    mask = 0
+    for letter in word:
+        mask |= letter_bit(letter)
+    return mask
+
+
+class WordIndex:
+    def __init__(self, path="words.txt"):
+        self.path = path
+        self.words = []
+        # Parallel to words
+        self.masks = array("I")
+        # starts[length] is the index of the first word of that length (or longer)
+        self.starts = array("I", [0] * (MAX_LENGTH + 2))
+
+    def loaded(self):
+        return bool(self.words)
+
+    def load(self):
+        if self.loaded():
+            return
+        words = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    word = line.strip().lower()
+                    if word.startswith("#") or not MIN_LENGTH <= len(word) <= MAX_LENGTH:
+                        continue
+                    if word.isascii() and word.isalpha():
+                        words.add(word)
+        self.words = sorted(words, key=lambda word: (len(word), word))
+        self.masks = array("I", (letter_mask(word) for word in self.words))
+
+        index = 0
+        for length in range(MAX_LENGTH + 2):
+            while index < len(self.words) and len(self.words[index]) < length:
+                index += 1
+            self.starts[length] = index
+
+    # A random word between the two lengths as (word, letter mask), None if there are none
+    def pick(self, min_length, max_length, rng=random):
+        start = self.starts[min_length]
+        end = self.starts[max_length + 1]
+        if start == end:
+            return None
+        index = rng.randrange(start, end)
+        return self.words[index], self.masks[index]
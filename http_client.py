@@ -0,0 +1,118 @@
+# Shared async HTTP client used by every command that talks to an outside API
+import asyncio, os, random
+import aiohttp
+from rate_limit import UpstreamGuards
+import metrics
+
+# Base URLs for every upstream, kept in one place so they can be pointed somewhere else (like a local stub server)
+UPSTREAMS = {
+    "evilinsult": "https://evilinsult.com",
+    "numbersapi": "http://numbersapi.com",
+    "chucknorris": "https://api.chucknorris.io",
+    "dadjoke": "https://icanhazdadjoke.com",
+    "yesno": "https://yesno.wtf",
+    "uselessfacts": "https://uselessfacts.jsph.pl",
+    "opentdb": "https://opentdb.com",
+}
+
+# Status codes that are worth trying again
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Raised when an upstream still fails after all the retries
+class UpstreamError(Exception):
+    def __init__(self, upstream, reason):
+        super().__init__(f"{upstream}: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class HttpClient:
+    def __init__(self, guards=None, total_limit=None, per_host_limit=None, timeout=None, retries=None, keepalive=None):
+        # Rate limiter and circuit breaker per upstream
+        self.guards = guards or UpstreamGuards()
+        # Everything can be tuned from the .env file
+        self.total_limit = total_limit or int(os.getenv("HTTP_TOTAL_LIMIT", 100))
+        self.per_host_limit = per_host_limit or int(os.getenv("HTTP_PER_HOST_LIMIT", 10))
+        self.timeout = timeout or float(os.getenv("HTTP_TIMEOUT", 5))
+        self.retries = retries if retries is not None else int(os.getenv("HTTP_RETRIES", 2))
+        self.keepalive = keepalive or float(os.getenv("HTTP_KEEPALIVE", 30))
+        self.session = None
+
+    # Create the pooled session, this has to happen inside the running event loop
+    async def start(self):
+        if self.session is not None and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.total_limit,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, connect=min(self.timeout, 3))
+        )
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    # Build the full URL for an upstream
+    def url(self, upstream, path):
+        return UPSTREAMS[upstream] + path
+
+    # GET some JSON from an upstream, retrying timeouts, connection errors and 5xx/429 with backoff.
+    # Raises UpstreamUnavailable right away if the upstream is rate limited or its circuit is open,
+    # max_wait is how long to queue for a rate limit token (background jobs can afford to wait longer)
+    async def get_json(self, upstream, path, headers=None, params=None, max_wait=None):
+        with metrics.phase("http"):
+            return await self._get_json(upstream, path, headers, params, max_wait)
+
+    async def _get_json(self, upstream, path, headers, params, max_wait):
+        if self.session is None:
+            await self.start()
+
+        guard = self.guards.get(upstream)
+        return await self._attempts(guard, upstream, path, headers, params, max_wait)
+
+    # Every call let through by the guard ends in guard.success() or guard.failure(), or guard.release() if
+    # it gets cancelled, otherwise a half-open breaker would wait for its trial call forever
+    async def _attempts(self, guard, upstream, path, headers, params, max_wait):
+        url = self.url(upstream, path)
+        last_error = None
+        # Whether this call is the half-open breaker's trial, only then does a cancel hand the trial back
+        trial = False
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    # Exponential backoff with a bit of jitter so retries don't line up
+                    await asyncio.sleep(min(0.25 * 2 ** (attempt - 1), 2) + random.uniform(0, 0.1))
+                trial = await guard.acquire(max_wait, retry=attempt > 0, trial=trial)
+                try:
+                    async with self.session.get(url, headers=headers, params=params) as response:
+                        if response.status in RETRY_STATUSES:
+                            last_error = f"HTTP {response.status}"
+                            continue
+                        response.raise_for_status()
+                        # Some of these APIs don't send a json content type, so don't check it
+                        data = await response.json(content_type=None)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    last_error = repr(e)
+                    continue
+                except aiohttp.ClientResponseError as e:
+                    guard.failure()
+                    raise UpstreamError(upstream, f"HTTP {e.status}") from e
+                except Exception as e:
+                    # A body that isn't JSON, a broken payload... the upstream is just as broken
+                    guard.failure()
+                    raise UpstreamError(upstream, repr(e)) from e
+                guard.success()
+                return data
+
+            guard.failure()
+            raise UpstreamError(upstream, last_error)
+        except asyncio.CancelledError:
+            guard.release(trial)
+            raise
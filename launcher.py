@@ -0,0 +1,120 @@
+# Runs the bot as several worker processes, each one an AutoShardedBot running a slice of the shards.
+# The workers share economy data and cooldowns through a shared storage backend
+# (STORAGE_BACKEND=shared-sqlite on one machine, or redis), so any of them can serve any user.
+#
+#   SHARD_COUNT=8 SHARD_PROCESSES=4 STORAGE_BACKEND=shared-sqlite python launcher.py
+#
+# SHARD_COUNT defaults to what Discord recommends for the bot, SHARD_PROCESSES to the number of CPUs.
+# A worker that crashes gets restarted, Ctrl+C stops them all
+import json, os, signal, subprocess, sys, time, urllib.request
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SHARED_BACKENDS = ("shared-sqlite", "redis")
+
+
+# Ask Discord how many shards the bot should have
+def recommended_shards(token):
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "funny-botter launcher"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+
+# Split shards 0..shard_count-1 into `processes` contiguous groups, as even as possible
+def split_shards(shard_count, processes):
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups = []
+    start = 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+
+class Worker:
+    def __init__(self, index, shard_ids, shard_count):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+
+    def env(self):
+        env = dict(os.environ)
+        env["SHARD_COUNT"] = str(self.shard_count)
+        env["SHARD_IDS"] = ",".join(map(str, self.shard_ids))
+        # Slash commands only need syncing once
+        if self.index != 0:
+            env["SKIP_TREE_SYNC"] = "1"
+        # Every worker gets its own /metrics port
+        if os.getenv("METRICS_PORT"):
+            env["METRICS_PORT"] = str(int(os.getenv("METRICS_PORT")) + self.index)
+        return env
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, os.path.join(ROOT, "bettercommented.py")], env=self.env(), cwd=os.getcwd())
+        self.started_at = time.monotonic()
+        print(f"Worker {self.index} (pid {self.process.pid}) running shards {self.shard_ids[0]}-{self.shard_ids[-1]}")
+
+
+def main():
+    load_dotenv()
+    processes = int(os.getenv("SHARD_PROCESSES", os.cpu_count() or 1))
+    backend = os.getenv("STORAGE_BACKEND", "json").lower()
+    if processes > 1 and backend not in SHARED_BACKENDS:
+        sys.exit(f"STORAGE_BACKEND={backend} can only be used by one process, use one of {', '.join(SHARED_BACKENDS)} "
+                 f"or set SHARD_PROCESSES=1")
+
+    shard_count = int(os.getenv("SHARD_COUNT") or recommended_shards(os.getenv("API_KEY")))
+    workers = [Worker(index, shard_ids, shard_count) for index, shard_ids in enumerate(split_shards(shard_count, processes))]
+    print(f"Running {shard_count} shards in {len(workers)} processes")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker in workers:
+        worker.start()
+        # Discord only lets a bot identify one shard every 5 seconds, no point starting them all at once
+        time.sleep(5 * len(worker.shard_ids) if worker is not workers[-1] else 0)
+
+    while not stopping:
+        time.sleep(1)
+        for worker in workers:
+            code = worker.process.poll()
+            if code is None or stopping:
+                continue
+            # Crashed: restart it, backing off if it keeps crashing right after starting
+            if time.monotonic() - worker.started_at < 60:
+                worker.restarts += 1
+            else:
+                worker.restarts = 0
+            delay = min(5 * 2 ** worker.restarts, 300)
+            print(f"Worker {worker.index} exited with code {code}, restarting in {delay}s")
+            time.sleep(delay)
+            worker.start()
+
+    print("Stopping workers")
+    for worker in workers:
+        if worker.process.poll() is None:
+            worker.process.send_signal(signal.SIGINT)
+    for worker in workers:
+        try:
+            worker.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+
+
+if __name__ == "__main__":
+    main()
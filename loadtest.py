@@ -0,0 +1,307 @@
+# Load test: drives the real command callbacks with fake guilds, users and contexts.
+# The JSON APIs are served by a local stub server, Giphy and Reddit are replaced by in-process fakes,
+# so nothing ever leaves the machine. Results go to a JSON file so runs can be diffed between builds.
+#
+#   python loadtest.py --guilds 1000 --members 50 --levels 10,100,1000 --output loadtest.json
+import argparse, asyncio, json, os, random, statistics, sys, tempfile, time
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---- Stub server for every JSON upstream ----
+
+def make_stub_app(latency):
+    app = web.Application()
+
+    async def respond(payload):
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response(payload)
+
+    async def insult(request):
+        return await respond({"insult": "You load-tested potato."})
+
+    async def number(request):
+        return await respond({"text": f"{random.randint(1, 1000)} is a number."})
+
+    async def chuck(request):
+        return await respond({"value": "Chuck Norris load tests in production."})
+
+    async def dad(request):
+        return await respond({"joke": "I'm reading a book about anti-gravity. It's impossible to put down."})
+
+    async def yesno(request):
+        return await respond({"answer": "yes", "image": "https://example.com/yes.gif"})
+
+    async def fact(request):
+        return await respond({"text": "Bananas are berries."})
+
+    async def trivia_token(request):
+        return await respond({"response_code": 0, "token": "loadtest"})
+
+    async def trivia(request):
+        amount = int(request.query.get("amount", 1))
+        results = [
+            {"question": f"Question {i}?", "correct_answer": "Yes", "incorrect_answers": ["No", "Maybe", "Nah"]}
+            for i in range(amount)
+        ]
+        return await respond({"response_code": 0, "results": results})
+
+    app.router.add_get("/generate_insult.php", insult)
+    app.router.add_get("/random/{kind}", number)
+    app.router.add_get("/jokes/random", chuck)
+    app.router.add_get("/", dad)
+    app.router.add_get("/api", yesno)
+    app.router.add_get("/random.json", fact)
+    app.router.add_get("/api_token.php", trivia_token)
+    app.router.add_get("/api.php", trivia)
+    return app
+
+
+# ---- Fakes for Giphy, Reddit and Discord ----
+
+class FakeGif:
+    def __init__(self, tag):
+        self.media_url = f"https://example.com/{tag.replace(' ', '_')}.gif"
+
+class FakeGiphy:
+    def random_gif(self, tag):
+        return FakeGif(tag)
+
+class FakeSubmission:
+    def __init__(self, index):
+        self.id = f"t3_{index}"
+        self.title = f"Meme {index}"
+        self.url = f"https://example.com/meme{index}.png"
+
+class FakeSubreddit:
+    async def hot(self, limit):
+        for index in range(limit):
+            yield FakeSubmission(index)
+
+class FakeReddit:
+    async def subreddit(self, name):
+        return FakeSubreddit()
+
+    # The bot closes its Reddit client on shutdown
+    async def close(self):
+        pass
+
+class FakeAvatar:
+    def __init__(self, user_id):
+        self.url = f"https://example.com/avatar/{user_id}.png"
+
+class FakeMember:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = FakeAvatar(user_id)
+
+class FakeGuild:
+    def __init__(self, guild_id, members):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.members = members
+        self._members = {member.id: member for member in members}
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+class FakeMessage:
+    next_id = 1
+
+    def __init__(self):
+        self.id = FakeMessage.next_id
+        FakeMessage.next_id += 1
+
+    async def edit(self, **kwargs):
+        pass
+
+class FakeContext:
+    def __init__(self, author, guild, send_latency):
+        self.author = author
+        self.guild = guild
+        self.channel = FakeChannel(guild.id)
+        self.send_latency = send_latency
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        self.sent += 1
+        return FakeMessage()
+
+    async def defer(self, **kwargs):
+        pass
+
+
+# ---- The load test itself ----
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+class Choice:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+# Command name -> function building its arguments
+SCENARIOS = {
+    "work": lambda guild, author: (),
+    "crime": lambda guild, author: (),
+    "balance": lambda guild, author: (),
+    "daily": lambda guild, author: (),
+    "gamble": lambda guild, author: (Choice("Skibidi Toilet", random.randint(1, 2)), 30),
+    "rob": lambda guild, author: (random.choice(guild.members),),
+    "leaderboard": lambda guild, author: (),
+    "rock_paper_scissors": lambda guild, author: (random.choice(["rock", "paper", "scissors"]),),
+    "trivia": lambda guild, author: (Choice("Easy", random.choice(["easy", "medium", "hard"])),),
+    "random_meme": lambda guild, author: (),
+    "chuck_norris": lambda guild, author: (),
+    "dad_joke": lambda guild, author: (),
+    "number": lambda guild, author: (),
+    "useless_fact": lambda guild, author: (),
+    "insult": lambda guild, author: (random.choice(guild.members),),
+}
+
+async def measure_loop_lag(samples, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+async def run_level(bot, guilds, concurrency, invocations, send_latency):
+    latencies = {name: [] for name in SCENARIOS}
+    errors = {}
+    lag_samples = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def invoke():
+        name = random.choice(list(SCENARIOS))
+        guild = random.choice(guilds)
+        author = random.choice(guild.members)
+        command = bot.get_command(name)
+        ctx = FakeContext(author, guild, send_latency)
+        args = SCENARIOS[name](guild, author)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await command(ctx, *args)
+            except Exception as e:
+                key = f"{name}: {type(e).__name__}"
+                errors[key] = errors.get(key, 0) + 1
+                return
+            latencies[name].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(invoke() for _ in range(invocations)))
+    elapsed = time.perf_counter() - started
+    lag_task.cancel()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "invocations": invocations,
+        "seconds": elapsed,
+        "throughput": invocations / elapsed if elapsed else 0.0,
+        "p50": percentile(all_latencies, 0.5),
+        "p95": percentile(all_latencies, 0.95),
+        "p99": percentile(all_latencies, 0.99),
+        "commands": {
+            name: {"count": len(values), "p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+            for name, values in latencies.items() if values
+        },
+        "errors": errors,
+        "loop_lag_max": max(lag_samples, default=0.0),
+        "loop_lag_mean": statistics.fmean(lag_samples) if lag_samples else 0.0,
+    }
+
+async def main(args):
+    # Run inside a temp dir so the real data.json is never touched
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    runner = web.AppRunner(make_stub_app(args.upstream_latency))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    import http_client
+    for name in http_client.UPSTREAMS:
+        http_client.UPSTREAMS[name] = f"http://127.0.0.1:{port}"
+    # No rate limits against our own stub
+    os.environ.setdefault("RATE_LIMITS", ",".join(f"{name}:100000:100000" for name in list(http_client.UPSTREAMS) + ["giphy", "reddit"]))
+    os.environ.setdefault("TRIVIA_REQUEST_SPACING", "0.01")
+
+    import bettercommented
+    bot = bettercommented.bot
+    bot._giphy = FakeGiphy()
+    bot._reddit = FakeReddit()
+    await bot.setup_hook()
+
+    next_id = 1000
+    guilds = []
+    for guild_index in range(args.guilds):
+        members = [FakeMember(next_id + index) for index in range(args.members)]
+        next_id += args.members
+        guilds.append(FakeGuild(guild_index + 1, members))
+
+    # The bot only starts the meme and GIF caches when they're first used. Start them here and give them
+    # a moment to fill, so the levels measure a bot that has been up for a while
+    bot.memes.start()
+    bot.gifs.start()
+    await asyncio.sleep(args.warmup)
+
+    levels = []
+    for concurrency in args.levels:
+        result = await run_level(bot, guilds, concurrency, args.invocations or concurrency * 10, args.send_latency)
+        levels.append(result)
+        print(f"concurrency {concurrency}: {result['throughput']:.0f}/s, p50 {result['p50'] * 1000:.1f}ms, "
+              f"p99 {result['p99'] * 1000:.1f}ms, max loop lag {result['loop_lag_max'] * 1000:.1f}ms")
+
+    await bot.store.flush()
+    data_size = sum(
+        os.path.getsize(name) for name in os.listdir(workdir)
+        if name.startswith("data") and os.path.isfile(name)
+    )
+    await bot.close()
+    await runner.cleanup()
+
+    report = {
+        "guilds": args.guilds,
+        "members_per_guild": args.members,
+        "upstream_latency": args.upstream_latency,
+        "send_latency": args.send_latency,
+        "levels": levels,
+        "data_file_bytes": data_size,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the bot's commands against local stubs")
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--levels", type=lambda value: [int(level) for level in value.split(",")], default=[10, 100, 1000])
+    parser.add_argument("--invocations", type=int, default=0, help="Invocations per level (default: 10x the concurrency)")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Seconds the stub server waits before answering")
+    parser.add_argument("--send-latency", type=float, default=0.05, help="Seconds a fake Discord send takes")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--output", default=os.path.abspath("loadtest.json"))
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+    asyncio.run(main(args))
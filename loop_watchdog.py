@@ -0,0 +1,112 @@
+# Opt-in watchdog that notices when something blocks the event loop and samples the stack that's doing it.
+# Turn it on with LOOP_WATCHDOG=1, and set LOOP_WATCHDOG_PROFILE to a file to also dump
+# collapsed stacks (the format flamegraph.pl and speedscope read)
+import asyncio, os, sys, threading, time
+
+
+class LoopWatchdog:
+    def __init__(self, threshold=None, sample_interval=None, profile_path=None):
+        # How long the loop can be stuck before it counts as blocked
+        self.threshold = threshold or float(os.getenv("LOOP_WATCHDOG_THRESHOLD", 0.1))
+        # How often the watchdog thread looks at the loop (and samples the stack while it's blocked)
+        self.sample_interval = sample_interval or float(os.getenv("LOOP_WATCHDOG_SAMPLE_INTERVAL", 0.01))
+        self.profile_path = profile_path or os.getenv("LOOP_WATCHDOG_PROFILE")
+        # Code objects of command callbacks -> command name, used to tell which command is blocking
+        self.command_codes = {}
+        # collapsed stack -> number of samples
+        self.samples = {}
+        # command name -> [number of stalls, total seconds blocked]
+        self.stalls = {}
+        self.last_beat = time.monotonic()
+        self._loop_thread = None
+        self._beat_task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # Remember every command's callback so stacks can be matched to commands
+    def register_commands(self, commands):
+        for command in commands:
+            self.command_codes[command.callback.__code__] = command.qualified_name
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat_task = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    # Runs on the loop, if this stops updating the loop is stuck
+    async def _beat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.sample_interval)
+
+    # Runs on its own thread
+    def _watch(self):
+        stall_started = None
+        stall_stack = None
+        stall_command = None
+        while not self._stop.wait(self.sample_interval):
+            blocked_for = time.monotonic() - self.last_beat - self.sample_interval
+            if blocked_for > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+                stack, command = self._collapse(frame)
+                self.samples[stack] = self.samples.get(stack, 0) + 1
+                if stall_started is None:
+                    stall_started = self.last_beat
+                    stall_stack = stack
+                    stall_command = command
+                elif stall_command is None:
+                    stall_command = command
+            elif stall_started is not None:
+                self._record_stall(time.monotonic() - stall_started, stall_command, stall_stack)
+                stall_started = None
+
+    # Turn a frame into "file:function;file:function;..." (outermost first) and find the command in it, if any
+    def _collapse(self, frame):
+        parts = []
+        command = None
+        while frame is not None:
+            code = frame.f_code
+            if command is None:
+                command = self.command_codes.get(code)
+            parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts), command
+
+    def _record_stall(self, seconds, command, stack):
+        name = command or "(no command)"
+        entry = self.stalls.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        where = stack.rsplit(";", 1)[-1] if stack else "?"
+        print(f"Event loop blocked for {seconds:.3f}s in {name} at {where}")
+
+    # Gauges for /metrics
+    def collect_metrics(self):
+        gauges = []
+        for command, (count, seconds) in list(self.stalls.items()):
+            gauges.append(("bot_loop_stalls", "Times the event loop was blocked", ("command",), (command,), count))
+            gauges.append(("bot_loop_stall_seconds", "Total time the event loop was blocked", ("command",), (command,), seconds))
+        return gauges
+
+    # Write the collapsed stacks, one "stack count" per line
+    def dump(self, path=None):
+        path = path or self.profile_path
+        if not path:
+            return
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+    async def close(self):
+        self._stop.set()
+        if self._beat_task is not None:
+            self._beat_task.cancel()
+            self._beat_task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.dump()
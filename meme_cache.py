@@ -0,0 +1,104 @@
+# Cache of image memes per subreddit, refreshed in the background so random_meme never waits on Reddit
+import asyncio, os, random
+from collections import OrderedDict, deque
+from rate_limit import UpstreamUnavailable
+
+MEME_SUBREDDITS = ["memes", "dankmemes", "blursedimages", "funny", "TikTokCringe", "BlackPeopleTwitter", "me_irl", "193"]
+VALID_EXTENSIONS = (".gif", ".gifv", ".jpeg", ".jpg", ".png")
+
+
+class MemeCache:
+    def __init__(self, reddit_factory, subreddits, guard, refresh_interval=None, dedup_window=None, max_guilds=10000):
+        # Function returning the asyncpraw client, so it only gets created when someone first asks for a meme
+        self.reddit_factory = reddit_factory
+        self.subreddits = subreddits
+        # Rate limiter and circuit breaker for Reddit
+        self.guard = guard
+        # Every subreddit gets refreshed once per interval, one at a time so Reddit sees a steady trickle
+        self.refresh_interval = refresh_interval or float(os.getenv("MEME_REFRESH_INTERVAL", 900))
+        # How many recent memes a guild won't see again
+        self.dedup_window = dedup_window or int(os.getenv("MEME_DEDUP_WINDOW", 50))
+        self.max_guilds = max_guilds
+        # subreddit -> list of (title, url), already filtered to images
+        self.memes = {}
+        # guild id -> (deque of recent urls, set of the same urls), least recently used guild first
+        self.recent = OrderedDict()
+        self._task = None
+
+    # Start refreshing in the background (does nothing if it already is). pick() calls it, so the first
+    # /random_meme after a start is what loads the memes
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        # Load everything once right away, then refresh one subreddit at a time
+        for name in self.subreddits:
+            await self._refresh_safely(name)
+        delay = self.refresh_interval / len(self.subreddits)
+        while True:
+            for name in self.subreddits:
+                await asyncio.sleep(delay)
+                await self._refresh_safely(name)
+
+    async def _refresh_safely(self, name):
+        try:
+            await self.guard.acquire(max_wait=60)
+        except UpstreamUnavailable:
+            # Reddit is having a bad time, keep serving what we already have
+            return
+        try:
+            await self.refresh(name)
+        except Exception as e:
+            self.guard.failure()
+            print(f"Couldn't refresh memes from r/{name}: {e!r}")
+        else:
+            self.guard.success()
+
+    # Fetch the hot posts of one subreddit and keep only the images
+    async def refresh(self, name):
+        subreddit = await self.reddit_factory().subreddit(name)
+        memes = []
+        seen = set()
+        async for submission in subreddit.hot(limit=100):
+            if submission.id in seen or not submission.url.lower().endswith(VALID_EXTENSIONS):
+                continue
+            seen.add(submission.id)
+            memes.append((submission.title, submission.url))
+        # Keep the old list if Reddit gave us nothing useful
+        if memes:
+            self.memes[name] = memes
+
+    # Pick a random meme the guild hasn't seen recently, or None if nothing is loaded yet
+    def pick(self, guild_id):
+        self.start()
+        loaded = [memes for memes in self.memes.values() if memes]
+        if not loaded:
+            return None
+
+        recent = self.recent.get(guild_id)
+        if recent is None:
+            recent = (deque(), set())
+            self.recent[guild_id] = recent
+            if len(self.recent) > self.max_guilds:
+                self.recent.popitem(last=False)
+        else:
+            self.recent.move_to_end(guild_id)
+        recent_urls, recent_set = recent
+
+        # A few random tries is enough, if they're all repeats just send the last one
+        for _ in range(5):
+            meme = random.choice(random.choice(loaded))
+            if meme[1] not in recent_set:
+                break
+
+        recent_urls.append(meme[1])
+        recent_set.add(meme[1])
+        if len(recent_urls) > self.dedup_window:
+            recent_set.discard(recent_urls.popleft())
+        return meme
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,184 @@
+# Prometheus-style metrics: per-command latency broken down by phase, errors, cooldowns and event loop lag.
+# Served as plain text on a local /metrics endpoint
+import asyncio, contextvars, os, time
+from contextlib import contextmanager
+from aiohttp import web
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self.values = {}
+
+    def observe(self, *label_values, value):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = [0] * (len(self.buckets) + 2)
+            self.values[label_values] = entry
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[index] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, entry in self.values.items():
+            for bound, count in zip(self.buckets, entry):
+                labels = _format_labels(self.labels + ("le",), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {entry[-1]}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {entry[-2]}")
+            lines.append(f"{self.name}_count{labels} {entry[-1]}")
+        return lines
+
+
+command_latency = Histogram("bot_command_seconds", "Total time spent running a command", ("command",))
+phase_latency = Histogram("bot_command_phase_seconds", "Time a command spent in each phase", ("command", "phase"))
+command_errors = Counter("bot_command_errors_total", "Command errors by exception type", ("command", "error"))
+cooldown_rejections = Counter("bot_cooldown_rejections_total", "Commands rejected because of a cooldown", ("command",))
+loop_lag = Histogram("bot_event_loop_lag_seconds", "How late the event loop woke up a sleeping task", buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+loop_lag_last = Gauge("bot_event_loop_lag_last_seconds", "Most recent event loop lag measurement")
+store_flush = Histogram("bot_store_flush_seconds", "Time spent writing economy data to storage")
+auto_defers = Counter("bot_auto_defers_total", "Slash commands deferred because they were about to miss the 3 second deadline", ("command",))
+discord_sends = Counter("bot_discord_sends_total", "Messages sent to Discord", ("command",))
+
+METRICS = [command_latency, phase_latency, command_errors, cooldown_rejections, loop_lag, loop_lag_last, store_flush, auto_defers, discord_sends]
+
+# Extra gauges filled in right before rendering. Each one is a function returning
+# a list of (name, help, label names, label values, value)
+collectors = []
+
+
+# Timing for the command running in the current task
+class CommandTiming:
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.done = False
+
+current_command = contextvars.ContextVar("current_command", default=None)
+
+
+def command_started(command_name):
+    current_command.set(CommandTiming(command_name))
+
+def command_finished():
+    timing = current_command.get()
+    if timing is None or timing.done:
+        return
+    timing.done = True
+    command_latency.observe(timing.command, value=time.perf_counter() - timing.started)
+
+
+# Time one phase (http, store, discord...) of whatever command is running
+@contextmanager
+def phase(name):
+    timing = current_command.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        # Background tasks inherit the context of the command that started them, don't count those
+        if timing is not None and not timing.done:
+            phase_latency.observe(timing.command, name, value=time.perf_counter() - started)
+
+
+# Sleep in a loop and measure how late we wake up, that's how long something else held the loop
+async def monitor_loop_lag(interval=0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        loop_lag.observe(value=lag)
+        loop_lag_last.set(value=lag)
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collect in collectors:
+        gauges = {}
+        for name, help, label_names, label_values, value in collect():
+            gauge = gauges.get(name)
+            if gauge is None:
+                gauge = gauges[name] = Gauge(name, help, label_names)
+            gauge.set(*label_values, value=value)
+        for gauge in gauges.values():
+            lines.extend(gauge.render())
+    return "\n".join(lines) + "\n"
+
+
+# Local HTTP server for /metrics, plus the loop lag monitor
+class MetricsServer:
+    def __init__(self, host=None, port=None):
+        self.host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+        self.port = port or int(os.getenv("METRICS_PORT", 9108))
+        self._runner = None
+        self._lag_task = None
+
+    async def _handle(self, request):
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        self._lag_task = asyncio.create_task(monitor_loop_lag())
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
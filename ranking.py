@@ -0,0 +1,180 @@
+# Per-guild leaderboards that stay sorted as balances change, instead of sorting every member on every call
+import random
+
+# Enough levels for a few million members
+MAX_LEVELS = 24
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # How many entries each link skips over, so a rank can be counted on the way down
+        self.width = [1] * levels
+
+
+# One guild's ranking: a skip list of (-money, user_id), richest first. Every level links to a node further
+# ahead than the level below, so update, remove and rank walk down about log n nodes instead of shifting
+# a sorted list (O(n) per balance change). top(n) walks the bottom level
+class RankingIndex:
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVELS)
+        self.levels = 1
+        self.money = {}
+        self._random = random.Random()
+
+    def update(self, user_id, money):
+        old_money = self.money.get(user_id)
+        if old_money == money:
+            return
+        if old_money is not None:
+            self._delete((-old_money, user_id))
+        self.money[user_id] = money
+        self._insert((-money, user_id))
+
+    def remove(self, user_id):
+        old_money = self.money.pop(user_id, None)
+        if old_money is not None:
+            self._delete((-old_money, user_id))
+
+    # Richest n users as (user_id, money)
+    def top(self, n):
+        top = []
+        node = self.head.next[0]
+        while node is not None and len(top) < n:
+            negative_money, user_id = node.key
+            top.append((user_id, -negative_money))
+            node = node.next[0]
+        return top
+
+    # 1-based position of a user, or None if they aren't ranked
+    def rank(self, user_id):
+        money = self.money.get(user_id)
+        if money is None:
+            return None
+        position, _ = self._find((-money, user_id))
+        return position[0] + 1
+
+    def __len__(self):
+        return len(self.money)
+
+    # For each level, the last node before key and its position (the head is 0)
+    def _find(self, key):
+        position = [0] * self.levels
+        before = [None] * self.levels
+        node = self.head
+        steps = 0
+        for level in reversed(range(self.levels)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                steps += node.width[level]
+                node = following
+                following = node.next[level]
+            position[level] = steps
+            before[level] = node
+        return position, before
+
+    def _insert(self, key):
+        levels = 1
+        while levels < MAX_LEVELS and self._random.random() < 0.25:
+            levels += 1
+        if levels > self.levels:
+            # Fresh levels of the head link straight past the last entry
+            for level in range(self.levels, levels):
+                self.head.next[level] = None
+                self.head.width[level] = len(self.money)
+            self.levels = levels
+
+        position, before = self._find(key)
+        node = _Node(key, levels)
+        new_position = position[0] + 1
+        for level in range(levels):
+            previous = before[level]
+            skipped = new_position - position[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - skipped + 1
+            previous.next[level] = node
+            previous.width[level] = skipped
+        # Links above the new node now jump over one more entry
+        for level in range(levels, self.levels):
+            before[level].width[level] += 1
+
+    def _delete(self, key):
+        _, before = self._find(key)
+        node = before[0].next[0]
+        for level in range(self.levels):
+            previous = before[level]
+            if previous.next[level] is node:
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+
+
+# All the guild rankings. A guild's index is built the first time someone asks for it,
+# after that the economy store keeps it up to date whenever a balance changes
+class GuildRankings:
+    def __init__(self, store):
+        self.store = store
+        self.guilds = {}
+        # Which built guilds each user is in, so a balance change only touches those
+        self.member_guilds = {}
+        store.listeners.append(self.on_balance_change)
+
+    def get(self, guild):
+        index = self.guilds.get(guild.id)
+        if index is None:
+            index = self.build(guild)
+        return index
+
+    # (ranking index, top n as (user_id, money)). With a shared store other processes change balances
+    # behind our back, so the top comes from the backend and there is no index
+    async def top(self, guild, n):
+        if self.store.shared:
+            member_ids = {member.id for member in guild.members}
+            return None, await self.store.top_balances(n, member_ids)
+        index = self.get(guild)
+        return index, index.top(n)
+
+    def build(self, guild):
+        index = RankingIndex()
+        self.guilds[guild.id] = index
+        for member in guild.members:
+            self.add_member(guild.id, member.id)
+        return index
+
+    def add_member(self, guild_id, user_id):
+        index = self.guilds.get(guild_id)
+        if index is None:
+            return
+        self.member_guilds.setdefault(user_id, set()).add(guild_id)
+        record = self.store.data.get(user_id)
+        if record is not None:
+            index.update(user_id, record.money)
+
+    def remove_member(self, guild_id, user_id):
+        index = self.guilds.get(guild_id)
+        if index is None:
+            return
+        index.remove(user_id)
+        guilds = self.member_guilds.get(user_id)
+        if guilds is not None:
+            guilds.discard(guild_id)
+            if not guilds:
+                del self.member_guilds[user_id]
+
+    # The bot left the guild, forget its ranking
+    def drop_guild(self, guild_id):
+        if self.guilds.pop(guild_id, None) is None:
+            return
+        for user_id, guilds in list(self.member_guilds.items()):
+            guilds.discard(guild_id)
+            if not guilds:
+                del self.member_guilds[user_id]
+
+    # Called by the economy store after a user's record changes
+    def on_balance_change(self, user_id, record):
+        for guild_id in self.member_guilds.get(user_id, ()):
+            self.guilds[guild_id].update(user_id, record.money)
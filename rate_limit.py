@@ -0,0 +1,153 @@
+# Client-side rate limiting and circuit breaking for every third-party API the bot uses
+import asyncio, os, time
+
+# Requests per second and burst size for each upstream. Can be overridden in the .env file with
+# RATE_LIMITS=name:rate:burst,name:rate:burst
+DEFAULT_LIMITS = {
+    "evilinsult": (2, 5),
+    "numbersapi": (2, 5),
+    "chucknorris": (5, 10),
+    "dadjoke": (5, 10),
+    "yesno": (2, 5),
+    "uselessfacts": (2, 5),
+    "opentdb": (0.2, 1),
+    "giphy": (1, 5),
+    "reddit": (1, 5),
+}
+
+
+# Raised instead of calling an upstream that is rate limited or known to be down
+class UpstreamUnavailable(Exception):
+    def __init__(self, upstream, reason):
+        super().__init__(f"{upstream}: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Take a token, waiting for one if needed. Returns False if it would take longer than max_wait
+    async def acquire(self, max_wait):
+        self._refill()
+        # Reserve the token now so callers queue up in order, then sleep until it exists
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+        if wait > max_wait:
+            return False
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+# After enough failures in a row the breaker opens and calls fail fast.
+# After reset_timeout one trial call is let through, if it works the breaker closes again
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    # (allowed, trial): a half-open breaker lets exactly one call through, and that call is the trial
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True, False
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True, True
+        return False, False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+# Rate limiter and breaker for one upstream
+class UpstreamGuard:
+    def __init__(self, name, rate, burst, failure_threshold, reset_timeout, max_wait):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_wait = max_wait
+        self.rejected = 0
+
+    # Call before every request, raises UpstreamUnavailable instead of piling up more requests. Returns whether
+    # this call got the half-open breaker's trial. Retries of a call that was already let through only need
+    # a token, not another breaker check, and pass back what the first acquire() returned as trial
+    async def acquire(self, max_wait=None, retry=False, trial=False):
+        if not retry:
+            allowed, trial = self.breaker.allow()
+            if not allowed:
+                self.rejected += 1
+                raise UpstreamUnavailable(self.name, "circuit open")
+        try:
+            got_token = await self.bucket.acquire(self.max_wait if max_wait is None else max_wait)
+        except asyncio.CancelledError:
+            self.release(trial)
+            raise
+        if not got_token:
+            self.rejected += 1
+            self.release(trial)
+            raise UpstreamUnavailable(self.name, "rate limited")
+        return trial
+
+    # The call was given up without an answer (rate limited, cancelled). Not the upstream's fault,
+    # so if it was the trial the next caller gets to try. Any other call has nothing to give back
+    def release(self, trial):
+        if trial:
+            self.breaker.trial_running = False
+
+    def success(self):
+        self.breaker.record_success()
+
+    def failure(self):
+        self.breaker.record_failure()
+
+
+# Every upstream's guard, created on first use
+class UpstreamGuards:
+    def __init__(self):
+        self.limits = dict(DEFAULT_LIMITS)
+        for entry in filter(None, os.getenv("RATE_LIMITS", "").split(",")):
+            name, rate, burst = entry.split(":")
+            self.limits[name.strip()] = (float(rate), float(burst))
+        self.failure_threshold = int(os.getenv("BREAKER_FAILURES", 5))
+        self.reset_timeout = float(os.getenv("BREAKER_RESET_TIMEOUT", 30))
+        # How long a command is allowed to queue for a token before it gets the fallback
+        self.max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", 2))
+        self.guards = {}
+
+    def get(self, name):
+        guard = self.guards.get(name)
+        if guard is None:
+            rate, burst = self.limits.get(name, (5, 10))
+            guard = UpstreamGuard(name, rate, burst, self.failure_threshold, self.reset_timeout, self.max_wait)
+            self.guards[name] = guard
+        return guard
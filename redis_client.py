@@ -0,0 +1,98 @@
+# Tiny blocking Redis client, just enough RESP to run the commands the shared storage backend needs.
+# It's only ever used from the economy store's executor thread, so one plain socket is enough
+import socket
+from urllib.parse import urlparse
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    def __init__(self, url="redis://127.0.0.1:6379/0", timeout=5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        if self._sock is not None:
+            return
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._call([("AUTH", self.password)])
+        if self.db:
+            self._call([("SELECT", self.db)])
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    # Run one command and return its reply, retry is the same as for pipeline()
+    def execute(self, *args, retry=False):
+        return self.pipeline([args], retry=retry)[0]
+
+    # Send several commands in one write and read all the replies, one round trip instead of many.
+    # If the connection drops, there's no telling which commands Redis ran already. Only a pipeline with retry
+    # (reads, or writes that end up the same when they run twice) gets sent again on a new connection,
+    # anything else (HINCRBY, SET NX, scripts) raises and the connection is opened again on the next call
+    def pipeline(self, commands, retry=False):
+        try:
+            self.connect()
+            return self._call(commands)
+        except (ConnectionError, OSError):
+            self.close()
+            if not retry:
+                raise
+            self.connect()
+            return self._call(commands)
+
+    def _call(self, commands):
+        self._sock.sendall(b"".join(self._encode(args) for args in commands))
+        replies = [self._read() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _encode(args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Redis closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(rest)
+            if length == -1:
+                return None
+            return [self._read() for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
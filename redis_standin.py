@@ -0,0 +1,206 @@
+# In-memory stand-in for Redis, speaking the same protocol, so the shared storage mode can be tried
+# (and load tested) without installing Redis. It only knows the commands storage.RedisBackend uses,
+# and forgets everything when it stops.
+#
+#   python redis_standin.py --port 6379
+#   STORAGE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6379/0 python launcher.py
+import argparse, asyncio, bisect, time
+from storage import RedisBackend
+
+
+class StandinError(Exception):
+    pass
+
+
+class Standin:
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        # key -> (sorted list of (score, member), member -> score)
+        self.zsets = {}
+        # key -> monotonic time it expires at
+        self.expires = {}
+
+    # Expired keys are only removed when someone touches them
+    def _alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            self._delete(key)
+        return key in self.values or key in self.hashes or key in self.zsets
+
+    def _delete(self, key):
+        found = False
+        for table in (self.values, self.hashes, self.zsets):
+            if table.pop(key, None) is not None:
+                found = True
+        self.expires.pop(key, None)
+        return found
+
+    def run(self, name, args):
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            raise StandinError(f"ERR unknown command '{name}'")
+        return handler(*args)
+
+    # There's no Lua here, only the scripts RedisBackend sends are known, done in Python
+    def cmd_eval(self, script, numkeys, *args):
+        keys, argv = args[:int(numkeys)], args[int(numkeys):]
+        if script == RedisBackend.UNLOCK_SCRIPT:
+            return self.cmd_del(keys[0]) if self.cmd_get(keys[0]) == argv[0] else 0
+        raise StandinError("ERR the stand-in can't run this script")
+
+    def cmd_ping(self, *args):
+        return "PONG"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_get(self, key):
+        return self.values.get(key) if self._alive(key) else None
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        if "NX" in options and self._alive(key):
+            return None
+        self._delete(key)
+        self.values[key] = value
+        if "PX" in options:
+            self.expires[key] = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+        return "OK"
+
+    def cmd_del(self, *keys):
+        return sum(self._delete(key) for key in keys if self._alive(key))
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_pttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires = self.expires.get(key)
+        if expires is None:
+            return -1
+        return int((expires - time.monotonic()) * 1000)
+
+    def cmd_hset(self, key, *pairs):
+        self._alive(key)
+        fields = self.hashes.setdefault(key, {})
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hincrby(self, key, field, amount):
+        self._alive(key)
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + int(amount))
+        return int(fields[field])
+
+    def cmd_hgetall(self, key):
+        if not self._alive(key):
+            return []
+        return [item for pair in self.hashes.get(key, {}).items() for item in pair]
+
+    # Only the GT option (update a member only if the new score is higher)
+    def cmd_zadd(self, key, *pairs):
+        greater = pairs[0].upper() == "GT"
+        if greater:
+            pairs = pairs[1:]
+        self._alive(key)
+        entries, scores = self.zsets.setdefault(key, ([], {}))
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            score = float(score)
+            old_score = scores.get(member)
+            if old_score is not None:
+                if greater and score <= old_score:
+                    continue
+                del entries[bisect.bisect_left(entries, (old_score, member))]
+            else:
+                added += 1
+            scores[member] = score
+            bisect.insort(entries, (score, member))
+        return added
+
+    def cmd_zscore(self, key, member):
+        if not self._alive(key) or key not in self.zsets:
+            return None
+        score = self.zsets[key][1].get(member)
+        return None if score is None else f"{score:.17g}"
+
+    def cmd_zrevrange(self, key, start, stop, *options):
+        if not self._alive(key) or key not in self.zsets:
+            return []
+        entries = self.zsets[key][0][::-1]
+        start, stop = int(start), int(stop)
+        stop = len(entries) if stop == -1 else stop + 1
+        reply = []
+        for score, member in entries[start:stop]:
+            reply.append(member)
+            if options and options[0].upper() == "WITHSCORES":
+                reply.append(f"{score:.17g}")
+        return reply
+
+
+def encode(reply):
+    if isinstance(reply, StandinError):
+        return b"-%s\r\n" % str(reply).encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+    if reply in ("OK", "PONG"):
+        return b"+%s\r\n" % reply.encode()
+    data = str(reply).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    count = int(line[1:-2])
+    args = []
+    for _ in range(count):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2].decode())
+    return args
+
+
+async def serve(host, port):
+    standin = Standin()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                try:
+                    reply = standin.run(args[0], args[1:])
+                except StandinError as e:
+                    reply = e
+                except (TypeError, ValueError, IndexError):
+                    reply = StandinError(f"ERR wrong arguments for '{args[0]}'")
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Redis stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory Redis stand-in for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
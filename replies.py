@@ -0,0 +1,90 @@
+# Helpers to spend fewer Discord API calls per command: one message instead of several, one
+# interaction response instead of an edit plus a response, and deferring slash commands that are
+# about to miss Discord's 3 second deadline
+import asyncio, os, time
+from collections import OrderedDict, deque
+import discord
+import metrics
+
+# Defer a slash command that hasn't answered after this many seconds (Discord gives up after 3)
+DEFER_BUDGET = float(os.getenv("DEFER_BUDGET", 2.0))
+
+
+# How many messages we've sent per channel recently. Discord lets a bot send about 5 messages per
+# 5 seconds in one channel, whatever is left of that is the channel's headroom
+class ChannelHeadroom:
+    def __init__(self, limit=5, window=5.0, max_channels=10000):
+        self.limit = limit
+        self.window = window
+        self.max_channels = max_channels
+        # channel id -> deque of send times, least recently used channel first
+        self.sends = OrderedDict()
+
+    def _recent(self, channel_id, now):
+        sends = self.sends.get(channel_id)
+        if sends is None:
+            return None
+        while sends and now - sends[0] >= self.window:
+            sends.popleft()
+        return sends
+
+    def record(self, channel_id):
+        now = time.monotonic()
+        sends = self._recent(channel_id, now)
+        if sends is None:
+            sends = deque(maxlen=self.limit)
+            self.sends[channel_id] = sends
+            if len(self.sends) > self.max_channels:
+                self.sends.popitem(last=False)
+        else:
+            self.sends.move_to_end(channel_id)
+        sends.append(now)
+
+    def headroom(self, channel_id):
+        sends = self._recent(channel_id, time.monotonic())
+        return self.limit - len(sends) if sends is not None else self.limit
+
+    # Channels that can't take another message right now
+    def exhausted(self):
+        now = time.monotonic()
+        return sum(1 for channel_id in list(self.sends) if len(self._recent(channel_id, now)) >= self.limit)
+
+
+# Send text and an image as one message (the image goes in an embed) instead of two
+async def reply(ctx, content=None, *, image=None, embed=None, **kwargs):
+    if image is not None:
+        embed = embed or discord.Embed()
+        embed.set_image(url=image)
+    return await ctx.send(content, embed=embed, **kwargs)
+
+
+# Edit the message a component belongs to and answer the interaction in the same call.
+# Falls back to a plain edit if the interaction was already answered
+async def edit_and_respond(interaction, **fields):
+    with metrics.phase("discord"):
+        if not interaction.response.is_done():
+            await interaction.response.edit_message(**fields)
+        else:
+            await interaction.message.edit(**fields)
+
+
+# A view that never gets tracked per message: it's sent as components only, clicks go to a persistent view
+# registered with bot.add_view (see cogs/trivia.py and cogs/hangman.py)
+def detached(view):
+    view.stop()
+    return view
+
+
+# Defer a slash command if it hasn't answered within the budget. Takes the context's reply lock,
+# so it can't race a send that is already on its way
+async def _defer_later(ctx, budget):
+    await asyncio.sleep(budget)
+    async with ctx.reply_lock:
+        if not ctx.interaction.response.is_done():
+            await ctx.defer()
+            metrics.auto_defers.inc(ctx.command.qualified_name)
+
+def schedule_defer(ctx, budget=DEFER_BUDGET):
+    if ctx.interaction is None:
+        return None
+    return asyncio.create_task(_defer_later(ctx, budget))
@@ -0,0 +1,255 @@
+# Economy simulator: plays the economy rules (economy_rules.py, the same ones the commands use) for a lot of
+# made-up users over a lot of days, offline and without Discord, to see what a balance change does before it ships.
+# Every simulated day each user claims their daily, works, commits crimes, gambles part of their balance and
+# robs random users, at the rates given below. Prints the money supply, inflation and Gini coefficient as it goes.
+# Same seed, same numbers. With numpy installed whole days are done in vectorized batches (millions of users
+# are fine), without it the same model runs user by user in plain Python, which is only good for a few thousand.
+# The two use different random streams, so their numbers differ for the same seed.
+#
+#   python simulate.py --users 1000000 --days 365 --seed 1 --output simulation.json
+import argparse, json, math, random, time
+import economy_rules as rules
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Most times a command can run in a day with its cooldown (see cogs/economy.py)
+MAX_PER_DAY = {
+    "work": 86400 // 900,
+    "crime": 86400 // 1200,
+    "rob": 86400 // 18000,
+}
+
+
+# Gambling and robbing depend on the balance, so they're played in rounds where each user acts at most once:
+# (number of rounds, chance a user acts in a round) that averages out to rate uses a day
+def rounds(rate, cap=None):
+    count = math.ceil(rate) if cap is None else min(math.ceil(rate), cap)
+    return count, min(rate / count, 1.0) if count else 0.0
+
+
+# ---- numpy: one vectorized batch per action per day ----
+
+class VectorEconomy:
+    def __init__(self, args):
+        self.rng = np.random.default_rng(args.seed)
+        self.args = args
+        self.balances = np.full(args.users, args.start_balance, dtype=np.int64)
+
+    # Poisson number of uses per user, capped by the cooldown
+    def uses(self, rate, cap):
+        return np.minimum(self.rng.poisson(rate, self.balances.size), cap)
+
+    # Base pay for each of the uses, summed per user
+    def pay(self, counts):
+        users = np.repeat(np.arange(counts.size), counts)
+        amounts = self.rng.integers(rules.PAY_MIN, rules.PAY_MAX, size=users.size, endpoint=True)
+        return np.bincount(users, weights=amounts, minlength=counts.size).astype(np.int64)
+
+    def day(self):
+        args = self.args
+        n = self.balances.size
+
+        # Daily, work and crime don't depend on the balance, so all of them can happen at once
+        claimed = self.rng.random(n) < args.daily_rate
+        self.balances += self.pay(claimed.astype(np.int64))
+        self.balances += self.pay(self.uses(args.work_rate, MAX_PER_DAY["work"]))
+
+        crimes = self.uses(args.crime_rate, MAX_PER_DAY["crime"])
+        users = np.repeat(np.arange(n), crimes)
+        succeeded = self.rng.integers(1, 100, size=users.size, endpoint=True) <= rules.CRIME_SUCCESS_PERCENT
+        amounts = self.rng.integers(rules.PAY_MIN, rules.PAY_MAX, size=users.size, endpoint=True)
+        amounts = np.where(succeeded, amounts * rules.CRIME_REWARD_MULTIPLIER, -amounts * rules.CRIME_FINE_MULTIPLIER)
+        self.balances += np.bincount(users, weights=amounts, minlength=n).astype(np.int64)
+
+        count, chance = rounds(args.gamble_rate)
+        for _ in range(count):
+            bettors = self.rng.random(n) < chance
+            bets = (self.balances * args.bet_share).astype(np.int64)
+            # Same checks as rules.gamble_error
+            allowed = bettors & (self.balances != 0) & (bets <= self.balances) & (bets >= rules.GAMBLE_MIN_BET)
+            # Everyone bets on 1
+            won = self.rng.integers(1, 2, size=n, endpoint=True) == 1
+            self.balances += np.where(allowed, np.where(won, bets * rules.GAMBLE_WIN_MULTIPLIER, -bets), 0)
+
+        count, chance = rounds(args.rob_rate, MAX_PER_DAY["rob"])
+        for _ in range(count):
+            robbers = np.flatnonzero(self.rng.random(n) < chance)
+            targets = self.rng.integers(0, n, size=robbers.size)
+            # Everyone's robbed based on their balance at the start of the round
+            robber_money = self.balances[robbers]
+            target_money = self.balances[targets]
+            allowed = (target_money >= rules.ROB_MIN_TARGET) & (robbers != targets)
+            robbers, targets = robbers[allowed], targets[allowed]
+            robber_money, target_money = robber_money[allowed], target_money[allowed]
+
+            succeeded = self.rng.integers(1, 100, size=robbers.size, endpoint=True) < rules.ROB_SUCCESS_BELOW
+            share = np.zeros(robbers.size)
+            floor = -math.inf
+            for limit, low, high in rules.ROB_TIERS:
+                ceiling = math.inf if limit is None else limit
+                tier = (target_money > floor) & (target_money <= ceiling)
+                share[tier] = self.rng.uniform(low, high, size=int(tier.sum()))
+                floor = ceiling
+            stolen = np.where(succeeded, (target_money * share).astype(np.int64), 0)
+            fines = np.where(succeeded, 0, (robber_money * rules.ROB_FINE_SHARE).astype(np.int64))
+            np.add.at(self.balances, robbers, stolen - fines)
+            np.add.at(self.balances, targets, -stolen)
+
+    def supply(self):
+        return int(self.balances.sum())
+
+    def stats(self):
+        balances = self.balances
+        wealth = np.sort(np.clip(balances, 0, None)).astype(np.float64)
+        return {
+            "median": float(np.median(balances)),
+            "in_debt": float((balances < 0).mean()),
+            "gini": gini(wealth.size, float(wealth.sum()), float(np.dot(np.arange(1, wealth.size + 1), wealth))),
+            "largest": int(balances.max()),
+        }
+
+
+# ---- Plain Python: the same day, user by user, through the rule functions themselves ----
+
+class ScalarEconomy:
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.args = args
+        self.balances = [args.start_balance] * args.users
+
+    # Poisson number of uses, capped by the cooldown (Knuth's method, the rates are small)
+    def uses(self, rate, cap):
+        limit, count, product = math.exp(-rate), 0, self.rng.random()
+        while product > limit and count < cap:
+            count += 1
+            product *= self.rng.random()
+        return count
+
+    def day(self):
+        args, rng, balances = self.args, self.rng, self.balances
+        n = len(balances)
+
+        for user in range(n):
+            if rng.random() < args.daily_rate:
+                balances[user] += rules.daily_allowance(rng)
+            for _ in range(self.uses(args.work_rate, MAX_PER_DAY["work"])):
+                balances[user] += rules.work_pay(rng)
+            for _ in range(self.uses(args.crime_rate, MAX_PER_DAY["crime"])):
+                succeeded, amount = rules.crime(rng)
+                balances[user] += amount if succeeded else -amount
+
+        count, chance = rounds(args.gamble_rate)
+        for _ in range(count):
+            for user in range(n):
+                if rng.random() >= chance:
+                    continue
+                bet = int(balances[user] * args.bet_share)
+                if rules.gamble_error(balances[user], bet) is None:
+                    balances[user] += rules.gamble(rng, 1, bet)[1]
+
+        count, chance = rounds(args.rob_rate, MAX_PER_DAY["rob"])
+        for _ in range(count):
+            for user in range(n):
+                if rng.random() >= chance:
+                    continue
+                target = rng.randrange(n)
+                if rules.rob_error(user, target, balances[target]) is not None:
+                    continue
+                succeeded, amount = rules.rob(rng, balances[user], balances[target])
+                if succeeded:
+                    balances[user] += amount
+                    balances[target] -= amount
+                else:
+                    balances[user] -= amount
+
+    def supply(self):
+        return sum(self.balances)
+
+    def stats(self):
+        balances = sorted(self.balances)
+        wealth = [max(balance, 0) for balance in balances]
+        return {
+            "median": float(balances[len(balances) // 2]),
+            "in_debt": sum(balance < 0 for balance in balances) / len(balances),
+            "gini": gini(len(wealth), float(sum(wealth)), float(sum(rank * value for rank, value in enumerate(wealth, 1)))),
+            "largest": balances[-1],
+        }
+
+
+# Gini coefficient of n sorted balances with debts counted as 0, from their total and sum(rank * balance)
+# with ranks from 1. 0 is everyone equally rich, 1 is one user owning everything
+def gini(n, total, weighted):
+    if total == 0:
+        return 0.0
+    return 2 * weighted / (n * total) - (n + 1) / n
+
+
+def main(args):
+    if np is None or args.no_numpy:
+        economy = ScalarEconomy(args)
+        engine = "python"
+    else:
+        economy = VectorEconomy(args)
+        engine = "numpy"
+    print(f"Simulating {args.users} users for {args.days} days (seed {args.seed}, {engine})")
+
+    history = []
+    previous = economy.supply()
+    started = time.perf_counter()
+    for day in range(1, args.days + 1):
+        economy.day()
+        supply = economy.supply()
+        inflation = (supply - previous) / previous if previous > 0 else None
+        previous = supply
+
+        if day % args.report_every == 0 or day == args.days:
+            row = {"day": day, "money_supply": supply, "inflation": inflation, **economy.stats()}
+            history.append(row)
+            inflation_text = "n/a" if inflation is None else f"{inflation * 100:+.2f}%"
+            print(f"day {day:>5}  supply {supply:>18,}  inflation {inflation_text:>9}  gini {row['gini']:.3f}"
+                  f"  median {row['median']:>12,.0f}  in debt {row['in_debt'] * 100:5.1f}%")
+        # int64 can't hold a runaway economy, better to stop than print wrapped-around numbers
+        if engine == "numpy" and int(np.abs(economy.balances).max()) > 2 ** 62:
+            print(f"Balances outgrew 64-bit integers on day {day}, the economy is running away. Stopping here")
+            break
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+    if args.output:
+        report = {
+            "engine": engine,
+            "users": args.users,
+            "days": args.days,
+            "seed": args.seed,
+            "rates": {
+                "daily": args.daily_rate,
+                "work": args.work_rate,
+                "crime": args.crime_rate,
+                "gamble": args.gamble_rate,
+                "rob": args.rob_rate,
+            },
+            "bet_share": args.bet_share,
+            "history": history,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate the economy rules offline to check balance changes")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-balance", type=int, default=0)
+    parser.add_argument("--daily-rate", type=float, default=0.6, help="Chance a user claims their daily each day")
+    parser.add_argument("--work-rate", type=float, default=4.0, help="Average /work uses per user per day")
+    parser.add_argument("--crime-rate", type=float, default=1.0, help="Average /crime uses per user per day")
+    parser.add_argument("--gamble-rate", type=float, default=1.0, help="Average bets per user per day")
+    parser.add_argument("--bet-share", type=float, default=0.1, help="Share of their balance a user bets")
+    parser.add_argument("--rob-rate", type=float, default=0.5, help="Average robbery attempts per user per day")
+    parser.add_argument("--report-every", type=int, default=10, help="Print a line every this many days")
+    parser.add_argument("--no-numpy", action="store_true", help="Use the plain Python engine even if numpy is installed")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    main(parser.parse_args())
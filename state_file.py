@@ -0,0 +1,54 @@
+# Small JSON state files next to data.json (cooldowns, trivia games, trivia stats). They're written to a temp
+# file and renamed over the old one so a crash never leaves half a file, from a background loop every few seconds.
+# The owner copies what it wants saved on the event loop, the writing happens on a worker thread
+import asyncio, json, os, tempfile
+
+
+# State that belongs to one bot process (what its shards are doing) gets a file per worker when launcher.py
+# runs several: trivia_games.json becomes trivia_games.shards-0-3.json for the worker running shards 0 to 3
+def worker_path(path):
+    shard_ids = os.getenv("SHARD_IDS")
+    if not shard_ids:
+        return path
+    ids = shard_ids.split(",")
+    root, extension = os.path.splitext(path)
+    return f"{root}.shards-{ids[0]}-{ids[-1]}{extension}"
+
+
+# The parsed file, or None if there isn't one yet
+def read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_json(path, raw):
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = "." + os.path.splitext(os.path.basename(path))[0] + "-"
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(raw, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# write_json on a worker thread, so serialising and writing a big file never blocks the loop. raw has to be
+# a copy the loop won't change meanwhile. Owners hold a lock around it, or an older copy could land last
+async def save_json(path, raw):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, write_json, path, raw)
+
+
+# Await save() every interval seconds until cancelled. A failed save gets reported and tried again next time.
+# Cancelling doesn't interrupt a save that already started, close() waits for it on the owner's lock
+async def flush_every(interval, save, what):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.shield(save())
+        except Exception as e:
+            print(f"Couldn't save {what}: {e!r}")
@@ -0,0 +1,565 @@
+# Storage backends for the economy store. They all do the same two things load_data/save_data used to:
+# load every user record, and save the records that changed
+import heapq, json, os, socket, sqlite3, tempfile, time
+
+
+# data.json as a snapshot, plus data.json.log: an append-only ledger with one JSON line per economy event
+# (work, crime, gamble, daily, rob, rps...). A flush only appends the new events and fsyncs once, so its cost
+# depends on what changed, not on how many users there are. Every LEDGER_SNAPSHOT_BYTES of log the whole
+# snapshot gets rewritten and the log starts over; old logs are kept as data.json.log.<time> for auditing
+# (see audit.py). Log lines hold each user's full record after the event, so replaying them is idempotent
+class JsonBackend:
+    # Querying means scanning everything, so the store sorts in memory instead
+    supports_queries = False
+    # Only one process can use it, see SharedSqliteBackend and RedisBackend for the shared ones
+    shared = False
+    # The store sends it the events of every transaction
+    logs_events = True
+
+    def __init__(self, path, snapshot_bytes=None, keep_segments=None):
+        self.path = path
+        self.log_path = path + ".log"
+        self.snapshot_bytes = snapshot_bytes or int(os.getenv("LEDGER_SNAPSHOT_BYTES", 8 * 2 ** 20))
+        self.keep_segments = keep_segments or int(os.getenv("LEDGER_KEEP_SEGMENTS", 20))
+        self._log = None
+
+    # The last snapshot, with every logged event since then replayed on top
+    def load_all(self):
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        # Logs rotated after the snapshot was taken: the bot died before it wrote the new snapshot. A snapshot
+        # from before COVERS_KEY existed was always written before its log got rotated, so none are newer
+        covers = data.pop(COVERS_KEY, None)
+        paths = [path for path in log_segments(self.path) if covers is not None and segment_time(path) > covers]
+        self.trim_log()
+        replayed = 0
+        for path in paths + [self.log_path]:
+            for event in read_log(path):
+                for user_id, money, wins, losses, _ in event["users"]:
+                    data[str(user_id)] = {"money": money, "wins": wins, "losses": losses}
+                replayed += 1
+        if replayed:
+            print(f"Replayed {replayed} economy events from {self.log_path}")
+        return data
+
+    # A crash in the middle of an append can leave half a line at the end of the log.
+    # Cut it off, or the next append would be glued onto it
+    def trim_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b"\n"):
+                return
+            keep = size - len(tail) + tail.rfind(b"\n") + 1
+            print(f"Dropping a half-written event at the end of {self.log_path}")
+            f.truncate(keep)
+
+    def save(self, changed, events=()):
+        if events:
+            if self._log is None:
+                self._log = open(self.log_path, "a")
+            self._log.write("".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events))
+            self._log.flush()
+            # One fsync for the whole batch
+            os.fsync(self._log.fileno())
+
+    # Whether the log grew enough that the store should hand over a snapshot for compact()
+    def snapshot_due(self):
+        return self._log is not None and self._log.tell() >= self.snapshot_bytes
+
+    # Write a fresh snapshot (user id -> plain dict) and start a new log. The log gets rotated first and the
+    # snapshot says which rotated log it covers, so a crash between the two steps loses nothing: load_all finds
+    # the older snapshot plus the rotated log it doesn't cover and replays that. The other way round, the old
+    # log would be replayed over a newer snapshot and roll back every change made in between, since log lines
+    # hold absolute records. Written to a temp file and renamed over data.json so a crash never leaves half a file
+    def compact(self, snapshot):
+        covers = self._rotate_log()
+        self._write_snapshot(dict(snapshot, **{COVERS_KEY: covers}))
+        self._prune_segments()
+
+    # Close the log and rename it to data.json.log.<time>, returning that time (or the newest rotated log's
+    # if nothing was logged since the last rotation)
+    def _rotate_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if os.path.exists(self.log_path):
+            rotated = time.time_ns()
+            os.replace(self.log_path, f"{self.log_path}.{rotated}")
+            return rotated
+        segments = log_segments(self.path)
+        return segment_time(segments[-1]) if segments else 0
+
+    def _write_snapshot(self, snapshot):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".data-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    # Only keep the newest logs. They're all covered by the snapshot by now, the rest is just for audit.py
+    def _prune_segments(self):
+        segments = log_segments(self.path)
+        for old_segment in segments[:-self.keep_segments]:
+            os.unlink(old_segment)
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+# Key in data.json for the time of the last rotated log the snapshot covers. User ids are all digits
+COVERS_KEY = "covers_log"
+
+
+# Rotated ledger files of a data.json, oldest first
+def log_segments(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.basename(path) + ".log."
+    names = [name for name in os.listdir(directory) if name.startswith(prefix) and name[len(prefix):].isdigit()]
+    names.sort(key=lambda name: int(name[len(prefix):]))
+    return [os.path.join(directory, name) for name in names]
+
+
+# When a rotated log was rotated, from its data.json.log.<time> name
+def segment_time(path):
+    return int(path.rsplit(".", 1)[1])
+
+
+# Events in a ledger file. A half-written last line (the bot crashed mid-append) is skipped
+def read_log(path):
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+# SQLite in WAL mode, only the changed rows get written and the leaderboard uses an index on money.
+# Only ever called from the store's single executor thread
+class SqliteBackend:
+    supports_queries = True
+    shared = False
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        # Old data.json to import the first time the database is created
+        self.migrate_from = migrate_from
+        self.conn = None
+
+    def open(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                money INTEGER NOT NULL DEFAULT 0,
+                wins INTEGER NOT NULL DEFAULT 0,
+                losses INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS users_money ON users (money DESC)")
+
+    def load_all(self):
+        self.open()
+        self.migrate()
+        rows = self.conn.execute("SELECT user_id, money, wins, losses FROM users")
+        return {user_id: {"money": money, "wins": wins, "losses": losses} for user_id, money, wins, losses in rows}
+
+    # One-shot import of the old data.json, it gets renamed afterwards so it never runs twice
+    def migrate(self):
+        if not self.migrate_from or not os.path.exists(self.migrate_from):
+            return
+        if self.conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return
+        with open(self.migrate_from, "r") as f:
+            old_data = json.load(f)
+        old_data.pop(COVERS_KEY, None)
+        self._write_rows(old_data)
+        os.replace(self.migrate_from, self.migrate_from + ".migrated")
+        print(f"Migrated {len(old_data)} users from {self.migrate_from} to {self.path}")
+
+    # Upsert all the changed rows in one transaction
+    def _write_rows(self, records):
+        rows = [
+            (int(user_id), record.get("money", 0), record.get("wins", 0), record.get("losses", 0))
+            for user_id, record in records.items()
+        ]
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany("""
+                INSERT INTO users (user_id, money, wins, losses) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET money = excluded.money, wins = excluded.wins, losses = excluded.losses
+            """, rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # SQLite has its own write-ahead log, so the events aren't kept
+    def save(self, changed, events=()):
+        self.open()
+        self._write_rows(changed)
+
+    # Richest users first from the money index. If member_ids is given, only those users count: they're looked
+    # up by primary key a chunk at a time, so a small guild costs a few lookups instead of a walk over everyone
+    def top_balances(self, limit, member_ids=None):
+        self.open()
+        if member_ids is None:
+            return self.conn.execute("SELECT user_id, money FROM users ORDER BY money DESC LIMIT ?", (limit,)).fetchall()
+        member_ids = list(member_ids)
+        top = []
+        for start in range(0, len(member_ids), 500):
+            chunk = member_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            top += self.conn.execute(
+                f"SELECT user_id, money FROM users WHERE user_id IN ({placeholders}) ORDER BY money DESC LIMIT ?",
+                [*chunk, limit]
+            )
+        return heapq.nlargest(limit, top, key=lambda row: row[1])
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# SQLite shared by several bot processes on one machine. Nothing is cached: the store reads the users
+# a transaction needs and writes them straight back, while holding a lock other processes respect.
+# The locks are byte-range locks on a <database>.locks file (one byte per lock stripe), so the OS
+# releases them if a process dies
+class SharedSqliteBackend(SqliteBackend):
+    shared = True
+
+    # Expired cooldowns get deleted every this many cooldown checks
+    COOLDOWN_SWEEP_EVERY = 1000
+
+    def __init__(self, path, migrate_from=None):
+        super().__init__(path, migrate_from)
+        self._lock_fd = None
+        self._cooldown_hits = 0
+
+    def open(self):
+        if self.conn is not None:
+            return
+        super().open()
+        # Wait for other processes' writes instead of failing with "database is locked"
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cooldowns (
+                key TEXT PRIMARY KEY,
+                expires REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS trivia_stats (
+                user_id INTEGER NOT NULL,
+                difficulty TEXT NOT NULL,
+                correct INTEGER NOT NULL,
+                attempted INTEGER NOT NULL,
+                streak INTEGER NOT NULL,
+                best_streak INTEGER NOT NULL,
+                PRIMARY KEY (user_id, difficulty)
+            )
+        """)
+        self._lock_fd = os.open(self.path + ".locks", os.O_RDWR | os.O_CREAT, 0o644)
+
+    # Byte 0 guards the one-time setup, stripe n uses byte n + 1
+    def _lockf(self, mode, offset):
+        import fcntl
+        fcntl.lockf(self._lock_fd, mode, 1, offset)
+
+    # Only one process gets to import data.json
+    def prepare(self):
+        import fcntl
+        self.open()
+        self._lockf(fcntl.LOCK_EX, 0)
+        try:
+            self.migrate()
+        finally:
+            self._lockf(fcntl.LOCK_UN, 0)
+
+    # Never blocks, the store retries from the event loop so a busy stripe can't tie up its thread
+    def try_lock(self, stripe):
+        import fcntl
+        try:
+            self._lockf(fcntl.LOCK_EX | fcntl.LOCK_NB, stripe + 1)
+        except (BlockingIOError, PermissionError):
+            return False
+        return True
+
+    def unlock(self, stripe):
+        import fcntl
+        self._lockf(fcntl.LOCK_UN, stripe + 1)
+
+    def load_users(self, user_ids):
+        self.open()
+        placeholders = ",".join("?" * len(user_ids))
+        rows = self.conn.execute(
+            f"SELECT user_id, money, wins, losses FROM users WHERE user_id IN ({placeholders})",
+            [int(user_id) for user_id in user_ids]
+        )
+        return {user_id: {"money": money, "wins": wins, "losses": losses} for user_id, money, wins, losses in rows}
+
+    def has_user(self, user_id):
+        self.open()
+        return self.conn.execute("SELECT 1 FROM users WHERE user_id = ?", (int(user_id),)).fetchone() is not None
+
+    # Seconds left on a cooldown without starting it, 0 if it isn't running
+    def cooldown_left(self, key):
+        self.open()
+        row = self.conn.execute("SELECT expires FROM cooldowns WHERE key = ?", (key,)).fetchone()
+        return max(row[0] - time.time(), 0.0) if row is not None else 0.0
+
+    # Start a cooldown unless it's already running. Returns the seconds left, or 0 if it just started.
+    # BEGIN IMMEDIATE takes SQLite's write lock, so two processes can't both start the same cooldown
+    def cooldown_hit(self, key, per):
+        self.open()
+        now = time.time()
+        self._cooldown_hits += 1
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._cooldown_hits % self.COOLDOWN_SWEEP_EVERY == 0:
+                self.conn.execute("DELETE FROM cooldowns WHERE expires <= ?", (now,))
+            row = self.conn.execute("SELECT expires FROM cooldowns WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                self.conn.execute("COMMIT")
+                return row[0] - now
+            self.conn.execute("INSERT OR REPLACE INTO cooldowns (key, expires) VALUES (?, ?)", (key, now + per))
+            self.conn.execute("COMMIT")
+            return 0.0
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # user id -> {difficulty: [correct, attempted, streak, best streak]}, in chunks to stay under SQLite's variable limit
+    def trivia_scores(self, user_ids):
+        self.open()
+        scores = {}
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT user_id, difficulty, correct, attempted, streak, best_streak FROM trivia_stats "
+                f"WHERE user_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for user_id, difficulty, *values in rows:
+                scores.setdefault(user_id, {})[difficulty] = values
+        return scores
+
+    # Add a batch of answers, as (user id, difficulty, correct, attempted, lead, reset, tail, best) from
+    # trivia_stats.TriviaDelta, in one upsert. The counts get added to whatever another process stored meanwhile.
+    # SQLite evaluates every SET expression against the old row, so streak + :lead is the streak before this batch
+    def add_trivia_scores(self, deltas):
+        self.open()
+        rows = [
+            {
+                "user_id": user_id, "difficulty": difficulty, "correct": correct, "attempted": attempted,
+                "lead": lead, "reset": reset, "tail": tail, "best": best,
+                "streak": tail if reset else lead, "best_streak": max(lead, best),
+            }
+            for user_id, difficulty, correct, attempted, lead, reset, tail, best in deltas
+        ]
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany("""
+                INSERT INTO trivia_stats (user_id, difficulty, correct, attempted, streak, best_streak)
+                VALUES (:user_id, :difficulty, :correct, :attempted, :streak, :best_streak)
+                ON CONFLICT (user_id, difficulty) DO UPDATE SET
+                    correct = correct + :correct,
+                    attempted = attempted + :attempted,
+                    best_streak = MAX(best_streak, streak + :lead, :best),
+                    streak = CASE WHEN :reset THEN :tail ELSE streak + :lead END
+            """, rows)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        super().close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+# Redis (or anything speaking its protocol, see redis_standin.py) shared by bot processes on any number of hosts.
+# Each user is a hash, balances are also kept in a sorted set for the leaderboard.
+# Locks are keys with an expiry, so a crashed process can only hold one for LOCK_TTL
+class RedisBackend:
+    supports_queries = True
+    shared = True
+    LOCK_TTL = 10000
+    # Deletes a lock only if it still holds our token, in one step on the server. A GET then DEL from here could
+    # delete a lock that expired in between and got taken by another process
+    UNLOCK_SCRIPT = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+
+    def __init__(self, url, prefix="economy"):
+        from redis_client import RedisClient
+        self.client = RedisClient(url)
+        self.prefix = prefix
+        # Marks our own locks so we never delete one that expired and got taken by someone else
+        self.token = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    def _lock_key(self, stripe):
+        return f"{self.prefix}:lock:{stripe}"
+
+    def prepare(self):
+        self.client.connect()
+
+    def load_all(self):
+        raise NotImplementedError("Shared backends are never loaded whole")
+
+    def try_lock(self, stripe):
+        return self.client.execute("SET", self._lock_key(stripe), self.token, "NX", "PX", self.LOCK_TTL) is not None
+
+    def unlock(self, stripe):
+        self.client.execute("EVAL", self.UNLOCK_SCRIPT, 1, self._lock_key(stripe), self.token)
+
+    def load_users(self, user_ids):
+        replies = self.client.pipeline([("HGETALL", self._user_key(user_id)) for user_id in user_ids], retry=True)
+        users = {}
+        for user_id, fields in zip(user_ids, replies):
+            if fields:
+                record = dict(zip(fields[::2], fields[1::2]))
+                users[int(user_id)] = {name: int(value) for name, value in record.items()}
+        return users
+
+    def has_user(self, user_id):
+        return self.client.execute("EXISTS", self._user_key(user_id), retry=True) == 1
+
+    def save(self, changed, events=()):
+        commands = []
+        for user_id, record in changed.items():
+            commands.append(("HSET", self._user_key(user_id), *(item for pair in record.items() for item in pair)))
+            commands.append(("ZADD", f"{self.prefix}:money", record["money"], user_id))
+        if commands:
+            # Whole records, so sending them twice is fine
+            self.client.pipeline(commands, retry=True)
+
+    # The top of the sorted set, or with member_ids the score of each member (pipelined, 1000 per round trip)
+    # so a small guild never pages through everyone's balance
+    def top_balances(self, limit, member_ids=None):
+        key = f"{self.prefix}:money"
+        if member_ids is None:
+            reply = self.client.execute("ZREVRANGE", key, 0, limit - 1, "WITHSCORES", retry=True)
+            return [(int(user_id), int(float(money))) for user_id, money in zip(reply[::2], reply[1::2])]
+        member_ids = list(member_ids)
+        top = []
+        for start in range(0, len(member_ids), 1000):
+            chunk = member_ids[start:start + 1000]
+            scores = self.client.pipeline([("ZSCORE", key, user_id) for user_id in chunk], retry=True)
+            top += [(int(user_id), int(float(money))) for user_id, money in zip(chunk, scores) if money is not None]
+        return heapq.nlargest(limit, top, key=lambda row: row[1])
+
+    # One hash per user with "<difficulty>:correct", ":attempted" and ":streak" counters, and the best streaks
+    # in a sorted set per user (difficulty -> best), so batches from several processes add up with HINCRBY and ZADD GT
+    def _trivia_keys(self, user_id):
+        return f"{self.prefix}:trivia:{user_id}", f"{self.prefix}:trivia_best:{user_id}"
+
+    # user id -> {difficulty: [correct, attempted, streak, best streak]}
+    def trivia_scores(self, user_ids):
+        commands = []
+        for user_id in user_ids:
+            counters, best = self._trivia_keys(user_id)
+            commands += [("HGETALL", counters), ("ZREVRANGE", best, 0, -1, "WITHSCORES")]
+        replies = self.client.pipeline(commands, retry=True)
+        scores = {}
+        for user_id, fields, best in zip(user_ids, replies[::2], replies[1::2]):
+            difficulties = {}
+            for field, value in zip(fields[::2], fields[1::2]):
+                difficulty, counter = field.rsplit(":", 1)
+                values = difficulties.setdefault(difficulty, [0, 0, 0, 0])
+                values[["correct", "attempted", "streak"].index(counter)] = int(value)
+            for difficulty, score in zip(best[::2], best[1::2]):
+                difficulties.setdefault(difficulty, [0, 0, 0, 0])[3] = int(float(score))
+            if difficulties:
+                scores[user_id] = difficulties
+        return scores
+
+    # Add a batch of answers (see SharedSqliteBackend.add_trivia_scores) in two pipelines: the counters first,
+    # HINCRBY of the streak returns what it is with this batch's lead on top, which the best streak is then raised to
+    def add_trivia_scores(self, deltas):
+        commands = []
+        for user_id, difficulty, correct, attempted, lead, reset, tail, best in deltas:
+            counters, _ = self._trivia_keys(user_id)
+            commands += [
+                ("HINCRBY", counters, f"{difficulty}:correct", correct),
+                ("HINCRBY", counters, f"{difficulty}:attempted", attempted),
+                ("HINCRBY", counters, f"{difficulty}:streak", lead),
+            ]
+            if reset:
+                commands.append(("HSET", counters, f"{difficulty}:streak", tail))
+        replies = iter(self.client.pipeline(commands))
+
+        best_commands = []
+        for user_id, difficulty, correct, attempted, lead, reset, tail, best in deltas:
+            _, best_key = self._trivia_keys(user_id)
+            next(replies), next(replies)
+            streak = next(replies)
+            if reset:
+                next(replies)
+            # GT only ever raises it (Redis 6.2+)
+            best_commands.append(("ZADD", best_key, "GT", max(streak, best), difficulty))
+        self.client.pipeline(best_commands)
+
+    # PTTL is -2 for a key that doesn't exist
+    def cooldown_left(self, key):
+        return max(self.client.execute("PTTL", f"{self.prefix}:cooldown:{key}", retry=True), 0) / 1000
+
+    # SET NX starts the cooldown only if it isn't running, otherwise its TTL is the time left
+    def cooldown_hit(self, key, per):
+        key = f"{self.prefix}:cooldown:{key}"
+        if self.client.execute("SET", key, 1, "NX", "PX", int(per * 1000)) is not None:
+            return 0.0
+        return max(self.client.execute("PTTL", key, retry=True), 0) / 1000
+
+    def close(self):
+        self.client.close()
+
+
+# Pick the backend from the .env file (STORAGE_BACKEND=json, sqlite, shared-sqlite or redis).
+# Running more than one bot process (see launcher.py) needs one of the shared ones.
+# With a partition (a guild id, see guild_economy.py) the data goes in its own file or key prefix
+def make_backend(json_path, partition=None):
+    kind = os.getenv("STORAGE_BACKEND", "json").lower()
+    sqlite_path = os.getenv("SQLITE_PATH", "data.db")
+    redis_prefix = "economy"
+    if partition is not None:
+        directory = os.getenv("GUILD_ECONOMY_DIR", "guilds")
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{partition}.json")
+        sqlite_path = os.path.join(directory, f"{partition}.db")
+        redis_prefix = f"economy:guild:{partition}"
+    if kind == "sqlite":
+        return SqliteBackend(sqlite_path, migrate_from=json_path)
+    if kind == "shared-sqlite":
+        return SharedSqliteBackend(sqlite_path, migrate_from=json_path)
+    if kind == "redis":
+        return RedisBackend(os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"), prefix=redis_prefix)
+    if kind == "json":
+        return JsonBackend(json_path)
+    raise ValueError(f"Unknown STORAGE_BACKEND {kind!r}")
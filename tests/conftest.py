@@ -0,0 +1,26 @@
+# The tests import the bot's modules straight from the repo root
+import os, socket, subprocess, sys, time
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# A Redis stand-in (redis_standin.py) on a free port for the test
+@pytest.fixture
+def redis_url():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    standin = subprocess.Popen([sys.executable, "redis_standin.py", "--port", str(port)], cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        standin.terminate()
+        standin.wait()
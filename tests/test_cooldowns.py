@@ -0,0 +1,58 @@
+# Persistent cooldowns: checking a command (what the help command does) must never start its cooldown
+import asyncio, types
+import discord
+import pytest
+from discord.ext import commands
+from cooldowns import PersistentCooldowns
+
+
+def make_bot():
+    bot = commands.Bot(command_prefix="Mr!", intents=discord.Intents.none())
+
+    @commands.cooldown(1, 86400, commands.BucketType.user)
+    @bot.command(name="daily")
+    async def daily(ctx):
+        pass
+
+    return bot
+
+def make_context(bot, user_id):
+    message = types.SimpleNamespace(author=types.SimpleNamespace(id=user_id), guild=None, channel=None, _state=None)
+    ctx = commands.Context(message=message, bot=bot, view=None, prefix="Mr!")
+    ctx.command = bot.get_command("daily")
+    return ctx
+
+
+def test_check_does_not_start_cooldown(tmp_path):
+    async def run():
+        bot = make_bot()
+        cooldowns = PersistentCooldowns(types.SimpleNamespace(shared=False), path=str(tmp_path / "cooldowns.json"))
+        cooldowns.register_commands(bot.walk_commands())
+        bot.add_check(cooldowns.check)
+        ctx = make_context(bot, 1)
+
+        # Listing commands in help runs can_run over and over
+        assert await ctx.command.can_run(ctx)
+        assert await ctx.command.can_run(ctx)
+
+        # Running it starts the cooldown, for that user only
+        await cooldowns.hit(ctx)
+        with pytest.raises(commands.CommandOnCooldown):
+            await ctx.command.can_run(ctx)
+        assert await ctx.command.can_run(make_context(bot, 2))
+
+    asyncio.run(run())
+
+def test_only_one_invocation_starts_cooldown(tmp_path):
+    async def run():
+        bot = make_bot()
+        cooldowns = PersistentCooldowns(types.SimpleNamespace(shared=False), path=str(tmp_path / "cooldowns.json"))
+        cooldowns.register_commands(bot.walk_commands())
+        ctx = make_context(bot, 1)
+
+        # Both passed the check, the second one loses when it tries to start the cooldown
+        await cooldowns.hit(ctx)
+        with pytest.raises(commands.CommandOnCooldown):
+            await cooldowns.hit(ctx)
+
+    asyncio.run(run())
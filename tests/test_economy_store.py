@@ -0,0 +1,105 @@
+# Thousands of concurrent balance changes against every backend that runs locally: money is only ever
+# moved around, so the total has to come out exactly the same, and nobody can end up below zero
+import asyncio, random
+import pytest
+from economy_store import EconomyStore
+from storage import JsonBackend, SqliteBackend, SharedSqliteBackend
+
+USERS = 50
+START = 1000
+TRANSFERS = 3000
+
+
+def make_backend(kind, tmp_path):
+    if kind == "json":
+        return JsonBackend(str(tmp_path / "data.json"))
+    if kind == "sqlite":
+        return SqliteBackend(str(tmp_path / "data.db"))
+    return SharedSqliteBackend(str(tmp_path / "shared.db"))
+
+async def total_money(store, user_ids):
+    return sum([(await store.read_user(user_id)).money for user_id in user_ids])
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite", "shared-sqlite"])
+@pytest.mark.parametrize("lock_stripes", [1, 64])
+def test_concurrent_transfers_conserve_money(kind, lock_stripes, tmp_path):
+    async def run():
+        store = EconomyStore(make_backend(kind, tmp_path), lock_stripes=lock_stripes)
+        await store.start()
+        user_ids = list(range(1, USERS + 1))
+        for user_id in user_ids:
+            await store.credit(user_id, START)
+
+        rng = random.Random(0)
+
+        async def transfer(from_id, to_id, amount):
+            await store.transfer(from_id, to_id, amount)
+
+        # Read both balances, yield to the loop (where another command could run), then write what was read
+        # plus the change. Without the locks the other command's change would get overwritten
+        async def rob(robber_id, target_id):
+            async with store.transaction(robber_id, target_id, kind="rob") as (robber, target):
+                robber_money, target_money = robber.money, target.money
+                await asyncio.sleep(0)
+                stolen = target_money // 10
+                robber.money = robber_money + stolen
+                target.money = target_money - stolen
+
+        jobs = []
+        for _ in range(TRANSFERS):
+            from_id, to_id = rng.sample(user_ids, 2)
+            if rng.random() < 0.5:
+                jobs.append(transfer(from_id, to_id, rng.randint(1, 200)))
+            else:
+                jobs.append(rob(from_id, to_id))
+        await asyncio.gather(*jobs)
+
+        assert await total_money(store, user_ids) == USERS * START
+        assert min([(await store.read_user(user_id)).money for user_id in user_ids]) >= 0
+        await store.close()
+
+        # And the same after loading what was saved
+        reopened = EconomyStore(make_backend(kind, tmp_path))
+        await reopened.start()
+        assert await total_money(reopened, user_ids) == USERS * START
+        await reopened.close()
+
+    asyncio.run(run())
+
+
+# A tiny LEDGER_SNAPSHOT_BYTES so every flush compacts while commands run, including
+# ones that change records while the snapshot is being copied
+def test_compaction_keeps_every_change(tmp_path):
+    async def run():
+        backend = JsonBackend(str(tmp_path / "data.json"), snapshot_bytes=1)
+        store = EconomyStore(backend, flush_interval=3600, flush_threshold=10 ** 6)
+        await store.start()
+        for user_id in range(1, 25001):
+            await store.credit(user_id, 1)
+        await store.flush()
+
+        # Commands keep coming while the flushes copy the snapshot a chunk at a time
+        rng = random.Random(0)
+        running = True
+        async def commands():
+            while running:
+                await store.credit(rng.randint(1, 25000), 1)
+                await asyncio.sleep(0)
+
+        players = [asyncio.create_task(commands()) for _ in range(10)]
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            await store.flush()
+        running = False
+        await asyncio.gather(*players)
+        expected = {user_id: record.money for user_id, record in store.data.items()}
+        await store.close()
+        assert (tmp_path / "data.json").exists()
+
+        reopened = EconomyStore(JsonBackend(str(tmp_path / "data.json")))
+        await reopened.start()
+        assert {user_id: record.money for user_id, record in reopened.data.items()} == expected
+        await reopened.close()
+
+    asyncio.run(run())
@@ -0,0 +1,85 @@
+# Guild economies: loading and evicting guild stores, and their leaderboards
+import asyncio, random
+from guild_economy import GuildEconomies
+
+
+def test_never_evicts_the_store_it_returns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        economies = GuildEconomies(max_loaded=1)
+        async with economies.use(1) as busy, busy.transaction(10):
+            # The only other store is busy, so there's nothing to evict but the one being loaded
+            async with economies.use(2) as store:
+                assert 2 in economies.stores
+                assert 2 not in economies._closing
+                await store.credit(20, 5)
+        await economies.close()
+
+        reopened = GuildEconomies()
+        async with reopened.use(2) as store:
+            assert (await store.read_user(20)).money == 5
+        await reopened.close()
+
+    asyncio.run(run())
+
+
+# A command holding a store between awaits (like rob checking has_user before its transaction)
+# while other guilds push it out of the cache and the idle sweep runs
+def test_never_evicts_a_store_in_use(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        economies = GuildEconomies(max_loaded=1, idle_timeout=0.001)
+        async with economies.use(1) as store:
+            await store.credit(10, 1)
+            for guild_id in range(2, 6):
+                async with economies.use(guild_id) as other:
+                    await other.credit(10, 1)
+            await asyncio.sleep(0.01)
+            economies._evict_idle()
+            assert 1 in economies.stores and 1 not in economies._closing
+            # Still open, the write lands in this guild's ledger
+            await store.credit(10, 1)
+
+        # Once nobody uses it, it can go
+        async with economies.use(7):
+            pass
+        assert 1 not in economies.stores
+        await economies.close()
+
+        reopened = GuildEconomies()
+        async with reopened.use(1) as store:
+            assert (await store.read_user(10)).money == 2
+        await reopened.close()
+
+    asyncio.run(run())
+
+
+def test_rank_and_top_follow_transactions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        economies = GuildEconomies()
+        async with economies.use(1) as store:
+            await check_rankings(store)
+        await economies.close()
+
+    async def check_rankings(store):
+        rng = random.Random(0)
+        for user_id in range(1, 301):
+            await store.credit(user_id, rng.randrange(1000))
+        # The index gets built here, after that only transactions keep it up to date
+        assert store.rank(1) is not None
+        for _ in range(500):
+            from_id, to_id = rng.sample(range(1, 301), 2)
+            await store.transfer(from_id, to_id, rng.randrange(200))
+        # Read but never changed, so no transaction told the index about them
+        await store.read_user(301)
+
+        ordered = sorted(store.data.items(), key=lambda item: (-item[1].money, item[0]))
+        assert await store.top_balances(10) == [(user_id, record.money) for user_id, record in ordered[:10]]
+        for position, (user_id, _) in enumerate(ordered, 1):
+            assert store.rank(user_id) == (position, len(ordered))
+
+    asyncio.run(run())
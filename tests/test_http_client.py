@@ -0,0 +1,265 @@
+# HttpClient and TriviaBank against a local aiohttp stub server: every upstream is pointed at it and each test
+# queues up the responses it wants, in order
+import asyncio, json
+import pytest
+from aiohttp import web
+import http_client
+from http_client import HttpClient, UpstreamError
+from rate_limit import UpstreamGuards, UpstreamUnavailable
+from trivia_bank import TriviaBank, TOKEN_NOT_FOUND, TOKEN_EMPTY
+
+
+class Stub:
+    def __init__(self):
+        # (status, body) per request, the last one repeats
+        self.responses = [(200, '{"ok": true}')]
+        self.requests = 0
+        # (path, query) of every request
+        self.seen = []
+        self.runner = None
+
+    async def handle(self, request):
+        self.requests += 1
+        self.seen.append((request.path, dict(request.query)))
+        status, body = self.responses[0] if len(self.responses) == 1 else self.responses.pop(0)
+        if isinstance(body, float):
+            await asyncio.sleep(body)
+            body = '{"slow": true}'
+        return web.Response(status=status, text=body)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def close(self):
+        await self.runner.cleanup()
+
+
+# Runs test(stub, client) with a fresh stub and client, the breaker opening after failure_threshold failed calls
+def run(test, monkeypatch, failure_threshold=5, reset_timeout=30, **client_options):
+    async def main():
+        stub = Stub()
+        url = await stub.start()
+        for upstream in http_client.UPSTREAMS:
+            monkeypatch.setitem(http_client.UPSTREAMS, upstream, url)
+        guards = UpstreamGuards()
+        guards.failure_threshold = failure_threshold
+        guards.reset_timeout = reset_timeout
+        client = HttpClient(guards, **client_options)
+        try:
+            await test(stub, client)
+        finally:
+            await client.close()
+            await stub.close()
+
+    asyncio.run(main())
+
+
+def test_breaker_recovers_after_trial_gets_bad_json(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(503, "down"), (200, "<html>maintenance</html>"), (200, '{"joke": "ok"}')]
+        with pytest.raises(UpstreamError):
+            await client.get_json("dadjoke", "/")
+        with pytest.raises(UpstreamUnavailable):
+            await client.get_json("dadjoke", "/")
+
+        # The trial call gets HTML instead of JSON, that's a failure and the breaker opens again
+        await asyncio.sleep(0.06)
+        with pytest.raises(UpstreamError):
+            await client.get_json("dadjoke", "/")
+        with pytest.raises(UpstreamUnavailable):
+            await client.get_json("dadjoke", "/")
+
+        # The next trial works and closes it
+        await asyncio.sleep(0.06)
+        assert await client.get_json("dadjoke", "/") == {"joke": "ok"}
+        assert await client.get_json("dadjoke", "/") == {"joke": "ok"}
+        assert client.guards.get("dadjoke").breaker.state == "closed"
+
+    run(test, monkeypatch, failure_threshold=1, reset_timeout=0.05, retries=0)
+
+def test_cancelled_trial_lets_the_next_call_try(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(503, "down"), (200, 1.0), (200, '{"joke": "ok"}')]
+        with pytest.raises(UpstreamError):
+            await client.get_json("dadjoke", "/")
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.create_task(client.get_json("dadjoke", "/"))
+        await asyncio.sleep(0.1)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert await client.get_json("dadjoke", "/") == {"joke": "ok"}
+
+    run(test, monkeypatch, failure_threshold=1, reset_timeout=0.05, retries=0)
+
+
+# A call that started while the breaker was closed isn't the trial, cancelling it mustn't let a second one through
+def test_cancelled_call_keeps_the_trial_running(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(200, 1.0), (503, "down"), (200, 1.0), (200, '{"joke": "ok"}')]
+        before = asyncio.create_task(client.get_json("dadjoke", "/"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(UpstreamError):
+            await client.get_json("dadjoke", "/")
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.create_task(client.get_json("dadjoke", "/"))
+        await asyncio.sleep(0.05)
+        before.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await before
+        with pytest.raises(UpstreamUnavailable):
+            await client.get_json("dadjoke", "/")
+        assert stub.requests == 3
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    run(test, monkeypatch, failure_threshold=1, reset_timeout=0.05, retries=0)
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_then_succeeds(monkeypatch, status):
+    async def test(stub, client):
+        stub.responses = [(status, "busy"), (status, "busy"), (200, '{"joke": "ok"}')]
+        assert await client.get_json("dadjoke", "/") == {"joke": "ok"}
+        assert stub.requests == 3
+
+    run(test, monkeypatch, retries=2)
+
+def test_gives_up_after_retries(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(500, "broken")]
+        with pytest.raises(UpstreamError, match="HTTP 500"):
+            await client.get_json("dadjoke", "/")
+        assert stub.requests == 3
+
+    run(test, monkeypatch, retries=2)
+
+def test_client_errors_are_not_retried(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(404, "nope")]
+        with pytest.raises(UpstreamError, match="HTTP 404"):
+            await client.get_json("dadjoke", "/")
+        assert stub.requests == 1
+
+    run(test, monkeypatch, retries=2)
+
+def test_timeout_is_retried(monkeypatch):
+    async def test(stub, client):
+        # The first answer takes longer than the client's timeout
+        stub.responses = [(200, 1.0), (200, '{"joke": "ok"}')]
+        assert await client.get_json("dadjoke", "/") == {"joke": "ok"}
+        assert stub.requests == 2
+
+    run(test, monkeypatch, retries=1, timeout=0.2)
+
+def test_timeouts_give_up_after_retries(monkeypatch):
+    async def test(stub, client):
+        stub.responses = [(200, 1.0)]
+        with pytest.raises(UpstreamError, match="TimeoutError"):
+            await client.get_json("dadjoke", "/")
+        assert stub.requests == 2
+
+    run(test, monkeypatch, retries=1, timeout=0.2)
+
+def test_requests_share_one_pooled_session(monkeypatch):
+    async def test(stub, client):
+        await asyncio.gather(*(client.get_json("dadjoke", "/") for _ in range(5)))
+        session = client.session
+        await client.get_json("dadjoke", "/")
+        assert client.session is session
+        assert stub.requests == 6
+
+    run(test, monkeypatch)
+
+
+def opentdb_questions(*questions):
+    results = [
+        {"question": question, "correct_answer": f"{question} right", "incorrect_answers": [f"{question} wrong"] * 3}
+        for question in questions
+    ]
+    return 200, json.dumps({"response_code": 0, "results": results})
+
+
+def opentdb_code(code):
+    return 200, json.dumps({"response_code": code, "results": []})
+
+
+TOKEN = 200, json.dumps({"response_code": 0, "token": "abc"})
+
+
+def make_bank(client):
+    # opentdb's real limit is one request every 5 seconds
+    client.guards.limits["opentdb"] = (1000, 1000)
+    return TriviaBank(client, batch_size=2, low_water=1, request_spacing=0.01)
+
+
+def test_trivia_bank_gets_a_token_and_unescapes(monkeypatch):
+    async def test(stub, client):
+        bank = make_bank(client)
+        stub.responses = [TOKEN, opentdb_questions("Who&#039;s &quot;R&amp;B&quot;?", "2 &lt; 3")]
+        await bank.refill("easy")
+        assert stub.seen == [
+            ("/api_token.php", {"command": "request"}),
+            ("/api.php", {"amount": "2", "difficulty": "easy", "type": "multiple", "token": "abc"}),
+        ]
+        assert bank.take("easy") == ('Who\'s "R&B"?', 'Who\'s "R&B"? right', ('Who\'s "R&B"? wrong',) * 3)
+        assert bank.take("easy")[0] == "2 < 3"
+        assert bank.take("easy") is None
+        stats = bank.stats()
+        assert (stats["hits"], stats["misses"], stats["refills"]) == (2, 1, 1)
+        assert stats["hit_rate"] == 2 / 3
+        assert stats["bank_sizes"] == {"easy": 0, "medium": 0, "hard": 0}
+
+    run(test, monkeypatch)
+
+
+# An expired token gets replaced, a used up one gets reset, and the next refill works again
+@pytest.mark.parametrize("code", [TOKEN_NOT_FOUND, TOKEN_EMPTY])
+def test_trivia_bank_replaces_a_bad_token(code, monkeypatch):
+    async def test(stub, client):
+        bank = make_bank(client)
+        if code == TOKEN_NOT_FOUND:
+            fixed = [("/api_token.php", {"command": "request"})]
+            stub.responses = [TOKEN, opentdb_code(code), TOKEN, opentdb_questions("Q")]
+        else:
+            fixed = [("/api_token.php", {"command": "reset", "token": "abc"})]
+            stub.responses = [TOKEN, opentdb_code(code), (200, '{"response_code": 0}'), opentdb_questions("Q")]
+        await bank.refill("hard")
+        assert bank.take("hard") is None
+        await bank.refill("hard")
+        assert stub.seen[2:3] == fixed
+        assert stub.seen[-1][1]["token"] == "abc"
+        assert bank.take("hard")[0] == "Q"
+        assert bank.refills == 1
+
+    run(test, monkeypatch)
+
+
+# The background worker fills every difficulty, and tops a bank up again once take() runs it low
+def test_trivia_bank_refills_in_the_background(monkeypatch):
+    async def test(stub, client):
+        bank = make_bank(client)
+        stub.responses = [TOKEN, opentdb_questions("A", "B")]
+        bank.start()
+        try:
+            while sum(len(questions) for questions in bank.banks.values()) < 6:
+                await asyncio.sleep(0.01)
+            assert stub.requests == 4
+            assert [bank.take("medium")[0] for _ in range(2)] == ["A", "B"]
+            while len(bank.banks["medium"]) < 2:
+                await asyncio.sleep(0.01)
+            assert stub.seen[-1][1]["difficulty"] == "medium"
+            assert bank.stats()["refills"] == 4
+        finally:
+            await bank.close()
+
+    run(test, monkeypatch)
@@ -0,0 +1,40 @@
+import random
+from ranking import RankingIndex
+
+
+def expected(money):
+    return sorted(money.items(), key=lambda item: (-item[1], item[0]))
+
+
+def test_matches_sorting():
+    rng = random.Random(1)
+    index = RankingIndex()
+    money = {}
+    for _ in range(20000):
+        user_id = rng.randrange(500)
+        if rng.random() < 0.1:
+            index.remove(user_id)
+            money.pop(user_id, None)
+        else:
+            # Lots of ties so the user id order matters too
+            money[user_id] = rng.randrange(50)
+            index.update(user_id, money[user_id])
+
+        if rng.random() < 0.05:
+            ordered = expected(money)
+            assert len(index) == len(ordered)
+            assert index.top(10) == ordered[:10]
+            assert index.top(len(ordered) + 5) == ordered
+            for position, (user_id, _) in enumerate(ordered, 1):
+                assert index.rank(user_id) == position
+
+
+def test_unranked_user():
+    index = RankingIndex()
+    assert index.rank(1) is None
+    assert index.top(10) == []
+    index.update(1, 100)
+    index.remove(1)
+    index.remove(1)
+    assert index.rank(1) is None
+    assert len(index) == 0
@@ -0,0 +1,39 @@
+# The JSON state files: saved from a worker thread while the flush loop keeps running, and whatever
+# changed last is on disk after close()
+import asyncio
+from types import SimpleNamespace
+from cooldowns import CooldownFile
+from trivia_games import TriviaGames
+from trivia_stats import TriviaStats
+
+
+def test_close_saves_everything(tmp_path):
+    async def run():
+        games = TriviaGames(path=str(tmp_path / "trivia_games.json"), flush_interval=0.01)
+        games.start(None)
+        stats = TriviaStats(SimpleNamespace(shared=False), path=str(tmp_path / "trivia_stats.json"), flush_interval=0.01)
+        stats.start()
+        cooldowns = CooldownFile(str(tmp_path / "cooldowns.json"), flush_interval=0.01)
+        cooldowns.start()
+        for user_id in range(2000):
+            games.add(user_id, 1, user_id, 0, "Answer", "easy")
+            await stats.record(user_id, "easy", True)
+            cooldowns.hit("daily", user_id, 1000)
+            # Let the flush loops save while changes keep coming
+            if user_id % 100 == 0:
+                await asyncio.sleep(0.005)
+        await games.close()
+        await stats.close()
+        await cooldowns.close()
+
+        games = TriviaGames(path=str(tmp_path / "trivia_games.json"))
+        games.load()
+        stats = TriviaStats(SimpleNamespace(shared=False), path=str(tmp_path / "trivia_stats.json"))
+        stats.load()
+        cooldowns = CooldownFile(str(tmp_path / "cooldowns.json"))
+        cooldowns.load()
+        assert len(games.games) == 2000
+        assert len(stats.scores) == 2000
+        assert len(cooldowns.expiries["daily"]) == 2000
+
+    asyncio.run(run())
@@ -0,0 +1,119 @@
+# Leaderboard queries and locks of the query backends: SQLite, and Redis through redis_standin.py,
+# the Redis client losing its connection, and the JSON ledger surviving a crash in the middle of compaction
+import random, socket, threading
+import pytest
+from redis_client import RedisClient
+from storage import JsonBackend, SqliteBackend, RedisBackend
+
+USERS = 2000
+
+
+def make_backend(kind, tmp_path, redis_url):
+    if kind == "sqlite":
+        return SqliteBackend(str(tmp_path / "data.db"))
+    backend = RedisBackend(redis_url)
+    backend.prepare()
+    return backend
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "redis"])
+def test_top_balances(kind, tmp_path, redis_url):
+    backend = make_backend(kind, tmp_path, redis_url)
+    rng = random.Random(0)
+    # Balances past a million too, the stand-in used to round those
+    money = {user_id: rng.randrange(10 ** 7) for user_id in range(1, USERS + 1)}
+    backend.save({user_id: {"money": amount, "wins": 0, "losses": 0} for user_id, amount in money.items()})
+
+    richest = sorted(money.items(), key=lambda item: -item[1])
+    assert backend.top_balances(10) == richest[:10]
+
+    # A small guild, one with users that never played, and one bigger than a lookup chunk
+    for members in (rng.sample(range(1, USERS + 1), 7), [1, 2, USERS + 1, USERS + 2], range(1, 1501)):
+        expected = sorted(((user_id, money[user_id]) for user_id in members if user_id in money), key=lambda item: -item[1])
+        assert backend.top_balances(10, set(members)) == expected[:10]
+    backend.close()
+
+
+def test_redis_unlock_leaves_other_processes_lock(redis_url):
+    ours = RedisBackend(redis_url)
+    theirs = RedisBackend(redis_url)
+    theirs.token = "other-host:1"
+    assert ours.try_lock(3)
+    assert not theirs.try_lock(3)
+    ours.unlock(3)
+    assert theirs.try_lock(3)
+
+    # Our lock expired and the other process took it, unlocking must not release theirs
+    ours.unlock(3)
+    assert not ours.try_lock(3)
+    ours.close()
+    theirs.close()
+
+
+# A server that reads the first connection's commands and hangs up without answering, like Redis going away
+# mid-pipeline, then answers :1 on the next connection
+def dropping_server():
+    listener = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def serve():
+        for connection in range(2):
+            conn, _ = listener.accept()
+            with conn:
+                received.append(conn.recv(65536))
+                if connection:
+                    conn.sendall(b":1\r\n")
+        listener.close()
+    threading.Thread(target=serve, daemon=True).start()
+    return RedisClient(f"redis://127.0.0.1:{listener.getsockname()[1]}/0", timeout=2), received
+
+
+# Redis may have run the commands before the connection dropped: a HINCRBY must not be sent again,
+# a read can be
+def test_redis_client_only_resends_retryable_commands():
+    client, received = dropping_server()
+    with pytest.raises(ConnectionError):
+        client.execute("HINCRBY", "counters", "easy:correct", 1)
+    assert len(received) == 1
+    # The next call gets a new connection
+    assert client.execute("PTTL", "cooldown", retry=True) == 1
+    assert len(received) == 2
+    client.close()
+
+    client, received = dropping_server()
+    assert client.execute("PTTL", "cooldown", retry=True) == 1
+    assert received[0] == received[1]
+    client.close()
+
+
+def money_event(user_id, money):
+    return {"t": 0, "kind": "work", "users": [[user_id, money, 0, 0, 0]]}
+
+
+# The bot dies after one step of compact(): loading has to give the newest money either way. Dying after the
+# snapshot was written used to replay the old log over it and hand the user's 7 back instead of 9
+@pytest.mark.parametrize("crash_in, money", [("_write_snapshot", 7), ("_prune_segments", 9)])
+def test_compaction_crash_never_rolls_back(crash_in, money, tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    backend = JsonBackend(path)
+    backend.save({1}, [money_event(1, 5)])
+    backend.compact({"1": {"money": 5, "wins": 0, "losses": 0}})
+    backend.save({1}, [money_event(1, 7)])
+
+    def crash(*args):
+        raise SystemExit("killed")
+    monkeypatch.setattr(JsonBackend, crash_in, crash)
+    # 9 hasn't been logged yet, it's in the snapshot only
+    with pytest.raises(SystemExit):
+        backend.compact({"1": {"money": 9, "wins": 0, "losses": 0}})
+    monkeypatch.undo()
+
+    backend = JsonBackend(path)
+    assert backend.load_all()["1"]["money"] == money
+    # And it carries on from there
+    backend.save({1}, [money_event(1, money + 1)])
+    backend.compact({"1": {"money": money + 1, "wins": 0, "losses": 0}})
+    backend.save({2}, [money_event(2, 3)])
+    backend.close()
+    data = JsonBackend(path).load_all()
+    assert data["1"]["money"] == money + 1 and data["2"]["money"] == 3
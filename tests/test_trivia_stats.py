@@ -0,0 +1,76 @@
+# Trivia scores in shared mode: answers are batched as deltas and added to the backend every flush,
+# the result has to be the same as counting every answer one by one
+import asyncio, random
+from types import SimpleNamespace
+import pytest
+from economy_store import EconomyStore
+from storage import SharedSqliteBackend, RedisBackend
+from trivia_stats import TriviaScore, TriviaDelta, TriviaStats
+
+
+# Every answer one at a time, like the file mode does
+def count_one_by_one(score, answers):
+    stats = TriviaStats(SimpleNamespace(shared=False))
+    for correct in answers:
+        stats._count(score, correct)
+    return score.to_list()
+
+def random_answers(rng, count):
+    return [rng.random() < 0.7 for _ in range(count)]
+
+
+def test_delta_matches_counting():
+    rng = random.Random(0)
+    for _ in range(2000):
+        stored = TriviaScore(*(lambda streak: [50, 80, streak, streak + rng.randrange(5)])(rng.randrange(6)))
+        first, second = random_answers(rng, rng.randrange(8)), random_answers(rng, rng.randrange(8))
+        expected = count_one_by_one(TriviaScore(*stored.to_list()), first + second)
+
+        delta = TriviaDelta()
+        for correct in first + second:
+            delta.count(correct)
+        assert delta.apply(stored).to_list() == expected
+
+        # A failed batch followed by newer answers
+        earlier, later = TriviaDelta(), TriviaDelta()
+        for correct in first:
+            earlier.count(correct)
+        for correct in second:
+            later.count(correct)
+        assert earlier.then(later).apply(stored).to_list() == expected
+
+
+@pytest.mark.parametrize("kind", ["shared-sqlite", "redis"])
+def test_shared_batches_add_up(kind, tmp_path, redis_url):
+    async def run():
+        backend = SharedSqliteBackend(str(tmp_path / "shared.db")) if kind == "shared-sqlite" else RedisBackend(redis_url)
+        store = EconomyStore(backend)
+        await store.start()
+        # Two processes' worth of stats writing to the same backend, each with its own users answering
+        stats = [TriviaStats(store, flush_interval=3600), TriviaStats(store, flush_interval=3600)]
+        expected = {}
+        rng = random.Random(1)
+        for _ in range(10):
+            for _ in range(100):
+                user_id, difficulty = rng.randint(1, 6), rng.choice(["easy", "hard"])
+                correct = rng.random() < 0.7
+                score = await stats[user_id % 2].record(user_id, difficulty, correct)
+                count_one_by_one(expected.setdefault((user_id, difficulty), TriviaScore()), [correct])
+                assert score.to_list() == expected[(user_id, difficulty)].to_list()
+            # Before the flush the answers are only in memory, after it only in the backend
+            for process in stats:
+                await process.save()
+                assert not process.pending and not process.flushing
+
+        # Read back by the other process, straight from the backend
+        for (user_id, difficulty), score in expected.items():
+            assert (await stats[(user_id + 1) % 2].get(user_id))[difficulty].to_list() == score.to_list()
+        totals = {}
+        for (user_id, _), score in expected.items():
+            correct, attempted = totals.get(user_id, (0, 0))
+            totals[user_id] = (correct + score.correct, attempted + score.attempted)
+        expected_top = sorted(((user_id, *total) for user_id, total in totals.items()), key=lambda row: (-row[1], row[2]))
+        assert await stats[0].top(range(1, 7), 3) == expected_top[:3]
+        await store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+# Only sync slash commands with Discord when they actually changed.
+# Syncing is a rate limited global API call, so doing it on every on_ready (every reconnect) is a bad idea
+import hashlib, json, os
+
+HASH_FILE = ".tree_hash.json"
+
+
+# Everything Discord knows about the commands (names, descriptions, choices, parameters), as one hash
+def tree_hash(tree, guild=None):
+    payloads = []
+    for command in tree.get_commands(guild=guild):
+        try:
+            payloads.append(command.to_dict(tree))
+        except TypeError:
+            # Older discord.py versions don't take the tree
+            payloads.append(command.to_dict())
+    payloads.sort(key=lambda payload: (payload.get("type", 1), payload["name"]))
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True).encode()).hexdigest()
+
+
+def _load_hashes(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_hashes(path, hashes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(hashes, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+# Sync the command tree if its hash changed since the last sync. Set DEV_GUILD_ID to sync to one
+# guild instead (shows up instantly, handy while testing), and FORCE_TREE_SYNC=1 to always sync.
+# Returns True if it synced
+async def sync_tree(bot, path=HASH_FILE):
+    import discord
+
+    # Not logged in (e.g. the load test runs setup_hook by hand), there's nobody to sync with.
+    # launcher.py also sets SKIP_TREE_SYNC on all but one worker, the commands only need syncing once
+    if bot.application_id is None or os.getenv("SKIP_TREE_SYNC"):
+        return False
+
+    guild = None
+    dev_guild_id = os.getenv("DEV_GUILD_ID")
+    if dev_guild_id:
+        guild = discord.Object(id=int(dev_guild_id))
+        bot.tree.copy_global_to(guild=guild)
+
+    scope = str(guild.id) if guild else "global"
+    current = tree_hash(bot.tree, guild=guild)
+    hashes = _load_hashes(path)
+    if hashes.get(scope) == current and not os.getenv("FORCE_TREE_SYNC"):
+        print(f"Slash commands unchanged ({scope}), not syncing")
+        return False
+
+    await bot.tree.sync(guild=guild)
+    hashes[scope] = current
+    _save_hashes(path, hashes)
+    print(f"Synced slash commands ({scope})")
+    return True
@@ -0,0 +1,126 @@
+# Local bank of trivia questions per difficulty, filled from opentdb in bulk so the trivia command never waits on it
+import asyncio, html, os, time
+from collections import deque
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# opentdb response codes
+OK, NO_RESULTS, INVALID_PARAMETER, TOKEN_NOT_FOUND, TOKEN_EMPTY, RATE_LIMIT = range(6)
+
+
+class TriviaBank:
+    def __init__(self, api, batch_size=None, low_water=None, request_spacing=None):
+        self.api = api
+        # How many questions to fetch per request, and when to go get more
+        self.batch_size = batch_size or int(os.getenv("TRIVIA_BATCH_SIZE", 50))
+        self.low_water = low_water or int(os.getenv("TRIVIA_LOW_WATER", 10))
+        # opentdb only allows one request every 5 seconds per IP
+        self.request_spacing = request_spacing or float(os.getenv("TRIVIA_REQUEST_SPACING", 5.5))
+        self.banks = {difficulty: deque() for difficulty in DIFFICULTIES}
+        # Session token so opentdb doesn't give us the same question twice
+        self.token = None
+        self._wanted = set()
+        self._wake = asyncio.Event()
+        self._task = None
+        # Numbers for keeping an eye on the bank
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.last_refill_seconds = 0.0
+
+    # Start the background worker and ask it to fill every difficulty
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop())
+        for difficulty in DIFFICULTIES:
+            self._request_refill(difficulty)
+
+    # Get a question right away as (question, correct_answer, incorrect_answers), or None if the bank is empty
+    def take(self, difficulty):
+        bank = self.banks[difficulty]
+        question = bank.popleft() if bank else None
+        if question is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if len(bank) < self.low_water:
+            self._request_refill(difficulty)
+        return question
+
+    def _request_refill(self, difficulty):
+        self._wanted.add(difficulty)
+        self._wake.set()
+
+    # One request at a time, spaced out so we stay under opentdb's rate limit
+    async def _refill_loop(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._wanted:
+                difficulty = self._wanted.pop()
+                try:
+                    await self.refill(difficulty)
+                except Exception as e:
+                    print(f"Couldn't refill {difficulty} trivia questions: {e!r}")
+                await asyncio.sleep(self.request_spacing)
+                if len(self.banks[difficulty]) < self.low_water:
+                    self._wanted.add(difficulty)
+
+    async def _new_token(self):
+        response = await self.api.get_json("opentdb", "/api_token.php", params={"command": "request"}, max_wait=self.request_spacing * 2)
+        self.token = response.get("token")
+
+    # Fetch a batch of questions and add them to the bank
+    async def refill(self, difficulty):
+        started = time.monotonic()
+        if self.token is None:
+            await self._new_token()
+
+        params = {"amount": self.batch_size, "difficulty": difficulty, "type": "multiple"}
+        if self.token:
+            params["token"] = self.token
+        response = await self.api.get_json("opentdb", "/api.php", params=params, max_wait=self.request_spacing * 2)
+        code = response.get("response_code")
+
+        if code == TOKEN_NOT_FOUND:
+            # Tokens expire after 6 hours of not being used, get a new one next time
+            self.token = None
+            return
+        if code == TOKEN_EMPTY:
+            # We've seen every question, start over
+            await self.api.get_json("opentdb", "/api_token.php", params={"command": "reset", "token": self.token}, max_wait=self.request_spacing * 2)
+            return
+        if code != OK:
+            return
+
+        # Unescape once here so the command doesn't have to
+        bank = self.banks[difficulty]
+        for result in response["results"]:
+            bank.append((
+                html.unescape(result["question"]),
+                html.unescape(result["correct_answer"]),
+                tuple(html.unescape(answer) for answer in result["incorrect_answers"])
+            ))
+
+        self.refills += 1
+        self.last_refill_seconds = time.monotonic() - started
+        self.refill_seconds += self.last_refill_seconds
+
+    # Hit rate, bank sizes and refill latency
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bank_sizes": {difficulty: len(bank) for difficulty, bank in self.banks.items()},
+            "refills": self.refills,
+            "avg_refill_seconds": self.refill_seconds / self.refills if self.refills else 0.0,
+            "last_refill_seconds": self.last_refill_seconds,
+        }
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
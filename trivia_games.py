@@ -0,0 +1,136 @@
+# Trivia questions waiting for an answer, keyed by the message the question was sent in.
+# The answer buttons are one persistent view for every message (see cogs/trivia.py), so all a game needs
+# is this small record. Games expire through one timer wheel instead of a timeout task per view,
+# the registry is bounded, and it's saved to disk so questions keep working after a restart.
+# A question's buttons only ever reach the process running its guild's shard, so with several processes
+# (see launcher.py) each one keeps its own file
+import asyncio, os, time
+from collections import OrderedDict
+from state_file import worker_path, read_json, save_json, flush_every
+
+
+class TriviaGame:
+    __slots__ = ("channel_id", "author_id", "correct_index", "correct_answer", "expires_at", "difficulty")
+
+    def __init__(self, channel_id, author_id, correct_index, correct_answer, expires_at, difficulty="easy"):
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.correct_index = correct_index
+        self.correct_answer = correct_answer
+        # Unix time, so it still means something after a restart
+        self.expires_at = expires_at
+        self.difficulty = difficulty
+
+
+class TriviaGames:
+    def __init__(self, path="trivia_games.json", timeout=None, max_games=None, flush_interval=None):
+        self.path = worker_path(path)
+        self.timeout = timeout or float(os.getenv("TRIVIA_TIMEOUT", 30))
+        self.max_games = max_games or int(os.getenv("TRIVIA_MAX_GAMES", 10000))
+        self.flush_interval = flush_interval or float(os.getenv("TRIVIA_FLUSH_INTERVAL", 10))
+        # message id -> TriviaGame, oldest first
+        self.games = OrderedDict()
+        # Timer wheel: one slot per second, each a set of message ids expiring in that second
+        self.wheel = [set() for _ in range(int(self.timeout) + 2)]
+        self.dirty = False
+        self._save_lock = asyncio.Lock()
+        # Called with (message id, game) when a game expires without an answer, to disable its buttons
+        self.on_expire = None
+        self._tick_task = None
+        self._flush_task = None
+
+    # The first whole second after the game expires, so the tick for that second always finds it expired
+    def _slot(self, expires_at):
+        return (int(expires_at) + 1) % len(self.wheel)
+
+    def load(self):
+        raw = read_json(self.path)
+        if raw is None:
+            return
+        now = time.time()
+        for message_id, fields in raw.items():
+            game = TriviaGame(*fields)
+            # Games that timed out while the bot was down just stay unanswerable
+            if game.expires_at > now:
+                self._insert(int(message_id), game)
+
+    def start(self, on_expire):
+        self.on_expire = on_expire
+        if self._tick_task is None or self._tick_task.done():
+            self.load()
+            self._tick_task = asyncio.create_task(self._tick_loop())
+            self._flush_task = asyncio.create_task(flush_every(self.flush_interval, self.save, "trivia games"))
+
+    def _insert(self, message_id, game):
+        self.games[message_id] = game
+        self.wheel[self._slot(game.expires_at)].add(message_id)
+
+    # Start a game for a question that was just sent. If there are too many, the oldest one is dropped
+    def add(self, message_id, channel_id, author_id, correct_index, correct_answer, difficulty):
+        game = TriviaGame(channel_id, author_id, correct_index, correct_answer, time.time() + self.timeout, difficulty)
+        self._insert(message_id, game)
+        if len(self.games) > self.max_games:
+            old_message_id, old_game = self.games.popitem(last=False)
+            self.wheel[self._slot(old_game.expires_at)].discard(old_message_id)
+        self.dirty = True
+        return game
+
+    def get(self, message_id):
+        return self.games.get(message_id)
+
+    # The question got answered, take it out so nobody can answer it twice
+    def finish(self, message_id):
+        game = self.games.pop(message_id, None)
+        if game is not None:
+            self.wheel[self._slot(game.expires_at)].discard(message_id)
+            self.dirty = True
+        return game
+
+    # Every second, expire whatever is in the current slot. A slot can also hold games a whole
+    # turn of the wheel away (loaded from disk with a different TRIVIA_TIMEOUT), those stay put.
+    # Expired messages get edited one after the other, a gentle pace for Discord's rate limits
+    async def _tick_loop(self):
+        last = int(time.time())
+        while True:
+            # Wake up right after each whole second, so a game is never more than a second late
+            await asyncio.sleep(last + 1.01 - time.time())
+            now = time.time()
+            # Catch up on every second that passed, the loop can be late
+            for second in range(last + 1, int(now) + 1):
+                slot = self.wheel[second % len(self.wheel)]
+                expired = [message_id for message_id in slot if self.games[message_id].expires_at <= now]
+                for message_id in expired:
+                    # Might have been answered while we were editing the previous one
+                    game = self.games.pop(message_id, None)
+                    if game is None:
+                        continue
+                    slot.discard(message_id)
+                    self.dirty = True
+                    try:
+                        await self.on_expire(message_id, game)
+                    except Exception as e:
+                        print(f"Couldn't expire trivia question {message_id}: {e!r}")
+            last = int(now)
+
+    async def save(self):
+        async with self._save_lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            raw = {
+                message_id: [game.channel_id, game.author_id, game.correct_index, game.correct_answer, game.expires_at, game.difficulty]
+                for message_id, game in self.games.items()
+            }
+            try:
+                await save_json(self.path, raw)
+            except BaseException:
+                self.dirty = True
+                raise
+
+    async def close(self):
+        for task in (self._tick_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+        self._tick_task = None
+        self._flush_task = None
+        await self.save()
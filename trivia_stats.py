@@ -0,0 +1,227 @@
+# Trivia scores per user and difficulty: questions answered, correct answers, current and best streak.
+# Answers only change the in-memory numbers, the file gets written every TRIVIA_STATS_FLUSH_INTERVAL seconds if anything changed,
+# so a busy trivia channel doesn't mean a write per click.
+# A user answers in guilds on every shard, so with a shared storage backend (several processes, see launcher.py)
+# the scores live in the backend instead. Answers are kept as deltas in memory and added to the backend in one
+# batch per flush interval, reads merge the deltas that aren't written yet into what the backend has
+import asyncio, heapq, os
+from state_file import read_json, save_json, flush_every
+
+
+class TriviaScore:
+    __slots__ = ("correct", "attempted", "streak", "best_streak")
+
+    def __init__(self, correct=0, attempted=0, streak=0, best_streak=0):
+        self.correct = correct
+        self.attempted = attempted
+        self.streak = streak
+        self.best_streak = best_streak
+
+    def to_list(self):
+        return [self.correct, self.attempted, self.streak, self.best_streak]
+
+
+# Answers of one user at one difficulty that aren't in the shared backend yet. Streaks can't just be added up:
+# lead is the run of correct answers before the first wrong one (it continues the stored streak), after a wrong
+# one (reset) the streak starts over at tail, and best is the longest run that started after a wrong answer
+class TriviaDelta:
+    __slots__ = ("correct", "attempted", "lead", "reset", "tail", "best")
+
+    def __init__(self):
+        self.correct = 0
+        self.attempted = 0
+        self.lead = 0
+        self.reset = False
+        self.tail = 0
+        self.best = 0
+
+    def count(self, correct):
+        self.attempted += 1
+        if not correct:
+            self.reset = True
+            self.tail = 0
+        elif self.reset:
+            self.correct += 1
+            self.tail += 1
+            self.best = max(self.best, self.tail)
+        else:
+            self.correct += 1
+            self.lead += 1
+
+    # These answers, then the later ones (a batch that failed to save gets the newer answers put after it)
+    def then(self, later):
+        combined = TriviaDelta()
+        combined.correct = self.correct + later.correct
+        combined.attempted = self.attempted + later.attempted
+        if not self.reset:
+            combined.lead = self.lead + later.lead
+            combined.reset, combined.tail, combined.best = later.reset, later.tail, later.best
+        elif later.reset:
+            combined.lead, combined.reset, combined.tail = self.lead, True, later.tail
+            combined.best = max(self.best, self.tail + later.lead, later.best)
+        else:
+            combined.lead, combined.reset, combined.tail = self.lead, True, self.tail + later.lead
+            combined.best = max(self.best, combined.tail)
+        return combined
+
+    # A stored score with these answers on top
+    def apply(self, score):
+        streak = self.tail if self.reset else score.streak + self.lead
+        best_streak = max(score.best_streak, score.streak + self.lead, self.best)
+        return TriviaScore(score.correct + self.correct, score.attempted + self.attempted, streak, best_streak)
+
+
+class TriviaStats:
+    def __init__(self, store, path="trivia_stats.json", flush_interval=None):
+        self.store = store
+        self.shared = store.shared
+        self.path = path
+        self.flush_interval = flush_interval or float(os.getenv("TRIVIA_STATS_FLUSH_INTERVAL", 30))
+        # user id -> {difficulty: TriviaScore}, everything when it's a file. In shared mode only what was read from
+        # the backend for users answering right now, until the next flush
+        self.scores = {}
+        self.dirty = False
+        # Shared mode: user id -> {difficulty: TriviaDelta} not written yet, and the batch being written
+        self.pending = {}
+        self.flushing = {}
+        self._save_lock = asyncio.Lock()
+        self._task = None
+
+    def load(self):
+        raw = read_json(self.path)
+        if raw is None:
+            return
+        self.scores = {
+            int(user_id): {difficulty: TriviaScore(*values) for difficulty, values in difficulties.items()}
+            for user_id, difficulties in raw.items()
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if not self.shared:
+                self.load()
+            self._task = asyncio.create_task(flush_every(self.flush_interval, self.save, "trivia stats"))
+
+    # A user answered a question
+    async def record(self, user_id, difficulty, correct):
+        if self.shared:
+            # The stored scores get read once per flush interval, to show the streak
+            if user_id not in self.scores:
+                stored = await self._read([user_id])
+                self.scores[user_id] = stored.get(user_id, {})
+            self.pending.setdefault(user_id, {}).setdefault(difficulty, TriviaDelta()).count(correct)
+            return self._merge(user_id, self.scores[user_id])[difficulty]
+
+        score = self.scores.setdefault(user_id, {}).get(difficulty)
+        if score is None:
+            score = self.scores[user_id][difficulty] = TriviaScore()
+        self._count(score, correct)
+        self.dirty = True
+        return score
+
+    def _count(self, score, correct):
+        score.attempted += 1
+        if correct:
+            score.correct += 1
+            score.streak += 1
+            score.best_streak = max(score.best_streak, score.streak)
+        else:
+            score.streak = 0
+
+    # What the shared backend has for the given users, as user id -> {difficulty: TriviaScore}
+    async def _read(self, user_ids):
+        raw = await self.store.trivia_scores(list(user_ids))
+        return {
+            user_id: {difficulty: TriviaScore(*values) for difficulty, values in difficulties.items()}
+            for user_id, difficulties in raw.items()
+        }
+
+    # A user's stored scores with the answers that aren't in the backend yet on top
+    def _merge(self, user_id, stored):
+        merged = dict(stored)
+        for deltas in (self.flushing, self.pending):
+            for difficulty, delta in deltas.get(user_id, {}).items():
+                merged[difficulty] = delta.apply(merged.get(difficulty, TriviaScore()))
+        return merged
+
+    # {difficulty: TriviaScore} for a user, empty if they never played
+    async def get(self, user_id):
+        if self.shared:
+            stored = self.scores.get(user_id)
+            if stored is None:
+                stored = (await self._read([user_id])).get(user_id, {})
+            return self._merge(user_id, stored)
+        return self.scores.get(user_id, {})
+
+    # Members with the most correct answers as (user id, correct, attempted), optionally for one difficulty
+    async def top(self, member_ids, limit, difficulty=None):
+        if self.shared:
+            stored = await self._read(member_ids)
+            everyone = {user_id: self._merge(user_id, stored.get(user_id, {})) for user_id in member_ids}
+        else:
+            everyone = self.scores
+
+        rows = []
+        for user_id in member_ids:
+            difficulties = everyone.get(user_id)
+            if not difficulties:
+                continue
+            if difficulty is None:
+                scores = difficulties.values()
+            elif difficulty in difficulties:
+                scores = [difficulties[difficulty]]
+            else:
+                continue
+            correct = sum(score.correct for score in scores)
+            attempted = sum(score.attempted for score in scores)
+            if attempted:
+                rows.append((user_id, correct, attempted))
+        return heapq.nlargest(limit, rows, key=lambda row: (row[1], -row[2]))
+
+    async def save(self):
+        async with self._save_lock:
+            if self.shared:
+                await self._save_deltas()
+                return
+            if not self.dirty:
+                return
+            self.dirty = False
+            raw = {
+                user_id: {difficulty: score.to_list() for difficulty, score in difficulties.items()}
+                for user_id, difficulties in self.scores.items()
+            }
+            try:
+                await save_json(self.path, raw)
+            except BaseException:
+                self.dirty = True
+                raise
+
+    # Every answer since the last flush in one batch. Reads keep counting the batch until it's written
+    async def _save_deltas(self):
+        if not self.pending:
+            return
+        self.flushing, self.pending = self.pending, {}
+        batch = [
+            (user_id, difficulty, delta.correct, delta.attempted, delta.lead, delta.reset, delta.tail, delta.best)
+            for user_id, difficulties in self.flushing.items()
+            for difficulty, delta in difficulties.items()
+        ]
+        try:
+            await self.store.add_trivia_scores(batch)
+        except BaseException:
+            # Try again next time, with the answers that came in meanwhile after these
+            for user_id, difficulties in self.pending.items():
+                failed = self.flushing.setdefault(user_id, {})
+                for difficulty, delta in difficulties.items():
+                    failed[difficulty] = failed[difficulty].then(delta) if difficulty in failed else delta
+            self.pending, self.flushing = self.flushing, {}
+            raise
+        self.flushing = {}
+        # Read again next time, with what other processes added
+        self.scores = {}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.save()